@@ -1,19 +1,92 @@
-from flask import Flask, request, jsonify
+import os
+from time import perf_counter
+from flask import Flask, g, request, jsonify
 import pandas as pd
-from src.features import build_features
-from src.model import load_model, predict_from_model
+from src.admission import admission_stats, init_app as init_admission
+from src.deadline import observe_full, plan as plan_deadline, request_deadline, text_free_features
+from src.drift import drift_report, observe as observe_drift
+from src.features import get_poi_layer
+from src.metrics import IN_FLIGHT, init_app as init_metrics, record_stages, stage
+from src.model import endpoint_tiers, load_tiers, predict_features, prepare_features, select_tier
+from src.profiling import init_app as init_profiling
+from src.request_log import RequestLog, log_request, model_version, set_request_log
+from src.shadow import get_shadow, load_shadow, set_shadow, shadow_request
+from src.sweep import sweep_response
+from src.tiles import send_tile, tile_metadata
+from src.wire import PayloadError, prediction_response, read_frame
 
 app = Flask(__name__)
+init_metrics(app)
+init_admission(app)
+init_profiling(app)
 
 # Model path
 MODEL_PATH = "models/lgb_model.pkl"
+# MODEL_BACKEND=onnx serves the exported pipeline with onnxruntime instead
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "lightgbm")
+ONNX_MODEL_PATH = os.environ.get("ONNX_MODEL_PATH", "models/lgb_model.onnx")
+# MODEL_REGISTRY=regions.json routes each listing to its region's model (see src/registry.py)
+MODEL_REGISTRY = os.environ.get("MODEL_REGISTRY")
+if MODEL_REGISTRY:
+    MODEL_BACKEND = "registry"
+# ENDPOINT_TIERS="/sweep=fast,/analyze=fast" serves those endpoints from the distilled fast tier
+# (see src/distill.py); ?tier=full|fast picks the tier for a single request
+ENDPOINT_TIERS = endpoint_tiers(os.environ.get("ENDPOINT_TIERS"))
+# PREDICT_DEADLINE_MS=50 gives every /predict a latency budget (clients can send X-Deadline-Ms);
+# requests that would miss it skip the text features and use the fallback model (see src/deadline.py)
+PREDICT_DEADLINE_MS = os.environ.get("PREDICT_DEADLINE_MS")
 
 # ✅ Load model immediately at startup (Flask 3.x removed before_first_request)
 try:
-    model = load_model(MODEL_PATH)
+    if MODEL_BACKEND == "registry":
+        from src.registry import load_registry
+        model = load_registry(MODEL_REGISTRY)
+        tiers = {"full": model}
+    elif MODEL_BACKEND == "onnx":
+        from src.onnx_export import load_onnx_model
+        model = load_onnx_model(ONNX_MODEL_PATH)
+        tiers = {"full": model}
+    else:
+        tiers = load_tiers(MODEL_PATH)
+        model = tiers["full"]
 except Exception as e:
     print(f"⚠️ Failed to load model at startup: {e}")
     model = None
+    tiers = {"full": None}
+
+# REQUEST_LOG_DIR=logs/requests records /predict traffic to rotating Parquet files (see src/request_log.py)
+REQUEST_LOG_DIR = os.environ.get("REQUEST_LOG_DIR")
+if REQUEST_LOG_DIR and model is not None:
+    try:
+        served_path = {"registry": MODEL_REGISTRY, "onnx": ONNX_MODEL_PATH}.get(MODEL_BACKEND, MODEL_PATH)
+        set_request_log(RequestLog(REQUEST_LOG_DIR, model_version=model_version(served_path)))
+    except Exception as e:
+        print(f"⚠️ Request logging disabled: {e}")
+
+# SHADOW_MODEL_PATH=models/candidate.pkl scores a candidate on sampled /predict traffic, off the response
+# path (see src/shadow.py); SHADOW_SAMPLE_RATE and SHADOW_CPU_BUDGET (share of one core) bound its cost
+SHADOW_MODEL_PATH = os.environ.get("SHADOW_MODEL_PATH")
+if SHADOW_MODEL_PATH and model is not None and MODEL_BACKEND == "lightgbm":
+    try:
+        set_shadow(load_shadow(SHADOW_MODEL_PATH, sample_rate=float(os.environ.get("SHADOW_SAMPLE_RATE", 0.1)),
+                               cpu_budget=float(os.environ.get("SHADOW_CPU_BUDGET", 0.05))))
+    except Exception as e:
+        print(f"⚠️ Shadow model disabled: {e}")
+
+# TILES_DIR holds the price-surface tiles built by `train.py --mode tiles` (see src/tiles.py)
+TILES_DIR = os.environ.get("TILES_DIR", "tiles")
+tile_set = None
+if model is not None and MODEL_BACKEND != "registry":
+    try:
+        tile_set = tile_metadata(TILES_DIR, MODEL_PATH)
+    except OSError as e:
+        print(f"⚠️ Tiles disabled: {e}")
+
+
+def tier_model():
+    """The model tier serving this request: ?tier=, else the endpoint's ENDPOINT_TIERS default"""
+    return select_tier(tiers, request.args.get("tier"), ENDPOINT_TIERS.get(request.path, "full"))
+
 
 @app.route("/predict", methods=["POST"])
 def predict():
@@ -21,21 +94,49 @@ def predict():
         if model is None:
             return jsonify({"error": "Model not loaded"}), 500
 
-        data = request.get_json()
-        if not data:
-            return jsonify({"error": "No input provided"}), 400
-
-        # Convert JSON → DataFrame → Feature Engineering
-        df = pd.DataFrame([data])
-        df = build_features(df)
+        started = perf_counter() - g.get("admission_wait", 0.0)  # time queued counts against the deadline
+        scorer = tier_model()
+        deadline = request_deadline(request, PREDICT_DEADLINE_MS)
+        # Stages are timed with plain clock readings and recorded together at the end
+        t_parse = perf_counter()
+        df, single = read_frame(request)
+        t_features = perf_counter()
 
-        # Convert back to dict (for predict_from_model)
-        processed_input = df.to_dict(orient="records")[0]
+        # Skip the text features if the full pipeline would miss the deadline
+        degraded = None
+        if deadline is not None and "fallback" in tiers:
+            degraded = plan_deadline(len(df), deadline, t_features - started, IN_FLIGHT.value())
+        if degraded:
+            scorer = tiers["fallback"]
+            features_stage = "features.text_free"
+            X = text_free_features(df)
+        else:
+            # JSON object / list or Arrow stream → DataFrame → Feature Engineering
+            features_stage = "features"
+            X = prepare_features(scorer, df)
+        t_predict = perf_counter()
+        parse_seconds, features_seconds = t_features - t_parse, t_predict - t_features
+        if not degraded:
+            observe_drift(X)
 
         # Predict
-        pred = predict_from_model(model, processed_input)
-        return jsonify({"prediction": float(pred)})
+        t = perf_counter()
+        preds = predict_features(scorer, X)
+        predict_seconds = perf_counter() - t
+        if not degraded:
+            observe_full(len(df), features_seconds + predict_seconds)
+            if scorer is model:
+                shadow_request(df, X, preds, predict_seconds)
+        log_request("/predict", df, preds, {"parse": parse_seconds, "features": features_seconds,
+                                            "predict": predict_seconds}, scorer, X)
+        t_serialize = perf_counter()
+        response = prediction_response(request, preds, single, degraded)
+        record_stages(("parse", features_stage, "serialize"),
+                      (parse_seconds, features_seconds, perf_counter() - t_serialize))
+        return response
 
+    except PayloadError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -47,15 +148,16 @@ def analyze():
         if model is None:
             return jsonify({"error": "Model not loaded"}), 500
 
-        data = request.get_json()
+        scorer = tier_model()
+        with stage("parse"):
+            data = request.get_json()
         if not data:
             return jsonify({"error": "No input provided"}), 400
 
         # Get base prediction
-        df = pd.DataFrame([data])
-        df = build_features(df)
-        processed_input = df.to_dict(orient="records")[0]
-        base_price = predict_from_model(model, processed_input)
+        with stage("features"):
+            X = prepare_features(scorer, pd.DataFrame([data]))
+        base_price = predict_features(scorer, X)[0]
 
         # Market analysis
         area = data.get("area", 1200)
@@ -84,20 +186,97 @@ def analyze():
             }
         }
         
-        return jsonify(market_analysis)
+        with stage("serialize"):
+            return jsonify(market_analysis)
 
+    except PayloadError as e:
+        return jsonify({"error": str(e)}), e.status
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/sweep", methods=["POST"])
+def sweep():
+    """What-if sweep: one property scored over a grid of one or two attributes"""
+    try:
+        if model is None:
+            return jsonify({"error": "Model not loaded"}), 500
+
+        with stage("parse"):
+            data = request.get_json(silent=True)
+        try:
+            result = sweep_response(tier_model(), data)
+        except ValueError as e:  # bad params or tier, or a listing no regional model covers
+            return jsonify({"error": str(e)}), getattr(e, "status", 400)
+
+        with stage("serialize"):
+            return jsonify(result)
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/drift", methods=["GET"])
+def drift():
+    """PSI / KS drift of recent /predict traffic against the training features"""
+    return jsonify(drift_report())
+
+
+@app.route("/nearby", methods=["GET"])
+def nearby():
+    """Nearest POI of each category to ?lat=&lon=, from the model's POI layer"""
+    layer = get_poi_layer()
+    if layer is None:
+        return jsonify({"error": "The loaded model has no POI layer; train with --pois"}), 404
+    try:
+        lat, lon = float(request.args["lat"]), float(request.args["lon"])
+    except (KeyError, ValueError):
+        return jsonify({"error": "Pass numeric lat and lon query parameters"}), 400
+    return jsonify({"radius_km": layer.radius_km, "nearby": layer.nearby(lat, lon)})
+
+
+@app.route("/shadow", methods=["GET"])
+def shadow():
+    """Shadow model comparison: prediction deltas and latency against the served model"""
+    evaluator = get_shadow()
+    if evaluator is None:
+        return jsonify({"error": "No shadow model loaded; set SHADOW_MODEL_PATH"}), 404
+    return jsonify(evaluator.report())
+
+
+@app.route("/tiles/<version>/<int:z>/<int:x>/<int:y>.<fmt>", methods=["GET"])
+def tile(version, z, x, y, fmt):
+    """One precomputed price-surface tile, immutable per model version"""
+    return send_tile(TILES_DIR, version, z, x, y, fmt)
+
+
+@app.route("/tiles/current", methods=["GET"])
+def current_tiles():
+    """Metadata (URL template, zooms, color scale) of the served model's tiles"""
+    if tile_set is None:
+        return jsonify({"error": "No tiles built for the loaded model; run train.py --mode tiles"}), 404
+    response = jsonify(tile_set)
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response
+
+
 @app.route("/health", methods=["GET"])
 def health():
     """Health check endpoint"""
-    return jsonify({
+    status = {
         "status": "healthy",
         "model_loaded": model is not None,
+        "model_backend": MODEL_BACKEND,
+        "model_tiers": list(tiers),
         "timestamp": pd.Timestamp.now().isoformat()
-    })
+    }
+    if hasattr(model, "stats"):
+        status["models"] = model.stats()
+    admission = admission_stats()
+    if admission is not None:
+        status["admission"] = admission
+    return jsonify(status)
 
 
 if __name__ == "__main__":
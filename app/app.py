@@ -166,6 +166,64 @@ with col2:
         except Exception as e:
             st.error(f"❌ Prediction failed: {str(e)}")
 
+# What-if sweep
+st.header("🎚️ What-if Analysis")
+
+sweep_params = {
+    "area": (500, 5000, 46),
+    "bedrooms": (1, 6, 6),
+    "bathrooms": (1, 5, 5),
+    "year_built": (1960, 2025, 66),
+}
+sweep_axes = st.multiselect(
+    "Attributes to vary (one for a curve, two for a surface)",
+    list(sweep_params),
+    default=["area"],
+    max_selections=2
+)
+
+if sweep_axes and st.button("📈 Run What-if Sweep", type="secondary"):
+    base = {
+        "area": area,
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+        "year_built": year_built,
+        "lat": lat,
+        "lon": lon,
+        "description": description
+    }
+    params = [{"name": name, "min": lo, "max": hi, "steps": steps}
+              for name, (lo, hi, steps) in ((name, sweep_params[name]) for name in sweep_axes)]
+
+    try:
+        # One request scores the whole grid
+        with st.spinner("🔄 Scoring the grid..."):
+            response = requests.post(
+                "http://localhost:5000/sweep",
+                json={"base": base, "params": params},
+                timeout=30
+            )
+
+        if response.status_code == 200:
+            result = response.json()
+            axes = result["axes"]
+            if len(axes) == 1:
+                curve = pd.DataFrame({axes[0]["name"]: axes[0]["values"], "Price": result["predictions"]})
+                st.line_chart(curve.set_index(axes[0]["name"]))
+            else:
+                surface = pd.DataFrame(
+                    result["predictions"],
+                    index=pd.Index(axes[0]["values"], name=axes[0]["name"]),
+                    columns=[f"{axes[1]['name']}={v:g}" for v in axes[1]["values"]]
+                )
+                st.line_chart(surface)
+                st.dataframe(surface.style.format("${:,.0f}"), use_container_width=True)
+        else:
+            st.error(f"API Error: {response.status_code}")
+
+    except requests.exceptions.ConnectionError:
+        st.error("❌ Cannot connect to the API server")
+
 # Feature engineering preview
 st.header("🔧 Feature Engineering Preview")
 
@@ -278,6 +336,14 @@ if st.checkbox("Show Location Analysis"):
             "School": "0.5 km",
             "Park": "0.3 km"
         }
+        # Real distances when the served model was trained with a POI layer
+        try:
+            response = requests.get("http://localhost:5000/nearby", params={"lat": lat, "lon": lon}, timeout=5)
+            if response.status_code == 200:
+                amenities = {category.replace("_", " ").title(): f"{poi['distance_km']:.1f} km ({poi['name']})"
+                             for category, poi in response.json()["nearby"].items()}
+        except requests.exceptions.RequestException:
+            pass
         
         for amenity, distance in amenities.items():
             st.write(f"🏢 {amenity}: {distance}")
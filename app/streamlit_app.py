@@ -1,6 +1,13 @@
 import streamlit as st
 from src.model import load_model, predict_from_model
 
+
+@st.cache_resource
+def get_model():
+    """Load the model once per server process instead of on every click."""
+    return load_model("models/lgb_model.pkl")
+
+
 st.title("🏠 House Price Prediction Demo")
 st.write("Enter property details and get an estimated price.")
 
@@ -13,7 +20,7 @@ lon = st.number_input("Longitude", value=77.5946)
 description = st.text_input("Property description", "3BHK near IT hub")
 
 if st.button("Predict"):
-    model = load_model("models/lgb_model.pkl")
+    model = get_model()
     inp = {"area": area, "bedrooms": bedrooms, "bathrooms": bathrooms,
            "year_built": year_built, "lat": lat, "lon": lon,
            "description": description}
@@ -0,0 +1,58 @@
+"""
+Peak-memory benchmark for build_features on a large synthetic frame.
+
+Reports the resident memory before the call, the peak reached during it (the
+difference is what feature engineering itself costs) and the size of the
+resulting feature matrix.
+
+Usage:
+    python -m benchmarks.bench_memory --rows 2000000 --output memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_properties
+from src.features import build_features
+from src.run_report import RunReport
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure peak memory of build_features")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, help="Write the JSON result here")
+    args = parser.parse_args()
+
+    df = make_properties(args.rows, seed=args.seed).drop(columns=["price"])
+    gc.collect()
+
+    report = RunReport(sample_interval=0.01)
+    with report.stage("build_features", rows=args.rows) as record:
+        X = build_features(df, fit_vectorizer=True)
+        record["features"] = X.shape[1]
+
+    record = report.stages[0]
+    result = {
+        "rows": args.rows,
+        "features": X.shape[1],
+        "wall_seconds": record["wall_seconds"],
+        "rss_before_mb": record["rss_start_mb"],
+        "peak_rss_mb": record["peak_rss_mb"],
+        "peak_increase_mb": round(record["peak_rss_mb"] - record["rss_start_mb"], 1),
+        "input_mb": round(df.memory_usage(deep=True).sum() / 1024 ** 2, 1),
+        "output_mb": round(X.memory_usage(deep=False).sum() / 1024 ** 2, 1),
+        "output_dtypes": {str(k): int(v) for k, v in X.dtypes.value_counts().items()},
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
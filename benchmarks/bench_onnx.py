@@ -0,0 +1,104 @@
+"""
+Latency and memory of the LightGBM and ONNX serving backends.
+
+Each backend runs in its own fresh process so its import and model footprint
+is measured in isolation: resident memory after importing and loading the
+model, best-of-N latency of features + prediction at each batch size, and the
+process peak RSS.
+
+Usage:
+    python -m benchmarks.bench_onnx
+    python -m benchmarks.bench_onnx --sizes 1,100,10000 --onnx models/lgb_model.onnx --output onnx.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.run_report import current_rss_mb, peak_rss_mb
+
+BACKENDS = ["lightgbm", "onnx"]
+
+
+def measure(backend, model_path, onnx_path, sizes, seed):
+    """Runs inside the child process; returns the measurements as a dict."""
+    rss_start = current_rss_mb()
+    if backend == "onnx":
+        from src.onnx_export import load_onnx_model
+        model = load_onnx_model(onnx_path)
+        prepare = model.prepare
+    else:
+        from src.features import build_features
+        from src.model import load_model
+        model = load_model(model_path)
+        prepare = build_features
+    rss_loaded = current_rss_mb()
+
+    from benchmarks.bench_pipeline import repeats_for, time_call
+    from benchmarks.synthetic import make_properties
+
+    latency = {}
+    for n_rows in sizes:
+        df = make_properties(n_rows, seed=seed).drop(columns=["price"])
+        seconds = time_call(lambda: model.predict(prepare(df)), repeats_for(n_rows, budget_rows=5_000))
+        latency[n_rows] = {"seconds": seconds, "rows_per_sec": n_rows / seconds}
+
+    return {
+        "backend": backend,
+        "rss_start_mb": round(rss_start, 1),
+        "rss_after_load_mb": round(rss_loaded, 1),
+        "load_increase_mb": round(rss_loaded - rss_start, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "latency": latency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LightGBM and onnxruntime serving")
+    parser.add_argument("--sizes", type=str, default="1,100,10000", help="Comma-separated batch sizes")
+    parser.add_argument("--model", type=str, default="models/lgb_model.pkl")
+    parser.add_argument("--onnx", type=str, help="Exported pipeline (exported from --model when omitted)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, help="Write the JSON result here")
+    parser.add_argument("--measure", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.model, args.onnx, sizes, args.seed)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_path = args.onnx
+        if onnx_path is None:
+            onnx_path = os.path.join(tmp, "model.onnx")
+            subprocess.run([sys.executable, "train.py", "--mode", "export_onnx", "--model", args.model,
+                            "--onnx_output", onnx_path], check=True, stdout=subprocess.DEVNULL)
+
+        results = {}
+        for backend in BACKENDS:
+            child = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_onnx", "--measure", backend, "--sizes", args.sizes,
+                 "--model", args.model, "--onnx", onnx_path, "--seed", str(args.seed)],
+                check=True, capture_output=True, text=True,
+            )
+            results[backend] = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"{'':>12} {'load MB':>10} {'peak MB':>10}" + "".join(f" {str(n) + ' rows':>14}" for n in sizes))
+    for backend, r in results.items():
+        print(f"{backend:>12} {r['load_increase_mb']:10.1f} {r['peak_rss_mb']:10.1f}"
+              + "".join(f" {r['latency'][str(n)]['seconds'] * 1000:11.3f} ms" for n in sizes))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Scaling benchmark for process-parallel build_features.
+
+Times build_features on one synthetic frame with 1, 2, 4, ... worker
+processes (up to the number of cores by default) and reports speedup and
+parallel efficiency against the serial run. Every parallel result is checked
+against the serial one.
+
+Usage:
+    python -m benchmarks.bench_parallel --rows 500000
+    python -m benchmarks.bench_parallel --rows 2000000 --workers 1,8,16,32,64 --output scaling.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_properties
+from src.features import build_features
+
+
+def default_workers():
+    """1, 2, 4, ... up to and including the core count."""
+    cores = os.cpu_count() or 1
+    workers, n = [], 1
+    while n < cores:
+        workers.append(n)
+        n *= 2
+    return workers + [cores]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure build_features scaling over worker processes")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--workers", type=str, default=",".join(str(w) for w in default_workers()),
+                        help="Comma-separated worker counts (1 = serial baseline)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, help="Write the JSON result here")
+    args = parser.parse_args()
+
+    workers = sorted({int(w) for w in args.workers.split(",") if w} | {1})
+    df = make_properties(args.rows, seed=args.seed).drop(columns=["price"])
+    build_features(df.head(1000), fit_vectorizer=True)  # TF-IDF fitted once, outside the timings
+
+    results, serial = [], None
+    for n_jobs in workers:
+        start = time.perf_counter()
+        X = build_features(df, n_jobs=n_jobs)
+        seconds = time.perf_counter() - start
+        if serial is None:
+            serial, serial_seconds = X, seconds
+        elif not X.equals(serial):
+            raise RuntimeError(f"n_jobs={n_jobs} produced different features than the serial build")
+        results.append({
+            "workers": n_jobs,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(args.rows / seconds, 1),
+            "speedup": round(serial_seconds / seconds, 2),
+            "efficiency": round(serial_seconds / seconds / n_jobs, 2),
+        })
+        print(f"   {n_jobs:>3} workers {seconds:10.2f} s {results[-1]['speedup']:6.2f}x")
+
+    result = {"rows": args.rows, "cpu_count": os.cpu_count(), "runs": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Microbenchmarks for feature engineering, model inference and the Flask endpoints.
+
+Every metric is timed on a synthetic frame shaped like data/sample_properties.csv
+at each requested size and written to a JSON results file. When a baseline
+results file is given, the run fails (exit code 1) if any tracked metric got
+slower than the baseline by more than the threshold.
+
+Usage:
+    python -m benchmarks.bench_pipeline --output benchmarks/results/current.json
+    python -m benchmarks.bench_pipeline --sizes 1,1000 --baseline benchmarks/results/main.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_properties
+from src.features import build_features
+from src.metrics import STAGE_SECONDS
+from src.model import load_model, predict_from_model
+
+DEFAULT_SIZES = [1, 1_000, 100_000, 1_000_000]
+ENDPOINTS = [
+    ("POST", "/predict"),
+    ("POST", "/analyze"),
+    ("POST", "/api/features"),
+    ("GET", "/health"),
+]
+
+
+def time_call(fn, repeat):
+    """Return the best wall time in seconds of ``repeat`` calls to ``fn``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def repeats_for(n_rows, budget_rows=20_000, max_repeat=50):
+    """Repeat small inputs more often so their timings are not pure noise."""
+    return int(max(1, min(max_repeat, budget_rows // max(n_rows, 1))))
+
+
+def record(metrics, name, n_rows, seconds):
+    metrics[f"{name}@{n_rows}"] = {
+        "seconds": seconds,
+        "rows_per_sec": n_rows / seconds if seconds > 0 else None,
+    }
+
+
+FEATURE_STAGES = ["features.basic", "features.geo", "features.nlp", "features.tfidf"]
+
+
+def bench_features(df, metrics):
+    """
+    Time the full pipeline (best of N) and each feature stage (mean over the
+    same N runs, read from the stage histograms build_features records into).
+    """
+    n_rows = len(df)
+    repeat = repeats_for(n_rows)
+    before = {name: (STAGE_SECONDS.count(name), STAGE_SECONDS.sum(name)) for name in FEATURE_STAGES}
+    total = time_call(lambda: build_features(df), repeat)
+
+    for name in FEATURE_STAGES:
+        count = STAGE_SECONDS.count(name) - before[name][0]
+        if not count:
+            continue
+        seconds = (STAGE_SECONDS.sum(name) - before[name][1]) / count
+        record(metrics, name, n_rows, seconds)
+        print(f"   {name + '@' + str(n_rows):<32} {seconds * 1000:12.3f} ms")
+    record(metrics, "features.build", n_rows, total)
+    print(f"   {'features.build@' + str(n_rows):<32} {total * 1000:12.3f} ms")
+
+
+def bench_predict(model, df, metrics):
+    """Time model.predict on a prebuilt feature matrix."""
+    n_rows = len(df)
+    X = build_features(df)
+    seconds = time_call(lambda: model.predict(X), repeats_for(n_rows))
+    record(metrics, "model.predict", n_rows, seconds)
+    print(f"   {'model.predict@' + str(n_rows):<32} {seconds * 1000:12.3f} ms")
+
+    if n_rows == 1:
+        inp = df.iloc[0].to_dict()
+        seconds = time_call(lambda: predict_from_model(model, inp), 20)
+        record(metrics, "predict_from_model", 1, seconds)
+        print(f"   {'predict_from_model@1':<32} {seconds * 1000:12.3f} ms")
+
+
+def bench_endpoints(client, df, metrics, max_requests):
+    """
+    Time each endpoint over ``min(len(df), max_requests)`` sequential requests.
+    The recorded value is the mean seconds per request.
+    """
+    payloads = df.head(max_requests).to_dict(orient="records")
+    n_requests = len(payloads)
+    for method, path in ENDPOINTS:
+        start = time.perf_counter()
+        for payload in payloads:
+            if method == "GET":
+                response = client.get(path)
+            else:
+                response = client.post(path, json=payload)
+            if response.status_code != 200:
+                raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.get_data(as_text=True)}")
+        seconds = (time.perf_counter() - start) / n_requests
+        record(metrics, f"endpoint.{path}", n_requests, seconds)
+        print(f"   {'endpoint.' + path + '@' + str(n_requests):<32} {seconds * 1000:12.3f} ms/request")
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": pd.Timestamp.now().isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare(current, baseline, threshold, min_delta):
+    """
+    Return the metrics that regressed: slower than baseline by more than
+    ``threshold`` (relative) and by more than ``min_delta`` seconds (absolute).
+    """
+    regressions = []
+    for name, base in baseline.get("metrics", {}).items():
+        cur = current["metrics"].get(name)
+        if cur is None:
+            continue
+        delta = cur["seconds"] - base["seconds"]
+        if delta > min_delta and cur["seconds"] > base["seconds"] * (1 + threshold):
+            regressions.append({
+                "metric": name,
+                "baseline_seconds": base["seconds"],
+                "current_seconds": cur["seconds"],
+                "ratio": cur["seconds"] / base["seconds"],
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feature engineering, inference and endpoints")
+    parser.add_argument("--sizes", type=str, default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated row counts")
+    parser.add_argument("--model", type=str, default="models/lgb_model.pkl", help="Path to trained model file")
+    parser.add_argument("--output", type=str, default="benchmarks/results/latest.json", help="Where to write results")
+    parser.add_argument("--baseline", type=str, help="Results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.0005,
+                        help="Ignore slowdowns smaller than this many seconds")
+    parser.add_argument("--max-endpoint-requests", type=int, default=1000,
+                        help="Cap on sequential requests per endpoint and size")
+    parser.add_argument("--skip-endpoints", action="store_true", help="Do not benchmark the Flask routes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    model = load_model(args.model)
+
+    client = None
+    if not args.skip_endpoints:
+        from app.web_app import app
+        client = app.test_client()
+
+    metrics = {}
+    endpoint_sizes = set()
+    for n_rows in sizes:
+        print(f"⏱️  Benchmarking {n_rows:,} rows")
+        df = make_properties(n_rows, seed=args.seed).drop(columns=["price"])
+        bench_features(df, metrics)
+        bench_predict(model, df, metrics)
+        n_requests = min(n_rows, args.max_endpoint_requests)
+        if client is not None and n_requests not in endpoint_sizes:
+            endpoint_sizes.add(n_requests)
+            bench_endpoints(client, df, metrics, args.max_endpoint_requests)
+
+    results = {"meta": environment(), "sizes": sizes, "metrics": metrics}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved to: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        if regressions:
+            print(f"❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}:")
+            for r in regressions:
+                print(f"   {r['metric']:<32} {r['baseline_seconds'] * 1000:10.3f} ms -> "
+                      f"{r['current_seconds'] * 1000:10.3f} ms ({r['ratio']:.2f}x)")
+            sys.exit(1)
+        print(f"✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
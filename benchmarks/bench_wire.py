@@ -0,0 +1,110 @@
+"""
+Throughput of the JSON and Arrow IPC encodings of /predict.
+
+For each payload size this times the transport work around the model, using
+the same src/wire.py functions as the endpoints: the client encoding the
+listings, the server decoding them into a DataFrame, the server encoding the
+predictions and the client decoding them. Payload sizes are reported as well.
+With --endpoint the full POST /predict (features and model included) is also
+timed through the Flask test client, for sizes up to --max-endpoint-rows.
+
+Usage:
+    python -m benchmarks.bench_wire
+    python -m benchmarks.bench_wire --sizes 10000,100000,1000000 --endpoint --output wire.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.synthetic import make_properties
+from src.wire import ARROW_STREAM, JSON, decode_frame, decode_predictions, encode_frame, encode_predictions
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def bench_format(df, preds, arrow):
+    """Seconds per transport step for one payload in one format."""
+    if arrow:
+        body, encode = timed(lambda: encode_frame(df))
+    else:
+        body, encode = timed(lambda: json.dumps(df.to_dict(orient="records")).encode())
+    content_type = ARROW_STREAM if arrow else JSON
+    (decoded, _), decode = timed(lambda: decode_frame(body, content_type))
+    assert len(decoded) == len(df)
+    (response, mimetype), respond = timed(lambda: encode_predictions(preds, arrow))
+    _, read = timed(lambda: decode_predictions(response, mimetype))
+    total = encode + decode + respond + read
+    return {
+        "request_bytes": len(body),
+        "response_bytes": len(response),
+        "client_encode_seconds": encode,
+        "server_decode_seconds": decode,
+        "server_encode_seconds": respond,
+        "client_decode_seconds": read,
+        "transport_seconds": total,
+        "rows_per_sec": len(df) / total,
+    }
+
+
+def bench_endpoint(client, df, arrow):
+    if arrow:
+        kwargs = {"data": encode_frame(df), "content_type": ARROW_STREAM}
+    else:
+        kwargs = {"json": df.to_dict(orient="records")}
+    start = time.perf_counter()
+    response = client.post("/predict", **kwargs)
+    seconds = time.perf_counter() - start
+    if response.status_code != 200:
+        raise RuntimeError(f"/predict returned {response.status_code}: {response.get_data(as_text=True)}")
+    return {"seconds": seconds, "rows_per_sec": len(df) / seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON and Arrow IPC for bulk scoring")
+    parser.add_argument("--sizes", type=str, default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated payload row counts")
+    parser.add_argument("--endpoint", action="store_true", help="Also time the full POST /predict")
+    parser.add_argument("--max-endpoint-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=str, help="Write the JSON result here")
+    args = parser.parse_args()
+
+    client = None
+    if args.endpoint:
+        from app.web_app import app
+        client = app.test_client()
+
+    results = {}
+    for n_rows in [int(s) for s in args.sizes.split(",") if s]:
+        df = make_properties(n_rows, seed=args.seed).drop(columns=["price"])
+        preds = np.random.default_rng(args.seed).normal(125_000, 20_000, n_rows)
+        print(f"⏱️  {n_rows:,} rows")
+        for name, arrow in (("json", False), ("arrow", True)):
+            r = bench_format(df, preds, arrow)
+            if client is not None and n_rows <= args.max_endpoint_rows:
+                r["endpoint"] = bench_endpoint(client, df, arrow)
+            results[f"{name}@{n_rows}"] = r
+            print(f"   {name:<6} {r['request_bytes'] / 1024 ** 2:8.1f} MB  transport {r['transport_seconds']:8.3f} s"
+                  f"  ({r['rows_per_sec']:,.0f} rows/s)"
+                  + (f"  endpoint {r['endpoint']['seconds']:8.3f} s" if "endpoint" in r else ""))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
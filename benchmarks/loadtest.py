@@ -0,0 +1,208 @@
+"""
+HTTP load generator for the serving apps.
+
+Replays property payloads (rows of a CSV, or synthetic listings) against the
+prediction endpoints at a fixed concurrency and, optionally, a fixed request
+rate, then reports throughput, latency percentiles and error rate.
+
+Without --url the app is started locally with ``flask run`` on a free port and
+stopped at the end of the run.
+
+Usage:
+    python -m benchmarks.loadtest --concurrency 8 --duration 30
+    python -m benchmarks.loadtest --url http://localhost:5000 --rate 50 --payloads data/sample_properties.csv
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import requests
+
+from benchmarks.synthetic import make_payloads
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENDPOINTS = ["/predict", "/analyze", "/api/features"]
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+
+def load_payloads(path, synthetic_rows, seed=42):
+    """Read payloads from a CSV (price column dropped) or generate synthetic ones."""
+    if path:
+        df = pd.read_csv(path)
+        df = df.drop(columns=["price"], errors="ignore")
+        return df.to_dict(orient="records")
+    return make_payloads(synthetic_rows, seed=seed)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_local_app(app_module, port, timeout=60.0):
+    """Start ``flask run`` for ``app_module`` and wait until /health answers."""
+    cmd = [sys.executable, "-m", "flask", "--app", app_module, "run",
+           "--host", "127.0.0.1", "--port", str(port)]
+    proc = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"App process exited with code {proc.returncode}")
+        try:
+            if requests.get(url + "/health", timeout=1).status_code == 200:
+                return proc, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError(f"App did not become healthy within {timeout:.0f}s")
+
+
+def run_load(url, endpoints, payloads, concurrency, rate, duration, max_requests):
+    """
+    Fire requests from ``concurrency`` threads until ``duration`` seconds pass
+    or ``max_requests`` are sent. With ``rate`` > 0 request i is scheduled at
+    ``start + i / rate`` and its latency is measured from that scheduled time,
+    so queueing delay caused by a slow server is not hidden.
+    """
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples = []  # (endpoint, latency_seconds, ok)
+    start = time.perf_counter()
+    stop_at = start + duration if duration else float("inf")
+
+    def worker():
+        session = requests.Session()
+        local = []
+        while True:
+            i = next(counter)
+            if max_requests and i >= max_requests:
+                break
+            scheduled = start + i / rate if rate else time.perf_counter()
+            if scheduled >= stop_at:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            endpoint = endpoints[i % len(endpoints)]
+            payload = payloads[i % len(payloads)]
+            try:
+                response = session.post(url + endpoint, json=payload, timeout=30)
+                ok = response.status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append((endpoint, time.perf_counter() - scheduled, ok))
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def summarize(samples, elapsed):
+    """Aggregate raw samples into throughput, latency percentiles (ms) and error rate."""
+    def stats(rows):
+        if not rows:
+            return {"requests": 0}
+        latencies = np.array([r[1] for r in rows]) * 1000
+        errors = sum(1 for r in rows if not r[2])
+        out = {
+            "requests": len(rows),
+            "errors": errors,
+            "error_rate": errors / len(rows),
+            "throughput_rps": len(rows) / elapsed if elapsed > 0 else None,
+            "mean_ms": float(latencies.mean()),
+        }
+        for name, q in PERCENTILES.items():
+            out[f"{name}_ms"] = float(np.percentile(latencies, q))
+        return out
+
+    report = {"elapsed_seconds": elapsed, "overall": stats(samples), "endpoints": {}}
+    for endpoint in sorted({s[0] for s in samples}):
+        report["endpoints"][endpoint] = stats([s for s in samples if s[0] == endpoint])
+    return report
+
+
+def print_report(report):
+    def line(name, s):
+        if not s.get("requests"):
+            return f"   {name:<16} no requests"
+        return (f"   {name:<16} {s['requests']:>7} req  {s['throughput_rps']:8.1f} req/s  "
+                f"p50 {s['p50_ms']:8.2f}  p95 {s['p95_ms']:8.2f}  p99 {s['p99_ms']:8.2f}  "
+                f"p999 {s['p999_ms']:8.2f} ms  errors {s['error_rate']:.2%}")
+
+    print(f"📊 Load test results ({report['elapsed_seconds']:.1f}s)")
+    print(line("overall", report["overall"]))
+    for endpoint, s in report["endpoints"].items():
+        print(line(endpoint, s))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the house price serving apps")
+    parser.add_argument("--url", type=str, help="Target base URL; starts the app locally when omitted")
+    parser.add_argument("--app", type=str, default="app.web_app", help="Flask app module to start locally")
+    parser.add_argument("--endpoints", type=str, default=",".join(DEFAULT_ENDPOINTS),
+                        help="Comma-separated POST endpoints, used round-robin")
+    parser.add_argument("--payloads", type=str, help="CSV of properties to replay (default: synthetic)")
+    parser.add_argument("--synthetic-rows", type=int, default=1000, help="Number of synthetic payloads")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of client threads")
+    parser.add_argument("--rate", type=float, default=0.0, help="Target requests/sec (0 = as fast as possible)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Run time in seconds (0 = no limit)")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests (0 = no limit)")
+    parser.add_argument("--output", type=str, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    if not args.duration and not args.requests:
+        parser.error("set --duration or --requests")
+
+    endpoints = [e for e in args.endpoints.split(",") if e]
+    payloads = load_payloads(args.payloads, args.synthetic_rows)
+
+    proc = None
+    url = args.url.rstrip("/") if args.url else None
+    if url is None:
+        print(f"🚀 Starting {args.app} locally...")
+        proc, url = start_local_app(args.app, free_port())
+
+    try:
+        print(f"🔥 {url}: {args.concurrency} threads, "
+              f"{'%.1f req/s' % args.rate if args.rate else 'unthrottled'}, endpoints {endpoints}")
+        samples, elapsed = run_load(url, endpoints, payloads, args.concurrency,
+                                    args.rate, args.duration, args.requests)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report = summarize(samples, elapsed)
+    report["config"] = {
+        "url": url, "endpoints": endpoints, "concurrency": args.concurrency,
+        "rate": args.rate, "duration": args.duration, "payloads": len(payloads),
+    }
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Replay a captured request log (see src/request_log.py) against a model build.
+
+Each logged request is sent again with its original rows, so latency reflects
+real traffic shapes (batch sizes, descriptions, coordinates). In-process
+(--model) each request goes through the same steps as /predict:
+``predict_from_model`` for single listings, feature building plus one predict
+for bulk requests. With --url the requests are POSTed to a running app, single
+listings as a JSON object and bulk ones as a list.
+
+Reports latency percentiles, throughput, and how far the new predictions move
+from the logged ones.
+
+Usage:
+    python -m benchmarks.replay --log logs/requests --model models/lgb_model.pkl
+    python -m benchmarks.replay --log logs/requests --url http://localhost:5000 --speed 1 --output replay.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.loadtest import PERCENTILES
+from src.request_log import NUMERIC_FIELDS, TEXT_FIELDS, read_log
+
+
+def logged_requests(log, endpoint="/predict"):
+    """``(timestamp, listings frame, logged predictions)`` per logged request, in arrival order."""
+    log = log[log["endpoint"] == endpoint]
+    fields = NUMERIC_FIELDS + TEXT_FIELDS
+    for _, rows in log.groupby("request_id", sort=False):
+        listings = rows[fields].reset_index(drop=True)
+        # fields absent from the original payload were logged as missing
+        listings = listings.loc[:, listings.notna().any()]
+        yield rows["timestamp"].iloc[0], listings, rows["prediction"].to_numpy()
+
+
+def model_scorer(path):
+    from src.model import load_model, predict_features, predict_from_model, prepare_features
+
+    model = load_model(path)
+
+    def score(listings):
+        if len(listings) == 1:
+            return np.array([predict_from_model(model, listings.iloc[0].dropna().to_dict())])
+        return np.asarray(predict_features(model, prepare_features(model, listings)))
+    return score
+
+
+def http_scorer(url):
+    import requests
+
+    session = requests.Session()
+
+    def score(listings):
+        records = [{k: v for k, v in row.items() if pd.notna(v)} for row in listings.to_dict(orient="records")]
+        response = session.post(f"{url}/predict", json=records[0] if len(records) == 1 else records, timeout=60)
+        response.raise_for_status()
+        data = response.json()
+        return np.asarray(data["predictions"] if "predictions" in data else [data["prediction"]])
+    return score
+
+
+def replay(requests, score, speed=0.0):
+    """Score every request; ``speed`` > 0 keeps the logged gaps between requests, scaled by 1/speed."""
+    latencies, rows, changes = [], 0, []
+    first_logged, started = None, time.perf_counter()
+    for ts, listings, logged in requests:
+        if speed > 0:
+            first_logged = ts if first_logged is None else first_logged
+            wait = (ts - first_logged).total_seconds() / speed - (time.perf_counter() - started)
+            if wait > 0:
+                time.sleep(wait)
+        start = time.perf_counter()
+        preds = score(listings)
+        latencies.append(time.perf_counter() - start)
+        rows += len(listings)
+        changes.append(np.abs(preds - logged))
+    elapsed = time.perf_counter() - started
+    if not latencies:
+        raise ValueError("The log has no requests to replay")
+
+    latency_ms = np.array(latencies) * 1000
+    changes = np.concatenate(changes)
+    return {
+        "requests": len(latencies),
+        "rows": rows,
+        "elapsed_seconds": elapsed,
+        "requests_per_sec": len(latencies) / elapsed,
+        "rows_per_sec": rows / elapsed,
+        "latency_ms": {name: float(np.percentile(latency_ms, p)) for name, p in PERCENTILES.items()},
+        "prediction_change": {
+            "max_abs": float(changes.max()),
+            "mean_abs": float(changes.mean()),
+            "changed_fraction": float((changes > 1e-6).mean()),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured request log against a model or app")
+    parser.add_argument("--log", type=str, required=True, help="Request log file or directory")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--model", type=str, help="Model bundle to score in-process")
+    target.add_argument("--url", type=str, help="Base URL of a running app")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Keep the logged request pacing at this speed-up (0: as fast as possible)")
+    parser.add_argument("--output", type=str, help="Write the JSON result here")
+    args = parser.parse_args()
+
+    log = read_log(args.log)
+    score = model_scorer(args.model) if args.model else http_scorer(args.url.rstrip("/"))
+    result = replay(logged_requests(log), score, args.speed)
+    result["log"] = args.log
+    result["model_versions"] = sorted(log["model_version"].dropna().unique().tolist())
+
+    latency = result["latency_ms"]
+    print(f"🔁 Replayed {result['requests']:,} requests ({result['rows']:,} rows) in {result['elapsed_seconds']:.2f} s")
+    print(f"   {result['requests_per_sec']:,.1f} req/s, {result['rows_per_sec']:,.0f} rows/s")
+    print("   latency " + "  ".join(f"{name} {value:.2f} ms" for name, value in latency.items()))
+    change = result["prediction_change"]
+    print(f"   predictions vs log: max |Δ| {change['max_abs']:,.2f}, mean |Δ| {change['mean_abs']:,.2f}, "
+          f"{change['changed_fraction']:.1%} changed")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+# Vocabulary modelled on data/sample_properties.csv descriptions
+ADJECTIVES = ["Spacious", "Compact", "Cozy", "Modern", "Renovated", "Premium",
+              "Well-maintained", "Luxury", "Budget-friendly", "Furnished", "New"]
+PROPERTY_TYPES = ["apartment", "flat", "villa", "penthouse", "duplex", "studio apartment", "corner unit"]
+PLACES = ["metro station", "IT hub", "park", "shopping mall", "schools", "hospital",
+          "business district", "main road"]
+AMENITIES = ["modern amenities", "garden view", "swimming pool and gym", "parking",
+             "city skyline view", "terrace and jacuzzi", "balcony", "smart home features",
+             "wooden flooring", "premium finishes", "natural lighting", "eco-friendly features"]
+
+COLUMNS = ["area", "bedrooms", "bathrooms", "year_built", "lat", "lon", "description", "price"]
+
+
+def make_properties(n_rows, seed=42):
+    """
+    Generate a synthetic listings frame shaped like data/sample_properties.csv.
+    Coordinates fall around Bangalore and prices follow a noisy linear model.
+    """
+    rng = np.random.default_rng(seed)
+
+    bedrooms = rng.integers(1, 6, n_rows)
+    bathrooms = np.maximum(1, bedrooms - rng.integers(0, 2, n_rows))
+    area = np.round(bedrooms * 450 + rng.normal(0, 200, n_rows)).clip(300, 6000).astype(int)
+    year_built = rng.integers(1985, 2025, n_rows)
+    lat = np.round(12.97 + rng.normal(0, 0.05, n_rows), 4)
+    lon = np.round(77.59 + rng.normal(0, 0.05, n_rows), 4)
+
+    adj = rng.integers(0, len(ADJECTIVES), n_rows)
+    kind = rng.integers(0, len(PROPERTY_TYPES), n_rows)
+    place = rng.integers(0, len(PLACES), n_rows)
+    amenity = rng.integers(0, len(AMENITIES), n_rows)
+    description = [
+        f"{ADJECTIVES[a]} {b}BHK {PROPERTY_TYPES[k]} near {PLACES[p]} with {AMENITIES[m]}"
+        for a, b, k, p, m in zip(adj, bedrooms, kind, place, amenity)
+    ]
+
+    price = (area * 90 + bathrooms * 5000 - (2025 - year_built) * 800
+             + rng.normal(0, 10000, n_rows)).clip(20000, None).round()
+
+    return pd.DataFrame({
+        "area": area,
+        "bedrooms": bedrooms,
+        "bathrooms": bathrooms,
+        "year_built": year_built,
+        "lat": lat,
+        "lon": lon,
+        "description": description,
+        "price": price,
+    }, columns=COLUMNS)
+
+
+def make_payloads(n_rows, seed=42):
+    """Return synthetic property payloads (dicts without price) for the HTTP endpoints."""
+    df = make_properties(n_rows, seed=seed).drop(columns=["price"])
+    return df.to_dict(orient="records")
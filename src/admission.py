@@ -0,0 +1,216 @@
+"""
+Admission control and load shedding for the Flask apps.
+
+Without a limit, every request gets a thread and they all share the CPU, so
+under overload latency grows for everyone and ``/health`` times out.
+``init_app`` puts an ``AdmissionController`` in front of the routes: at most
+``ADMISSION_MAX_CONCURRENT`` requests are served at once, and up to
+``ADMISSION_MAX_QUEUE`` more wait for a slot, for at most
+``ADMISSION_QUEUE_TIMEOUT_MS``. Anything beyond that gets an immediate 503
+with a ``Retry-After`` header, estimated from the queue length and recent
+service times.
+
+Each route has a priority (``DEFAULT_PRIORITIES``; ``ENDPOINT_PRIORITIES``,
+e.g. ``"/nearby=low"``, overrides them):
+
+- ``critical`` (health, metrics, static files and tiles) bypasses the limit;
+- ``high`` (``/predict``) may fill every slot and the whole queue, and is
+  served first when a slot frees up;
+- ``normal`` (everything else) may wait in half of the queue;
+- ``low`` (``/analyze``, ``/sweep``) never waits and only gets a slot while
+  half of them are free, so it is shed first.
+
+Shed requests are counted per endpoint and reason (``full`` or ``timeout``)
+on ``/metrics`` and in the ``/health`` output. Settings are read from
+``app.config`` first, then the environment; ``ADMISSION_MAX_CONCURRENT=0``
+turns admission control off.
+"""
+import heapq
+import itertools
+import math
+import os
+import threading
+from time import perf_counter
+
+from src.metrics import REGISTRY, Counter, Gauge
+
+SHED_REQUESTS = REGISTRY.register(Counter(
+    "house_price_shed_requests_total", "Requests rejected with a 503 by admission control", ("endpoint", "reason")))
+QUEUED_REQUESTS = REGISTRY.register(Gauge(
+    "house_price_queued_requests", "Requests waiting for an admission slot"))
+
+# priority: (rank, share of the slots it may fill, share of the queue it may wait in)
+PRIORITIES = {
+    "high": (0, 1.0, 1.0),
+    "normal": (1, 1.0, 0.5),
+    "low": (2, 0.5, 0.0),
+}
+CRITICAL = "critical"
+# Paths ending in "/" match as prefixes
+DEFAULT_PRIORITIES = {
+    "/health": CRITICAL, "/metrics": CRITICAL, "/static/": CRITICAL, "/tiles/": CRITICAL,
+    "/predict": "high", "/api/predict": "high",
+    "/analyze": "low", "/api/analyze": "low", "/sweep": "low", "/api/sweep": "low",
+}
+
+
+def endpoint_priorities(spec):
+    """``"/nearby=low,/drift=critical"`` (the ``ENDPOINT_PRIORITIES`` setting) as ``{path: priority}``."""
+    priorities = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        path, _, priority = item.partition("=")
+        if priority != CRITICAL and priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r} for {path}; "
+                             f"choose from {', '.join([CRITICAL, *PRIORITIES])}")
+        priorities[path.strip()] = priority
+    return priorities
+
+
+def priority_for(path, priorities):
+    """The priority of a request path: an exact entry, else the longest prefix entry, else ``normal``."""
+    if path in priorities:
+        return priorities[path]
+    prefixes = [p for p in priorities if p.endswith("/") and path.startswith(p)]
+    return priorities[max(prefixes, key=len)] if prefixes else "normal"
+
+
+class _Waiter:
+    __slots__ = ("priority", "event", "granted")
+
+    def __init__(self, priority):
+        self.priority = priority
+        self.event = threading.Event()
+        self.granted = False
+
+
+class AdmissionController:
+    """A bounded pool of serving slots with a priority queue in front of it."""
+
+    def __init__(self, max_concurrent=4, max_queue=16, queue_timeout=2.0):
+        self.max_concurrent = int(max_concurrent)
+        self.max_queue = int(max_queue)
+        self.queue_timeout = float(queue_timeout)
+        self.in_service = 0
+        self.service_seconds = 0.05  # decayed mean time a request holds its slot
+        self.shed = {}
+        self._waiters = []  # heap of (rank, sequence, _Waiter)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def _slot_limit(self, priority):
+        return max(1, math.ceil(self.max_concurrent * PRIORITIES[priority][1]))
+
+    def acquire(self, priority="normal"):
+        """
+        Take a serving slot, waiting in the queue if ``priority`` allows it.
+        Returns ``(None, seconds waited)`` once admitted, or ``(reason, seconds
+        waited)`` when the request is shed: ``"full"`` or ``"timeout"``.
+        """
+        rank, _, queue_share = PRIORITIES[priority]
+        with self._lock:
+            if not self._waiters and self.in_service < self._slot_limit(priority):
+                self.in_service += 1
+                return None, 0.0
+            if len(self._waiters) >= int(self.max_queue * queue_share):
+                return "full", 0.0
+            waiter = _Waiter(priority)
+            heapq.heappush(self._waiters, (rank, next(self._sequence), waiter))
+            QUEUED_REQUESTS.set(len(self._waiters))
+
+        start = perf_counter()
+        if not waiter.event.wait(self.queue_timeout):
+            with self._lock:
+                if not waiter.granted:  # not handed a slot while timing out
+                    self._waiters = [entry for entry in self._waiters if entry[2] is not waiter]
+                    heapq.heapify(self._waiters)
+                    QUEUED_REQUESTS.set(len(self._waiters))
+                    return "timeout", perf_counter() - start
+        return None, perf_counter() - start
+
+    def release(self, seconds):
+        """Give back a slot held for ``seconds`` and hand it to the first waiter that may take it."""
+        with self._lock:
+            self.in_service -= 1
+            self.service_seconds = 0.9 * self.service_seconds + 0.1 * seconds
+            while self._waiters:
+                waiter = self._waiters[0][2]
+                if self.in_service >= self._slot_limit(waiter.priority):
+                    break
+                heapq.heappop(self._waiters)
+                waiter.granted = True
+                self.in_service += 1
+                waiter.event.set()
+            QUEUED_REQUESTS.set(len(self._waiters))
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request should have drained (at least 1)."""
+        queued = len(self._waiters) + 1
+        return max(1, math.ceil(queued * self.service_seconds / max(self.max_concurrent, 1)))
+
+    def record_shed(self, endpoint, reason):
+        with self._lock:
+            self.shed[endpoint] = self.shed.get(endpoint, 0) + 1
+        SHED_REQUESTS.inc(endpoint, reason)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "in_service": self.in_service,
+                "queued": len(self._waiters),
+                "shed": dict(self.shed),
+                "shed_total": sum(self.shed.values()),
+            }
+
+
+def _setting(app, name, default):
+    value = app.config.get(name, os.environ.get(name))
+    return default if value in (None, "") else value
+
+
+def init_app(app):
+    """Register admission control on a Flask app (unless ``ADMISSION_MAX_CONCURRENT`` is 0)."""
+    max_concurrent = int(_setting(app, "ADMISSION_MAX_CONCURRENT", 4))
+    if max_concurrent <= 0:
+        return app
+
+    from flask import g, jsonify, request
+
+    controller = AdmissionController(max_concurrent, int(_setting(app, "ADMISSION_MAX_QUEUE", 16)),
+                                     float(_setting(app, "ADMISSION_QUEUE_TIMEOUT_MS", 2000)) / 1000)
+    priorities = {**DEFAULT_PRIORITIES, **endpoint_priorities(_setting(app, "ENDPOINT_PRIORITIES", None))}
+    app.extensions["admission"] = controller
+
+    @app.before_request
+    def _admit():
+        priority = priority_for(request.path, priorities)
+        if priority == CRITICAL:
+            return None
+        reason, waited = controller.acquire(priority)
+        g.admission_wait = waited
+        if reason is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            controller.record_shed(endpoint, reason)
+            response = jsonify({"error": "Server overloaded; retry later", "reason": reason})
+            response.status_code = 503
+            response.headers["Retry-After"] = str(controller.retry_after())
+            return response
+        g._admission_start = perf_counter()
+        return None
+
+    @app.teardown_request
+    def _release(exc):
+        start = g.pop("_admission_start", None)
+        if start is not None:
+            controller.release(perf_counter() - start)
+
+    return app
+
+
+def admission_stats():
+    """Admission counters of the current Flask app, or None when admission control is off."""
+    from flask import current_app
+
+    controller = current_app.extensions.get("admission")
+    return controller.stats() if controller is not None else None
@@ -1,17 +1,34 @@
 import pandas as pd
-from src.features import build_features
+from src.features import build_features, build_sparse_features
+from src.run_report import report_stage
 
-def load_data(path: str, fit_vectorizer: bool = False):
-    df = pd.read_csv(path)
+def load_data(path: str, fit_vectorizer: bool = False, report=None, sparse: bool = False, n_jobs: int = 1,
+              backend: str = None):
+    """
+    Load a training CSV and engineer features; returns ``X, y``.
+    With ``sparse=True`` returns ``X, y, feature_names`` where ``X`` is a CSR
+    matrix whose text block was never densified. ``n_jobs`` is passed on to
+    feature building (process-parallel for large frames), and ``backend``
+    ("pandas" or "polars") picks its engine.
+    """
+    with report_stage(report, "load_data") as record:
+        df = pd.read_csv(path)
 
-    if "price" not in df.columns:
-        raise ValueError('CSV must contain a "price" column')
+        if "price" not in df.columns:
+            raise ValueError('CSV must contain a "price" column')
 
-    y = df["price"]
-    X = df.drop(columns=["price"])
-    X = X.fillna(0)
+        # pop/fill in place instead of copying the whole frame twice
+        y = df.pop("price")
+        numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        df.fillna({c: 0 for c in numeric}, inplace=True)
+        X = df
+        record["rows"], record["features"] = X.shape
 
     # apply feature engineering
-    X = build_features(X, fit_vectorizer=fit_vectorizer)
+    if sparse:
+        X, feature_names = build_sparse_features(X, fit_vectorizer=fit_vectorizer, report=report, n_jobs=n_jobs,
+                                                  backend=backend)
+        return X, y, feature_names
+    X = build_features(X, fit_vectorizer=fit_vectorizer, report=report, n_jobs=n_jobs, backend=backend)
 
     return X, y
@@ -0,0 +1,146 @@
+"""
+Deadline-aware degraded mode for /predict.
+
+A client can set a latency budget with the ``X-Deadline-Ms`` header or the
+``?deadline_ms=`` parameter; the ``PREDICT_DEADLINE_MS`` setting gives every
+request one. Once the body is parsed, ``plan`` compares the budget left with
+how long the full pipeline is expected to take. The expectation is a
+``CostModel`` fitted to recent full-pipeline requests (features + predict),
+scaled by the requests in flight, which share this process's CPU. If the full
+pipeline would miss the deadline, the description is skipped. That leaves out
+VADER, the text statistics and TF-IDF, which are most of the feature time on
+long descriptions. The bundle's text-free ``fallback_model`` (basic and geo
+features only, see ``train_text_free``) scores the request instead, and the
+response is flagged as degraded.
+
+Only full-pipeline requests update the cost model, so after a slowdown one in
+``PROBE_EVERY`` requests that would be degraded runs the full pipeline anyway
+as a probe. Its timing lets the estimate come back down once the slowdown is
+over.
+
+``/metrics`` exports the degraded requests by reason and the share of recent
+deadline requests served degraded.
+"""
+import threading
+
+import numpy as np
+
+from src.features import build_features
+from src.metrics import REGISTRY, Counter, Gauge
+from src.wire import PayloadError
+
+DEADLINE_REQUESTS = REGISTRY.register(Counter(
+    "house_price_deadline_requests_total", "Prediction requests that carried a deadline"))
+DEGRADED_REQUESTS = REGISTRY.register(Counter(
+    "house_price_degraded_requests_total",
+    "Prediction requests served by the text-free fallback to meet their deadline", ("reason",)))
+DEGRADED_RATIO = REGISTRY.register(Gauge(
+    "house_price_degraded_ratio", "Share of recent deadline requests served degraded (decayed over ~100)"))
+
+DEADLINE_PROBES = REGISTRY.register(Counter(
+    "house_price_deadline_probes_total",
+    "Requests served in full despite the estimate, to re-measure the full pipeline"))
+
+RATIO_DECAY = 0.99
+PROBE_EVERY = 20  # one in this many would-be degraded requests runs the full pipeline
+
+
+class CostModel:
+    """
+    Least-squares fit of ``seconds = fixed + per_row * rows`` over recent
+    observations, with exponentially decayed weights so it follows load and
+    traffic changes. Starts from a prior of ``prior_weight`` observations.
+    """
+
+    def __init__(self, fixed=0.005, per_row=0.0005, half_life=200, prior_weight=5.0):
+        self._decay = 0.5 ** (1 / half_life)
+        self._lock = threading.Lock()
+        # decayed sums of 1, n, n², s, n·s, seeded with prior points at 1 and 10 rows
+        self._sums = np.zeros(5)
+        for rows in (1, 10):
+            self._add(rows, fixed + per_row * rows, prior_weight / 2)
+        self.fixed, self.per_row = fixed, per_row
+
+    def _add(self, rows, seconds, weight=1.0):
+        self._sums = self._sums * self._decay + weight * np.array(
+            [1.0, rows, rows * rows, seconds, rows * seconds])
+
+    def observe(self, rows, seconds):
+        with self._lock:
+            self._add(rows, seconds)
+            w, n, nn, s, ns = self._sums
+            det = w * nn - n * n
+            if det > 1e-9 * w * nn:
+                per_row = (w * ns - n * s) / det
+                fixed = (s - per_row * n) / w
+            else:  # all recent requests had the same size: keep the split, rescale the level
+                scale = s / (self.fixed * w + self.per_row * n)
+                fixed, per_row = self.fixed * scale, self.per_row * scale
+            self.fixed, self.per_row = max(fixed, 0.0), max(per_row, 0.0)
+
+    def estimate(self, rows):
+        return self.fixed + self.per_row * rows
+
+
+# Cost of the full pipeline in this process
+full_cost = CostModel()
+_ratio = 0.0
+_degraded_run = 0  # requests degraded since the last one served in full
+_ratio_lock = threading.Lock()
+
+
+def request_deadline(request, default_ms=None):
+    """The request's deadline in seconds (header, else query, else ``default_ms``), or None."""
+    value = request.headers.get("X-Deadline-Ms") or request.args.get("deadline_ms") or default_ms
+    if value in (None, ""):
+        return None
+    try:
+        deadline_ms = float(value)
+    except (TypeError, ValueError):
+        raise PayloadError(f"Deadline must be a number of milliseconds, got {value!r}")
+    if not deadline_ms > 0:
+        raise PayloadError(f"Deadline must be positive, got {value!r}")
+    return deadline_ms / 1000
+
+
+def plan(rows, deadline, elapsed, in_flight=1):
+    """
+    Why a request should be served degraded: ``"deadline"`` when the full
+    pipeline alone overruns the time left, ``"queue"`` when it only does so
+    sharing the CPU with the other requests in flight; ``None`` to serve it
+    in full (including a probe after ``PROBE_EVERY - 1`` degraded requests in
+    a row). Updates the deadline metrics.
+    """
+    global _ratio, _degraded_run
+    left = deadline - elapsed
+    expected = full_cost.estimate(rows)
+    if expected > left:
+        reason = "deadline"
+    elif expected * max(in_flight, 1) > left:
+        reason = "queue"
+    else:
+        reason = None
+
+    DEADLINE_REQUESTS.inc()
+    with _ratio_lock:
+        if reason is None:
+            _degraded_run = 0
+        elif _degraded_run >= PROBE_EVERY - 1:
+            reason, _degraded_run = None, 0
+            DEADLINE_PROBES.inc()
+        else:
+            _degraded_run += 1
+            DEGRADED_REQUESTS.inc(reason)
+        _ratio = _ratio * RATIO_DECAY + (1 - RATIO_DECAY) * (reason is not None)
+        DEGRADED_RATIO.set(round(_ratio, 6))
+    return reason
+
+
+def observe_full(rows, seconds):
+    """Record how long a full-pipeline request took (features + predict)."""
+    full_cost.observe(rows, seconds)
+
+
+def text_free_features(df):
+    """The basic and geo features of ``df``: what the fallback model scores."""
+    return build_features(df.drop(columns=["description"], errors="ignore"))
@@ -0,0 +1,181 @@
+"""
+Distilled fast tier of the price model.
+
+``train_lgb`` picks the booster on RMSE alone, and its grid allows up to 1000
+trees of 100 leaves. Single-listing latency pays for all of them. ``distill``
+trains small LightGBM students on the full model's predictions for the
+training rows. The teacher's smoothed targets are easier to fit with few trees
+than the raw prices. Students cover a grid of tree count, leaf count and
+number of features kept; features are ranked by the teacher's importance.
+Each candidate is scored on the teacher's validation split for:
+
+- RMSE against the true prices, and against the full model (fidelity);
+- single-row predict latency (p50 / p99) and batch throughput.
+
+``pick_fast_tier`` returns the fastest candidate whose RMSE is within
+``tolerance`` of the full model's. ``train.py --fast_tier`` saves it in the
+bundle as ``fast_model`` and writes the trade-off table to the run report.
+The apps serve it for ``?tier=fast`` or via ``ENDPOINT_TIERS`` (see
+``src.model.select_tier``).
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import lightgbm as lgb
+from sklearn.model_selection import train_test_split
+
+# Student grid: (trees, leaves, features kept; None keeps all)
+FAST_TIER_CANDIDATES = [
+    (n_estimators, num_leaves, n_features)
+    for n_estimators in (50, 100, 200)
+    for num_leaves in (7, 15, 31)
+    for n_features in (10, 25, None)
+]
+LATENCY_ROWS = 500    # single-row predictions timed per candidate
+BATCH_ROWS = 1000     # rows in the timed batch prediction
+
+
+class FastModel:
+    """
+    A raw booster over a subset of the engineered features (the distilled
+    fast tier, or the text-free fallback); scores like the full model.
+    """
+
+    def __init__(self, booster, all_features, columns):
+        self.booster = booster
+        self.all_features = list(all_features)  # the full model's feature matrix columns
+        self.columns = np.asarray(columns)      # positions of the kept ones, in the booster's order
+
+    def predict(self, X):
+        # the raw booster on a float matrix skips the sklearn/pandas checks that
+        # dominate single-row latency (~1.8 ms vs ~35 µs)
+        if isinstance(X, pd.DataFrame):
+            if X.columns.tolist() == self.all_features:
+                values = X.to_numpy(dtype=np.float64)[:, self.columns]  # far cheaper than selecting by name
+            else:
+                values = X[[self.all_features[i] for i in self.columns]].to_numpy(dtype=np.float64)
+        elif sp.issparse(X):
+            values = X.tocsr()[:, self.columns]
+        else:
+            values = np.asarray(X, dtype=np.float64)[:, self.columns]
+        return self.booster.predict(values)
+
+
+def feature_ranking(model, feature_names):
+    """Feature names, most important first (gain for LightGBM, impurity for the RandomForest fallback)."""
+    booster = getattr(model, "booster_", None)
+    importance = booster.feature_importance("gain") if booster is not None else model.feature_importances_
+    order = np.argsort(-np.asarray(importance, dtype=np.float64), kind="stable")
+    return [feature_names[i] for i in order]
+
+
+def _rows(X, index):
+    return X[index] if sp.issparse(X) else X.iloc[index]
+
+
+def _latency(predict, X):
+    """p50 / p99 single-row and batch timings of ``predict`` in ms."""
+    n = X.shape[0]
+    singles = [_rows(X, [i % n]) for i in range(LATENCY_ROWS)]
+    predict(singles[0])  # warm up
+    timings = []
+    for row in singles:
+        start = time.perf_counter()
+        predict(row)
+        timings.append(time.perf_counter() - start)
+    batch = _rows(X, np.arange(BATCH_ROWS) % n)
+    start = time.perf_counter()
+    predict(batch)
+    batch_seconds = time.perf_counter() - start
+    timings = np.array(timings) * 1000
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "batch_rows_per_sec": float(BATCH_ROWS / batch_seconds),
+    }
+
+
+def _rmse(a, b):
+    return float(np.sqrt(np.mean((np.asarray(a) - np.asarray(b)) ** 2)))
+
+
+def distill(model, X, y, feature_names=None, candidates=None):
+    """
+    Train one student per candidate on the full model's predictions.
+    Returns ``(table, students)``: a row per model with its size, RMSE and
+    latency (the full model first, as ``"full"``) and the ``FastModel``
+    of every candidate, keyed like the table's ``name`` column.
+    ``X`` and ``y`` are the training data given to ``train_lgb``; the split
+    is the same, so students are scored on rows the teacher never saw.
+    """
+    if sp.issparse(X):
+        X = X.tocsr()
+        if feature_names is None:
+            feature_names = [f"Column_{i}" for i in range(X.shape[1])]
+    else:
+        feature_names = X.columns.tolist()
+    X_train, X_val, _, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    teacher_train = model.predict(X_train)
+    teacher_val = model.predict(X_val)
+    ranking = feature_ranking(model, feature_names)
+    position = {name: i for i, name in enumerate(feature_names)}
+
+    booster = getattr(model, "booster_", None)
+    table = [{
+        "name": "full",
+        "trees": booster.num_trees() if booster is not None else len(getattr(model, "estimators_", [])),
+        "leaves": None,
+        "features": len(feature_names),
+        "rmse": _rmse(teacher_val, y_val),
+        "fidelity_rmse": 0.0,
+        **_latency(model.predict, X_val),
+    }]
+    students = {}
+    for n_estimators, num_leaves, n_features in candidates or FAST_TIER_CANDIDATES:
+        top = set(ranking[:n_features] if n_features else ranking)
+        kept = [name for name in feature_names if name in top]  # keep the matrix order
+        columns = [position[name] for name in kept]
+        X_kept = X_train[:, columns] if sp.issparse(X_train) else X_train[kept]
+
+        student = lgb.LGBMRegressor(n_estimators=n_estimators, num_leaves=num_leaves, learning_rate=0.1,
+                                    n_jobs=-1, random_state=42, verbose=-1)
+        fit_params = {"feature_name": kept} if sp.issparse(X_kept) else {}
+        student.fit(X_kept, teacher_train, **fit_params)
+        fast = FastModel(student.booster_, feature_names, columns)
+
+        name = f"t{n_estimators}_l{num_leaves}_f{len(kept)}"
+        preds = fast.predict(X_val)
+        students[name] = fast
+        table.append({
+            "name": name,
+            "trees": n_estimators,
+            "leaves": num_leaves,
+            "features": len(kept),
+            "rmse": _rmse(preds, y_val),
+            "fidelity_rmse": _rmse(preds, teacher_val),
+            **_latency(fast.predict, X_val),
+        })
+    return table, students
+
+
+def pick_fast_tier(table, tolerance=0.05):
+    """Name of the lowest p50 candidate with RMSE within ``tolerance`` of the full model's, or None."""
+    limit = table[0]["rmse"] * (1 + tolerance)
+    eligible = [row for row in table[1:] if row["rmse"] <= limit]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda row: row["p50_ms"])["name"]
+
+
+def print_tradeoff(table, chosen=None):
+    print("⚡ Fast tier candidates (RMSE vs single-row latency):")
+    print(f"   {'model':<16} {'trees':>5} {'leaves':>6} {'feats':>5} {'RMSE':>12} {'vs full':>10} "
+          f"{'p50 ms':>7} {'p99 ms':>7} {'rows/s':>10}")
+    for row in table:
+        mark = " ✅" if row["name"] == chosen else ""
+        print(f"   {row['name']:<16} {row['trees']:>5} {row['leaves'] or '-':>6} {row['features']:>5} "
+              f"{row['rmse']:>12,.2f} {row['fidelity_rmse']:>10,.2f} {row['p50_ms']:>7.3f} "
+              f"{row['p99_ms']:>7.3f} {row['batch_rows_per_sec']:>10,.0f}{mark}")
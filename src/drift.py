@@ -0,0 +1,173 @@
+"""
+Feature-drift monitoring on live traffic.
+
+At training time ``reference_sketches`` summarizes each monitored feature
+as a histogram whose bin edges are the training deciles. The reference is
+stored in the model bundle. While serving, ``DriftMonitor`` counts incoming
+rows into the same bins. Counts decay exponentially with a half-life
+measured in rows, so memory stays fixed (a few floats per feature) and the
+scores follow recent traffic. Each feature gets two scores:
+
+- PSI (population stability index) between the reference and live bin
+  fractions: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift.
+- KS: the largest gap between the reference and live CDFs, evaluated at the
+  bin edges.
+
+``load_model`` installs the bundle's reference. The apps feed the features
+of every /predict request to ``observe`` and report ``drift_report()``.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from src.metrics import REGISTRY, Gauge
+
+DRIFT_FEATURES = ("area", "bedrooms", "bathrooms", "year_built", "lat", "lon",
+                  "dist_to_cbd_km", "sentiment", "desc_len")
+DRIFT_BINS = 10
+HALF_LIFE_ROWS = 10_000
+MIN_ROWS = 100             # fewer (decayed) rows than this report "insufficient data"
+PSI_MODERATE, PSI_MAJOR = 0.1, 0.25
+PSI_EPSILON = 1e-4         # floor on bin fractions so empty bins keep PSI finite
+
+FEATURE_PSI = REGISTRY.register(Gauge(
+    "house_price_feature_psi", "Population stability index of live vs training features", ("feature",)))
+FEATURE_KS = REGISTRY.register(Gauge(
+    "house_price_feature_ks", "Kolmogorov-Smirnov distance of live vs training features", ("feature",)))
+
+
+def _columns(X, feature_names=None):
+    """``(name, float64 values)`` for a DataFrame, or a dense / sparse matrix with ``feature_names``."""
+    if isinstance(X, pd.DataFrame):
+        names = list(X.columns)
+        column = lambda j: X.iloc[:, j].to_numpy(dtype=np.float64)  # noqa: E731
+    else:
+        names = list(feature_names)
+        X = X.tocsc() if sp.issparse(X) else np.asarray(X)
+        column = (lambda j: X[:, j].toarray().ravel()) if sp.issparse(X) else (lambda j: X[:, j].astype(np.float64))  # noqa: E731
+    return {name: column(j) for j, name in enumerate(names) if name in DRIFT_FEATURES}
+
+
+def reference_sketches(X, feature_names=None, bins=DRIFT_BINS):
+    """
+    Training-time reference per monitored feature: interior bin edges at the
+    quantiles of ``X`` and the fraction of rows per bin. Fits in the bundle.
+    """
+    reference = {}
+    for name, values in _columns(X, feature_names).items():
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            continue
+        # repeated quantiles (discrete features such as bedrooms) collapse into one edge
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        reference[name] = {"edges": edges.tolist(), "fractions": (counts / counts.sum()).tolist()}
+    return reference
+
+
+def psi(expected, actual):
+    expected = np.clip(expected, PSI_EPSILON, None)
+    actual = np.clip(actual, PSI_EPSILON, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def ks(expected, actual):
+    return float(np.max(np.abs(np.cumsum(expected) - np.cumsum(actual))))
+
+
+class DriftMonitor:
+    """Exponentially decayed live histograms over the reference bins; thread-safe."""
+
+    def __init__(self, reference, half_life_rows=HALF_LIFE_ROWS):
+        self.reference = reference
+        self.half_life_rows = half_life_rows
+        self._decay = 0.5 ** (1 / half_life_rows)
+        self._edges = {name: np.asarray(r["edges"]) for name, r in reference.items()}
+        self._counts = {name: np.zeros(len(edges) + 1) for name, edges in self._edges.items()}
+        self._weight = 0.0   # decayed number of rows behind the counts
+        self.rows = 0        # rows observed in total
+        self._lock = threading.Lock()
+
+    def observe(self, X):
+        """Count the rows of an engineered feature frame (other inputs are ignored)."""
+        if not isinstance(X, pd.DataFrame) or len(X) == 0:
+            return
+        # build_features frames are one float32 block, so this is a view, not a copy
+        values = X.to_numpy()
+        position = {name: j for j, name in enumerate(X.columns.tolist())}  # cheaper than get_indexer here
+        batch = {}
+        for name, edges in self._edges.items():
+            j = position.get(name)
+            if j is not None:
+                bins = np.searchsorted(edges, values[:, j], side="right")
+                batch[name] = np.bincount(bins, minlength=len(edges) + 1)
+        factor = self._decay ** len(X)
+        with self._lock:
+            for name, counts in batch.items():
+                live = self._counts[name]
+                live *= factor
+                live += counts
+            self._weight = self._weight * factor + len(X)
+            self.rows += len(X)
+
+    def report(self):
+        """PSI and KS per feature plus an overall status (the worst feature's)."""
+        with self._lock:
+            counts = {name: c.copy() for name, c in self._counts.items()}
+            weight, rows = self._weight, self.rows
+
+        features = {}
+        for name, live in counts.items():
+            total = live.sum()
+            if total < MIN_ROWS:
+                features[name] = {"status": "insufficient data", "rows": round(float(total), 1)}
+                continue
+            expected = np.asarray(self.reference[name]["fractions"])
+            actual = live / total
+            score, distance = psi(expected, actual), ks(expected, actual)
+            FEATURE_PSI.set(score, name)
+            FEATURE_KS.set(distance, name)
+            features[name] = {
+                "psi": round(score, 4),
+                "ks": round(distance, 4),
+                "status": "major" if score > PSI_MAJOR else "moderate" if score > PSI_MODERATE else "stable",
+                "live_fractions": np.round(actual, 4).tolist(),
+            }
+
+        statuses = {f["status"] for f in features.values()}
+        status = next((s for s in ("major", "moderate", "stable") if s in statuses), "insufficient data")
+        return {
+            "status": status,
+            "rows_observed": rows,
+            "effective_rows": round(weight, 1),
+            "half_life_rows": self.half_life_rows,
+            "features": features,
+        }
+
+
+# Monitor for the loaded model (None when its bundle has no reference)
+monitor = None
+
+
+def set_reference(reference, half_life_rows=HALF_LIFE_ROWS):
+    """Start monitoring against ``reference`` (``None`` disables monitoring)."""
+    global monitor
+    monitor = DriftMonitor(reference, half_life_rows) if reference else None
+
+
+def get_monitor():
+    return monitor
+
+
+def observe(X):
+    """Feed a request's engineered features to the monitor, if there is one."""
+    if monitor is not None:
+        monitor.observe(X)
+
+
+def drift_report():
+    if monitor is None:
+        return {"status": "disabled", "reason": "the loaded model has no drift reference; retrain to add one"}
+    return monitor.report()
@@ -1,14 +1,62 @@
+import mmap
+import multiprocessing
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from geopy.distance import geodesic
-from sklearn.feature_extraction.text import TfidfVectorizer
+from joblib import Parallel, delayed
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import re
+from time import perf_counter
+from src.metrics import lap, record_stages
+from src.run_report import report_stage
+from src.sentiment import BulkSentiment
 
 # Global NLP tools
 analyzer = SentimentIntensityAnalyzer()
 tfidf = None   # will be fitted during training
 
+# How the sentiment feature is scored (both give VADER's compound score):
+#   "bulk"  - whole column at once with array lookups (src/sentiment.py)
+#   "exact" - VADER's polarity_scores per description
+SENTIMENT_MODES = ("bulk", "exact")
+sentiment_mode = "bulk"
+bulk_sentiment = BulkSentiment(analyzer)
+
+# How descriptions become text feature columns:
+#   "tfidf"   - TfidfVectorizer fitted on the training data (stored in the bundle)
+#   "hashing" - stateless HashingVectorizer, nothing to fit or ship; chunks can
+#               be hashed in parallel with n_jobs
+TEXT_METHODS = {"tfidf": "tfidf_", "hashing": "hash_"}
+text_vectorizer = {"method": "tfidf", "n_features": 50, "n_jobs": 1}
+HASH_CHUNK_ROWS = 50_000
+
+CITY_CENTER = (12.9716, 77.5946)  # Bangalore CBD
+reference_point = CITY_CENTER    # geo features measure distance from here; stored per bundle
+poi_layer = None                 # optional src.poi.PoiLayer for nearest-amenity features; stored per bundle
+
+# Engine that computes the engineered columns:
+#   "pandas" - numpy over the converted input columns (the stages below)
+#   "polars" - Polars expressions on one lazy frame (src/features_polars.py); needs polars
+FEATURE_BACKENDS = ("pandas", "polars")
+feature_backend = "pandas"
+
+# build_features(n_jobs=...) splits frames into chunks of about this many rows
+PARALLEL_CHUNK_ROWS = 20_000
+
+# Engineered features are stored in one float32 matrix (flags become 0.0/1.0)
+FEATURE_DTYPE = np.float32
+
+LUXURY_KEYWORDS = ["luxury", "premium", "villa", "penthouse", "pool", "gym", "jacuzzi", "terrace"]
+LOCATION_KEYWORDS = ["metro", "station", "hub", "mall", "park", "school", "hospital"]
+CONDITION_KEYWORDS = ["renovated", "modern", "new", "furnished", "maintained"]
+
 
 def set_tfidf(vectorizer):
     """Store a fitted TF-IDF vectorizer (used in training)."""
@@ -22,137 +70,559 @@ def get_tfidf():
     return tfidf
 
 
-def add_basic_features(df):
-    """Add basic engineered features from property attributes."""
-    df = df.copy()
-    
+def set_ref_point(point):
+    """Set the (lat, lon) reference point (e.g. the region's CBD) for geo features."""
+    global reference_point
+    reference_point = (float(point[0]), float(point[1]))
+
+
+def get_ref_point():
+    """Return the current geo reference point (for saving/loading)."""
+    return reference_point
+
+
+def set_poi_layer(layer):
+    """Set the POI layer (see ``src.poi.load_pois``) for nearest-amenity geo features; None turns them off."""
+    global poi_layer
+    poi_layer = layer
+
+
+def get_poi_layer():
+    """Return the current POI layer (for saving/loading)."""
+    return poi_layer
+
+
+def _bundle_settings(bundle):
+    """
+    ``(tfidf, text settings, ref point, POI layer)`` of a loaded model bundle,
+    or the module-level ones when ``bundle`` is None.
+    """
+    if bundle is None:
+        return tfidf, text_vectorizer, reference_point, poi_layer
+    settings = {"method": "tfidf", "n_features": 50, "n_jobs": 1, **(bundle.get("text_vectorizer") or {})}
+    return bundle.get("tfidf"), settings, tuple(bundle.get("ref_point") or CITY_CENTER), bundle.get("poi_layer")
+
+
+def set_sentiment_mode(mode="bulk"):
+    """Score sentiment with the bulk engine or VADER's exact per-text scorer."""
+    global sentiment_mode
+    if mode not in SENTIMENT_MODES:
+        raise ValueError(f"Unknown sentiment mode {mode!r}; choose from {', '.join(SENTIMENT_MODES)}")
+    sentiment_mode = mode
+
+
+def get_sentiment_mode():
+    return sentiment_mode
+
+
+def set_feature_backend(backend="pandas"):
+    """Compute engineered features with numpy ("pandas") or Polars expressions ("polars")."""
+    global feature_backend
+    if backend not in FEATURE_BACKENDS:
+        raise ValueError(f"Unknown feature backend {backend!r}; choose from {', '.join(FEATURE_BACKENDS)}")
+    feature_backend = backend
+
+
+def get_feature_backend():
+    return feature_backend
+
+
+def set_text_vectorizer(method="tfidf", n_features=50, n_jobs=1):
+    """Choose the text vectorizer ("tfidf" or "hashing") and its number of features."""
+    if method not in TEXT_METHODS:
+        raise ValueError(f"Unknown text vectorizer {method!r}; expected one of {sorted(TEXT_METHODS)}")
+    text_vectorizer.update(method=method, n_features=int(n_features), n_jobs=int(n_jobs))
+
+
+def get_text_vectorizer():
+    """Return the current text vectorizer settings (method, n_features, n_jobs)."""
+    return dict(text_vectorizer)
+
+
+class _Source:
+    """Read-only float64 views (and text lists) of the input columns, converted once per build."""
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, name):
+        return name in self.df.columns
+
+    def __getitem__(self, name):
+        values = self._cache.get(name)
+        if values is None:
+            values = pd.to_numeric(self.df[name], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+            self._cache[name] = values
+        return values
+
+    def texts(self, name):
+        """Column as a list of str, with missing / non-text values as ""."""
+        key = ("texts", name)
+        texts = self._cache.get(key)
+        if texts is None:
+            texts = [t if isinstance(t, str) else "" for t in self.df[name].tolist()]
+            self._cache[key] = texts
+        return texts
+
+    def geodesic_km(self, ref_point):
+        """Row-wise distance from (lat, lon) to ``ref_point`` in km."""
+        key = ("geodesic_km", ref_point)
+        dist = self._cache.get(key)
+        if dist is None:
+            dist = self._cache[key] = _geodesic_km(self["lat"], self["lon"], ref_point)
+        return dist
+
+
+def _basic_features(src):
+    """Yield ``(name, values)`` for the basic features computable from ``src``."""
     # Property age
-    if "year_built" in df.columns:
-        df["property_age"] = 2025 - df["year_built"].fillna(2025)
-        df["is_new_property"] = (df["property_age"] <= 5).astype(int)
-        df["is_old_property"] = (df["property_age"] >= 20).astype(int)
-    
+    if "year_built" in src:
+        year_built = src["year_built"]
+        property_age = 2025 - np.where(np.isnan(year_built), 2025, year_built)
+        yield "property_age", property_age
+        yield "is_new_property", property_age <= 5
+        yield "is_old_property", property_age >= 20
+
     # Area-based features
-    if "area" in df.columns:
-        df["area_sqrt"] = np.sqrt(df["area"])
-        df["area_log"] = np.log1p(df["area"])
-        df["is_large_property"] = (df["area"] >= 1500).astype(int)
-        df["is_small_property"] = (df["area"] <= 800).astype(int)
-    
+    if "area" in src:
+        area = src["area"]
+        yield "area_sqrt", np.sqrt(area)
+        yield "area_log", np.log1p(area)
+        yield "is_large_property", area >= 1500
+        yield "is_small_property", area <= 800
+
     # Bedroom/bathroom ratios
-    if "area" in df.columns and "bedrooms" in df.columns:
-        df["area_per_bedroom"] = df["area"] / df["bedrooms"].replace(0, 1)
-        df["bedroom_density"] = df["bedrooms"] / df["area"] * 1000  # bedrooms per 1000 sqft
-    
-    if "bedrooms" in df.columns and "bathrooms" in df.columns:
-        df["bathroom_bedroom_ratio"] = df["bathrooms"] / df["bedrooms"].replace(0, 1)
-        df["total_rooms"] = df["bedrooms"] + df["bathrooms"]
-    
+    if "area" in src and "bedrooms" in src:
+        area, bedrooms = src["area"], src["bedrooms"]
+        yield "area_per_bedroom", area / np.where(bedrooms == 0, 1, bedrooms)
+        yield "bedroom_density", bedrooms / area * 1000  # bedrooms per 1000 sqft
+
+    if "bedrooms" in src and "bathrooms" in src:
+        bedrooms, bathrooms = src["bedrooms"], src["bathrooms"]
+        yield "bathroom_bedroom_ratio", bathrooms / np.where(bedrooms == 0, 1, bedrooms)
+        yield "total_rooms", bedrooms + bathrooms
+
     # Property type indicators
-    if "bedrooms" in df.columns:
-        df["is_studio"] = (df["bedrooms"] == 1).astype(int)
-        df["is_family_home"] = (df["bedrooms"] >= 3).astype(int)
-        df["is_luxury"] = (df["bedrooms"] >= 4).astype(int)
-    
-    return df
+    if "bedrooms" in src:
+        bedrooms = src["bedrooms"]
+        yield "is_studio", bedrooms == 1
+        yield "is_family_home", bedrooms >= 3
+        yield "is_luxury", bedrooms >= 4
 
 
-def add_geo_features(df, ref_point=(12.9716, 77.5946)):
-    """Add geospatial features based on location."""
-    df = df.copy()
-    
-    if "lat" in df.columns and "lon" in df.columns:
-        # Distance to city center
-        def dist(row):
-            try:
-                return geodesic((row["lat"], row["lon"]), ref_point).km
-            except Exception:
-                return np.nan
-        
-        df["dist_to_cbd_km"] = df.apply(dist, axis=1)
-        df["dist_to_cbd_km"] = df["dist_to_cbd_km"].fillna(df["dist_to_cbd_km"].mean())
-        
+def _geodesic_km(lat, lon, ref_point):
+    """
+    Row-wise geodesic distance in km; NaN where the coordinates are invalid or
+    the latitude is outside [-90, 90], which older geopy releases normalized
+    (with a warning) onto the other side of the pole instead of rejecting.
+    """
+    def dist(a, b):
+        if abs(a) > 90:
+            return np.nan
+        try:
+            return geodesic((a, b), ref_point).km
+        except Exception:
+            return np.nan
+
+    return np.fromiter((dist(a, b) for a, b in zip(lat.tolist(), lon.tolist())),
+                       dtype=np.float64, count=len(lat))
+
+
+def _min_max(values):
+    """Min-max scale ignoring NaN (a constant column scales to NaN, as in pandas)."""
+    if len(values) == 0 or np.isnan(values).all():
+        return np.full(len(values), np.nan)
+    lo, hi = np.nanmin(values), np.nanmax(values)
+    return (values - lo) / (hi - lo)
+
+
+def _geo_features(src, ref_point=None, pois=None):
+    """
+    Yield ``(name, values)`` for the geospatial features: distances from
+    ``ref_point``, then nearest-POI distances and counts from ``pois``.
+    """
+    ref_point = reference_point if ref_point is None else tuple(ref_point)
+    if "lat" in src and "lon" in src:
+        lat, lon = src["lat"], src["lon"]
+
+        # Distance to city center (filled with the mean distance, so copy the cached raw values)
+        dist = src.geodesic_km(ref_point).copy()
+        missing = np.isnan(dist)
+        if missing.any() and not missing.all():
+            dist[missing] = dist[~missing].mean()
+        yield "dist_to_cbd_km", dist
+
         # Location-based features
-        df["is_central"] = (df["dist_to_cbd_km"] <= 5).astype(int)
-        df["is_suburban"] = (df["dist_to_cbd_km"] > 10).astype(int)
-        
+        yield "is_central", dist <= 5
+        yield "is_suburban", dist > 10
+
         # Coordinate-based features
-        df["lat_normalized"] = (df["lat"] - df["lat"].min()) / (df["lat"].max() - df["lat"].min())
-        df["lon_normalized"] = (df["lon"] - df["lon"].min()) / (df["lon"].max() - df["lon"].min())
-        
+        yield "lat_normalized", _min_max(lat)
+        yield "lon_normalized", _min_max(lon)
+
         # Distance squared (for non-linear effects)
-        df["dist_to_cbd_squared"] = df["dist_to_cbd_km"] ** 2
-    
-    return df
+        yield "dist_to_cbd_squared", dist ** 2
 
+        # Nearest amenity of each category, and how many are within the radius
+        if pois is not None:
+            yield from pois.features(lat, lon)
 
-def add_nlp_features(df, desc_col="description", fit_vectorizer=False):
-    """Add NLP-based features from property descriptions."""
+
+def _keyword_counts(lowered, keywords):
+    return np.fromiter((sum(1 for word in keywords if word in x) for x in lowered),
+                       dtype=np.float64, count=len(lowered))
+
+
+def _text_features(src, desc_col="description"):
+    """Yield ``(name, values)`` for text statistics, sentiment and keyword features."""
+    if desc_col not in src:
+        return
+    texts = src.texts(desc_col)
+    n_rows = len(texts)
+
+    # Basic text features (one split per description)
+    desc_len = np.fromiter(map(len, texts), dtype=np.float64, count=n_rows)
+    desc_words = np.empty(n_rows)
+    avg_word_length = np.empty(n_rows)
+    for i, text in enumerate(texts):
+        words = text.split()
+        desc_words[i] = len(words)
+        avg_word_length[i] = sum(map(len, words)) / len(words) if words else 0
+    yield "desc_len", desc_len
+    yield "desc_words", desc_words
+    yield "avg_word_length", avg_word_length
+
+    # Sentiment analysis
+    if sentiment_mode == "bulk":
+        sentiment = bulk_sentiment.scores(texts)
+    else:
+        sentiment = np.fromiter((analyzer.polarity_scores(t)["compound"] for t in texts),
+                                dtype=np.float64, count=n_rows)
+    yield "sentiment", sentiment
+    yield "sentiment_positive", sentiment > 0.1
+    yield "sentiment_negative", sentiment < -0.1
+
+    # Keyword-based features
+    lowered = [t.lower() for t in texts]
+    yield "has_luxury_keywords", _keyword_counts(lowered, LUXURY_KEYWORDS)
+    yield "has_location_keywords", _keyword_counts(lowered, LOCATION_KEYWORDS)
+    yield "has_condition_keywords", _keyword_counts(lowered, CONDITION_KEYWORDS)
+
+    # Text complexity
+    yield "text_complexity", desc_words * avg_word_length
+
+
+def _hash_texts(texts, n_features, n_jobs=1):
+    """Hashed term counts, L2-normalized per row; chunks are hashed in parallel when ``n_jobs != 1``."""
+    vectorizer = HashingVectorizer(n_features=n_features, stop_words='english',
+                                   alternate_sign=False, dtype=np.float32)
+    if n_jobs == 1 or len(texts) <= HASH_CHUNK_ROWS:
+        return vectorizer.transform(texts)
+    chunks = [texts[i:i + HASH_CHUNK_ROWS] for i in range(0, len(texts), HASH_CHUNK_ROWS)]
+    parts = Parallel(n_jobs=n_jobs)(delayed(vectorizer.transform)(chunk) for chunk in chunks)
+    return sp.vstack(parts, format="csr")
+
+
+def _text_matrix(src, desc_col="description", fit_vectorizer=False, bundle=None):
+    """
+    Sparse CSR text features of the descriptions and their column prefix.
+    With a ``bundle`` its own (already fitted) vectorizer settings are used.
+    """
     global tfidf
+    texts = src.texts(desc_col)
+    vectorizer, settings, _, _ = _bundle_settings(bundle)
+    method, n_features = settings["method"], settings["n_features"]
+
+    if method == "hashing":
+        return _hash_texts(texts, n_features, settings["n_jobs"]), TEXT_METHODS[method]
+    if bundle is not None:
+        return vectorizer.transform(texts), TEXT_METHODS[method]
+
+    # TF-IDF features (fits the vectorizer if needed)
+    if fit_vectorizer or tfidf is None:
+        tfidf = TfidfVectorizer(max_features=n_features, stop_words='english', dtype=np.float32)
+        return tfidf.fit_transform(texts), TEXT_METHODS[method]
+    return tfidf.transform(texts), TEXT_METHODS[method]
+
+
+def _add_columns(df, columns):
+    """Copy ``df`` and append ``(name, values)`` pairs (flags as 0/1 ints)."""
     df = df.copy()
+    for name, values in columns:
+        df[name] = values.astype(int) if values.dtype == bool else values
+    return df
+
+
+def add_basic_features(df):
+    """Add basic engineered features from property attributes."""
+    return _add_columns(df, _basic_features(_Source(df)))
+
+
+def add_geo_features(df, ref_point=None):
+    """Add geospatial features based on location (and the POI layer, if set)."""
+    return _add_columns(df, _geo_features(_Source(df), ref_point=ref_point, pois=poi_layer))
+
 
+def add_text_features(df, desc_col="description"):
+    """Add text statistics, sentiment and keyword features from descriptions."""
+    return _add_columns(df, _text_features(_Source(df), desc_col=desc_col))
+
+
+def add_tfidf_features(df, desc_col="description", fit_vectorizer=False):
+    """Add dense text vector features (TF-IDF or hashed) from descriptions."""
+    if desc_col not in df.columns:
+        return df
+
+    text_matrix, prefix = _text_matrix(_Source(df), desc_col=desc_col, fit_vectorizer=fit_vectorizer)
+    tfidf_df = pd.DataFrame(
+        text_matrix.toarray(),
+        columns=[f"{prefix}{i}" for i in range(text_matrix.shape[1])]
+    )
+
+    return pd.concat([df.reset_index(drop=True), tfidf_df.reset_index(drop=True)], axis=1)
+
+
+def add_nlp_features(df, desc_col="description", fit_vectorizer=False):
+    """Add NLP-based features from property descriptions."""
     if desc_col in df.columns:
-        # Basic text features
-        df["desc_len"] = df[desc_col].fillna("").str.len()
-        df["desc_words"] = df[desc_col].fillna("").str.split().str.len()
-        df["avg_word_length"] = df[desc_col].fillna("").str.split().apply(
-            lambda x: np.mean([len(word) for word in x]) if x else 0
-        )
-        
-        # Sentiment analysis
-        df["sentiment"] = df[desc_col].fillna("").apply(
-            lambda t: analyzer.polarity_scores(t)["compound"]
-        )
-        df["sentiment_positive"] = (df["sentiment"] > 0.1).astype(int)
-        df["sentiment_negative"] = (df["sentiment"] < -0.1).astype(int)
-        
-        # Keyword-based features
-        luxury_keywords = ["luxury", "premium", "villa", "penthouse", "pool", "gym", "jacuzzi", "terrace"]
-        location_keywords = ["metro", "station", "hub", "mall", "park", "school", "hospital"]
-        condition_keywords = ["renovated", "modern", "new", "furnished", "maintained"]
-        
-        df["has_luxury_keywords"] = df[desc_col].fillna("").str.lower().apply(
-            lambda x: sum(1 for word in luxury_keywords if word in x)
-        )
-        df["has_location_keywords"] = df[desc_col].fillna("").str.lower().apply(
-            lambda x: sum(1 for word in location_keywords if word in x)
-        )
-        df["has_condition_keywords"] = df[desc_col].fillna("").str.lower().apply(
-            lambda x: sum(1 for word in condition_keywords if word in x)
-        )
-        
-        # Text complexity
-        df["text_complexity"] = df["desc_words"] * df["avg_word_length"]
-        
-        # TF-IDF features (50 features)
-        if fit_vectorizer or tfidf is None:
-            tfidf = TfidfVectorizer(max_features=50, stop_words='english')
-            tfidf_matrix = tfidf.fit_transform(df[desc_col].fillna("")).toarray()
-        else:
-            tfidf_matrix = tfidf.transform(df[desc_col].fillna("")).toarray()
-
-        tfidf_df = pd.DataFrame(
-            tfidf_matrix,
-            columns=[f"tfidf_{i}" for i in range(tfidf_matrix.shape[1])]
-        )
-
-        df = pd.concat([df.reset_index(drop=True), tfidf_df.reset_index(drop=True)], axis=1)
+        df = add_text_features(df, desc_col=desc_col)
+        df = add_tfidf_features(df, desc_col=desc_col, fit_vectorizer=fit_vectorizer)
         df = df.drop(columns=[desc_col])
+    else:
+        df = df.copy()
 
     return df
 
 
-def build_features(df, fit_vectorizer=False):
+def text_free_columns(feature_names):
+    """
+    The columns of a feature matrix that do not come from the description, in
+    order: what ``build_features`` returns for the same inputs without one.
+    """
+    empty = _Source(pd.DataFrame({"description": pd.Series([], dtype=object)}))
+    text = {name for name, _ in _text_features(empty)}
+    prefixes = tuple(TEXT_METHODS.values())
+    return [name for name in feature_names if name not in text and not name.startswith(prefixes)]
+
+
+def _write_column(out, j, values):
+    """Cast ``values`` into column ``j`` of ``out`` in place, replacing NaN with 0."""
+    column = out[:, j]
+    np.copyto(column, values, casting="unsafe")
+    missing = np.isnan(column)
+    if missing.any():
+        column[missing] = 0
+
+
+def _stages(ref_point, pois=None):
+    return [
+        ("features.basic", _basic_features),
+        ("features.geo", partial(_geo_features, ref_point=ref_point, pois=pois)),
+        ("features.nlp", _text_features),
+    ]
+
+
+def _text_block(df, src, fit_vectorizer, report, bundle=None, timings=None):
+    """Sparse text features and their names (``None, []`` without descriptions)."""
+    if "description" not in df.columns:
+        return None, []
+    t = perf_counter()
+    with report_stage(report, "features.tfidf", rows=len(df)) as record:
+        text_matrix, prefix = _text_matrix(src, fit_vectorizer=fit_vectorizer, bundle=bundle)
+        record["features"] = text_matrix.shape[1]
+    lap("features.tfidf", t, timings)
+    return text_matrix, [f"{prefix}{i}" for i in range(text_matrix.shape[1])]
+
+
+def _allocate(n_rows, n_cols, dtype, shared):
+    """Uninitialized Fortran-ordered matrix; ``shared`` puts it in memory forked workers write to."""
+    if not shared:
+        return np.empty((n_rows, n_cols), dtype=dtype, order="F")
+    # anonymous MAP_SHARED mapping: writes from forked children land in the parent's pages
+    buffer = mmap.mmap(-1, max(1, n_rows * n_cols * np.dtype(dtype).itemsize))
+    return np.frombuffer(buffer, dtype=dtype, count=n_rows * n_cols).reshape((n_cols, n_rows)).T
+
+
+def _resolve_jobs(n_jobs, n_rows):
+    """Number of worker processes to use, or 1 to build in this process."""
+    n_jobs = (os.cpu_count() or 1) if n_jobs in (None, -1) else int(n_jobs)
+    if n_jobs <= 1 or n_rows < 2 * PARALLEL_CHUNK_ROWS:
+        return 1
+    if "fork" not in multiprocessing.get_all_start_methods():
+        warnings.warn("Parallel feature building needs the 'fork' start method; building serially")
+        return 1
+    return n_jobs
+
+
+# Inherited by forked workers: (df, out, dist, position, ref_point)
+_fork_state = None
+
+
+def _build_rows(bounds):
+    """Worker: row-local features for ``df[start:stop]``, written straight into the shared matrix."""
+    start, stop = bounds
+    df, out, dist, position, ref_point = _fork_state
+    src = _Source(df.iloc[start:stop])
+    block = out[start:stop]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for stage_fn in (_basic_features, _text_features):
+            for name, values in stage_fn(src):
+                _write_column(block, position[name], values)
+        if dist is not None:
+            dist[start:stop] = src.geodesic_km(ref_point)
+    return stop - start
+
+
+def _build_rows_parallel(df, src, out, position, n_jobs, ref_point):
+    """
+    Compute the row-local features (basic, text, geodesic distance) of ``df``
+    across ``n_jobs`` forked processes. Workers inherit the frame, so nothing
+    large is pickled, and write into ``out`` (shared memory). The raw
+    distances are cached on ``src`` for the global geo features.
+    """
+    global _fork_state
+    n_rows = len(df)
+    dist = _allocate(n_rows, 1, np.float64, shared=True)[:, 0] if "lat" in src and "lon" in src else None
+    edges = np.linspace(0, n_rows, max(n_jobs, -(-n_rows // PARALLEL_CHUNK_ROWS)) + 1).astype(int)
+
+    _fork_state = (df, out, dist, position, ref_point)
+    try:
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=context) as pool:
+            list(pool.map(_build_rows, zip(edges[:-1].tolist(), edges[1:].tolist())))
+    finally:
+        _fork_state = None
+
+    if dist is not None:
+        src._cache[("geodesic_km", ref_point)] = dist
+
+
+def _engineered_block(df, src, report, extra_columns=0, n_jobs=1, ref_point=None, pois=None, backend=None,
+                      timings=None):
+    """
+    Float32 matrix of the numeric inputs followed by every engineered feature
+    (NaN -> 0), with ``extra_columns`` uninitialized columns left at the end.
+    Returns the matrix and the names of its filled columns.
+    With ``n_jobs > 1`` the row-local stages run in a process pool; the
+    polars backend uses Polars' own threads instead.
+    """
+    ref_point = reference_point if ref_point is None else tuple(ref_point)
+    stages = _stages(ref_point, pois)
+    # Lay out columns: numeric inputs, then engineered features in stage order.
+    # An engineered name that already exists in the input overwrites it in place.
+    # The description is never passed through, even when all-missing makes it numeric.
+    names = [c for c in df.columns if c != "description"
+             and pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+    position = {name: j for j, name in enumerate(names)}
+    empty = _Source(df.iloc[:0])
+    for _, stage_fn in stages:
+        for name, _ in stage_fn(empty):
+            if name not in position:
+                position[name] = len(names)
+                names.append(name)
+
+    backend = backend or feature_backend
+    if backend not in FEATURE_BACKENDS:
+        raise ValueError(f"Unknown feature backend {backend!r}; choose from {', '.join(FEATURE_BACKENDS)}")
+    n_jobs = 1 if backend == "polars" else _resolve_jobs(n_jobs, len(df))
+    out = _allocate(len(df), len(names) + extra_columns, FEATURE_DTYPE, shared=n_jobs > 1)
+    for j, name in enumerate(names):
+        if name in df.columns:
+            _write_column(out, j, src[name])
+
+    t = perf_counter()
+    if backend == "polars":
+        from src.features_polars import engineered_features
+
+        with report_stage(report, "features.polars", rows=len(df)) as record:
+            n_features = 0
+            for name, values in engineered_features(src, ref_point, pois):
+                _write_column(out, position[name], values)
+                n_features += 1
+            record["features"] = n_features
+        lap("features.polars", t, timings)
+        return out, names
+
+    if n_jobs > 1:
+        with report_stage(report, "features.parallel", rows=len(df)) as record:
+            _build_rows_parallel(df, src, out, position, n_jobs, ref_point)
+            record["workers"] = n_jobs
+        t = lap("features.parallel", t, timings)
+        # only the geo features that need whole-column statistics are left
+        stages = [(name, fn) for name, fn in stages if name == "features.geo"]
+
+    for stage_name, stage_fn in stages:
+        with report_stage(report, stage_name, rows=len(df)) as record:
+            n_features = 0
+            for name, values in stage_fn(src):
+                _write_column(out, position[name], values)
+                n_features += 1
+            record["features"] = n_features
+        t = lap(stage_name, t, timings)
+    return out, names
+
+
+def build_features(df, fit_vectorizer=False, report=None, n_jobs=1, bundle=None, backend=None):
     """
     Build comprehensive feature set with 20+ predictive features.
     Combines basic, geospatial, and NLP features.
+    Pass a ``RunReport`` as ``report`` to record per-stage timings and memory.
+
+    Numeric input columns are passed through and every engineered column is
+    written once into a single preallocated float32 matrix (NaN -> 0), which
+    backs the returned DataFrame without further copies.
+
+    ``n_jobs > 1`` (or -1 for all cores) computes the row-local features of
+    large frames in that many processes; the text vectorizer is still fitted
+    once on the whole frame.
+
+    Pass a loaded model ``bundle`` (see ``load_bundle``) to build features with
+    its vectorizer, reference point and POI layer instead of the module-level
+    ones, so several models can serve side by side.
+
+    ``backend`` ("pandas" or "polars", default ``set_feature_backend``) picks
+    the engine for the engineered columns; both give the same features.
     """
-    df = add_basic_features(df)
-    df = add_geo_features(df)
-    if "description" in df.columns:
-        df = add_nlp_features(df, fit_vectorizer=fit_vectorizer)
-    
-    # Ensure we have numeric features only for ML
-    df = df.select_dtypes(include=[np.number]).fillna(0)
-    
-    return df
+    src = _Source(df)
+    _, _, ref_point, pois = _bundle_settings(bundle)
+    timings = ([], [])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Text first: its width is only known once the vectorizer is fitted
+        text_matrix, text_names = _text_block(df, src, fit_vectorizer, report, bundle, timings)
+        out, names = _engineered_block(df, src, report, extra_columns=len(text_names), n_jobs=n_jobs,
+                                       ref_point=ref_point, pois=pois, backend=backend, timings=timings)
+
+        if text_matrix is not None:
+            block = out[:, len(names):]
+            block[...] = 0
+            coo = text_matrix.tocoo()
+            block[coo.row, coo.col] = coo.data
+    record_stages(*timings)
+
+    # Fortran order makes out.T C-contiguous, so pandas wraps it as one block without copying
+    return pd.DataFrame(out, index=df.index, columns=names + text_names, copy=False)
+
+
+def build_sparse_features(df, fit_vectorizer=False, report=None, n_jobs=1, bundle=None, backend=None):
+    """
+    Same features as ``build_features`` as a float32 CSR matrix, returned with
+    the column names. The text block stays sparse, so thousands of text
+    features cost memory only for the terms that occur.
+    """
+    src = _Source(df)
+    _, _, ref_point, pois = _bundle_settings(bundle)
+    timings = ([], [])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        text_matrix, text_names = _text_block(df, src, fit_vectorizer, report, bundle, timings)
+        out, names = _engineered_block(df, src, report, n_jobs=n_jobs, ref_point=ref_point, pois=pois,
+                                       backend=backend, timings=timings)
+    record_stages(*timings)
+
+    blocks = [sp.csr_matrix(out)]
+    if text_matrix is not None:
+        blocks.append(text_matrix)
+    return sp.hstack(blocks, format="csr", dtype=FEATURE_DTYPE), names + text_names
@@ -0,0 +1,297 @@
+"""
+Market statistics behind ``/api/market-data``.
+
+``MarketStats`` keeps mergeable aggregates per market segment: a row count,
+a price sum and a histogram of price per sqft over log-spaced bins (medians
+read from it are within about 1.5%). Adding rows, or merging another
+``MarketStats``, only adds counts, so the statistics are maintained
+incrementally. The segments are:
+
+- everything, and each bedroom count (``5+`` pooled);
+- new construction (built within ``NEW_CONSTRUCTION_YEARS``) or not;
+- central (within ``CENTRAL_KM`` of the reference point, haversine) or not;
+- with or without a luxury keyword in the description;
+- each calendar month, for rows with a date.
+
+Training computes the aggregates over the training rows, and they are stored
+in the model bundle. Training rows count toward the monthly trend only when
+the data has a ``date`` / ``listed_at`` / ``sold_at`` column. When the app
+logs requests (``REQUEST_LOG_DIR``), a background thread merges each
+completed log file once, using the predicted price and the request time.
+This lets the trend follow what is being priced now. After each merge, the
+statistics are materialized into a JSON snapshot. Its ETag hashes the
+statistics only, and the time they were generated is sent as
+``Last-Modified``, so a merge that changes nothing keeps the ETag. The
+endpoint serves those bytes from memory and answers ``If-None-Match`` with a
+304, so no request recomputes anything.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.features import CITY_CENTER, LUXURY_KEYWORDS, get_ref_point
+from src.poi import _haversine_km
+
+PPSF_EDGES = np.geomspace(1.0, 1e6, 481)  # price per sqft bins: 480 log-spaced, ~3% wide
+NEW_CONSTRUCTION_YEARS = 5
+CURRENT_YEAR = 2025                       # as in the property_age feature
+CENTRAL_KM = 5.0                          # as in the is_central feature
+DATE_COLUMNS = ("date", "listed_at", "sold_at")
+MARKET_COLUMNS = ("area", "bedrooms", "year_built", "lat", "lon", "description") + DATE_COLUMNS
+MIN_SEGMENT_ROWS = 5                      # fewer rows on either side leave a premium unreported
+MIN_MONTH_ROWS = 20                       # months with fewer rows are left out of the growth figure
+REFRESH_SECONDS = 300.0
+BEDROOM_SEGMENTS = ("bedrooms=1", "bedrooms=2", "bedrooms=3", "bedrooms=4", "bedrooms=5+")
+
+
+def _month_of(df, timestamps):
+    if timestamps is None:
+        column = next((name for name in DATE_COLUMNS if name in df), None)
+        if column is None:
+            return None
+        timestamps = df[column]
+    months = pd.to_datetime(pd.Series(timestamps), errors="coerce", utc=True).dt.strftime("%Y-%m")
+    return months.to_numpy(dtype=object)
+
+
+class MarketStats:
+    """Price aggregates by market segment: ``{segment: [rows, price sum, price-per-sqft histogram]}``."""
+
+    def __init__(self, ref_point=None):
+        self.ref_point = tuple(ref_point or CITY_CENTER)
+        self.segments = {}
+        self.rows = {"training": 0, "request_log": 0}
+        self.log_files = set()  # request log files already merged
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _masks(self, df, n):
+        """``(segment, row mask)`` pairs for a frame of listings."""
+        def column(name):
+            if name not in df:
+                return np.full(n, np.nan)
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)
+
+        yield "all", np.ones(n, dtype=bool)
+
+        bedrooms = column("bedrooms")
+        for key, count in zip(BEDROOM_SEGMENTS, range(1, 5)):
+            yield key, bedrooms == count
+        yield BEDROOM_SEGMENTS[-1], bedrooms >= 5
+
+        year_built = column("year_built")
+        known = ~np.isnan(year_built)
+        new = CURRENT_YEAR - year_built <= NEW_CONSTRUCTION_YEARS
+        yield "new=1", known & new
+        yield "new=0", known & ~new
+
+        lat, lon = np.radians(column("lat")), np.radians(column("lon"))
+        dist = _haversine_km(lat, lon, np.radians(self.ref_point[0]), np.radians(self.ref_point[1]))
+        known = ~np.isnan(dist)
+        yield "central=1", known & (dist <= CENTRAL_KM)
+        yield "central=0", known & (dist > CENTRAL_KM)
+
+        if "description" in df:
+            lowered = df["description"].fillna("").astype(str).str.lower()
+            luxury = lowered.str.contains("|".join(LUXURY_KEYWORDS), regex=True).to_numpy(dtype=bool)
+            yield "luxury=1", luxury
+            yield "luxury=0", ~luxury
+
+    def update(self, df, prices, timestamps=None, source="training"):
+        """Add listings ``df`` priced at ``prices`` (dated by ``timestamps`` or the frame's date column)."""
+        prices = np.asarray(prices, dtype=np.float64)
+        area = pd.to_numeric(df["area"], errors="coerce").to_numpy(dtype=np.float64) if "area" in df \
+            else np.full(len(df), np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ppsf = prices / area
+        valid = np.isfinite(ppsf) & (ppsf > 0) & (prices > 0)
+        bins = np.clip(np.searchsorted(PPSF_EDGES, ppsf, side="right") - 1, 0, len(PPSF_EDGES) - 2)
+
+        masks = list(self._masks(df, len(df)))
+        months = _month_of(df, timestamps)
+        if months is not None:
+            for month in pd.unique(months[pd.notna(months)]):
+                masks.append((f"month={month}", months == month))
+
+        with self._lock:
+            for key, mask in masks:
+                mask = mask & valid
+                if not mask.any():
+                    continue
+                segment = self.segments.setdefault(key, [0, 0.0, np.zeros(len(PPSF_EDGES) - 1, dtype=np.int64)])
+                segment[0] += int(mask.sum())
+                segment[1] += float(prices[mask].sum())
+                segment[2] += np.bincount(bins[mask], minlength=len(PPSF_EDGES) - 1)
+            self.rows[source] = self.rows.get(source, 0) + int(valid.sum())
+
+    def merge(self, other):
+        """Add another ``MarketStats``' aggregates to these."""
+        with self._lock:
+            for key, (rows, price_sum, hist) in other.segments.items():
+                segment = self.segments.setdefault(key, [0, 0.0, np.zeros(len(PPSF_EDGES) - 1, dtype=np.int64)])
+                segment[0] += rows
+                segment[1] += price_sum
+                segment[2] += hist
+            for source, rows in other.rows.items():
+                self.rows[source] = self.rows.get(source, 0) + rows
+            self.log_files |= other.log_files
+
+    def median_ppsf(self, key):
+        """Median price per sqft of a segment (log-interpolated within its bin), or None if it is empty."""
+        segment = self.segments.get(key)
+        if segment is None or segment[0] == 0:
+            return None
+        cumulative = np.cumsum(segment[2])
+        half = cumulative[-1] / 2
+        i = int(np.searchsorted(cumulative, half))
+        below = cumulative[i - 1] if i > 0 else 0
+        frac = (half - below) / segment[2][i]
+        lo, hi = np.log(PPSF_EDGES[i]), np.log(PPSF_EDGES[i + 1])
+        return float(np.exp(lo + frac * (hi - lo)))
+
+    def _premium_pct(self, name):
+        with_, without = f"{name}=1", f"{name}=0"
+        if any(self.segments.get(key, [0])[0] < MIN_SEGMENT_ROWS for key in (with_, without)):
+            return None
+        return round((self.median_ppsf(with_) / self.median_ppsf(without) - 1) * 100, 2)
+
+    def snapshot(self):
+        """The statistics as a JSON-ready dict."""
+        with self._lock:
+            months = sorted(key.split("=", 1)[1] for key in self.segments if key.startswith("month="))
+            monthly = [{"month": month, "rows": self.segments[f"month={month}"][0],
+                        "median_price_per_sqft": self.median_ppsf(f"month={month}")} for month in months]
+            base = monthly[0]["median_price_per_sqft"] if monthly else None
+            for row in monthly:
+                row["index"] = round(row["median_price_per_sqft"] / base * 100, 2)
+
+            settled = [row for row in monthly if row["rows"] >= MIN_MONTH_ROWS]
+            growth, period = None, None
+            if len(settled) >= 2:
+                first, last = settled[0], settled[-1]
+                growth = round((last["median_price_per_sqft"] / first["median_price_per_sqft"] - 1) * 100, 2)
+                period = [first["month"], last["month"]]
+
+            everything = self.segments.get("all", [0, 0.0])
+            return {
+                "generated_at": pd.Timestamp.now(tz="UTC").isoformat(),
+                "rows": dict(self.rows),
+                "mean_price": everything[1] / everything[0] if everything[0] else None,
+                "price_per_sqft": {
+                    "median": self.median_ppsf("all"),
+                    "by_bedrooms": {key.split("=", 1)[1]: self.median_ppsf(key)
+                                    for key in BEDROOM_SEGMENTS if key in self.segments},
+                },
+                "trends": {
+                    "price_growth_pct": growth,
+                    "growth_period": period,
+                    "new_construction_premium_pct": self._premium_pct("new"),
+                    "central_premium_pct": self._premium_pct("central"),
+                    "luxury_premium_pct": self._premium_pct("luxury"),
+                },
+                "monthly": monthly,
+            }
+
+
+def market_stats(df, prices, ref_point=None):
+    """Aggregates over training listings ``df`` with their ``prices``."""
+    stats = MarketStats(ref_point if ref_point is not None else get_ref_point())
+    stats.update(df, prices)
+    return stats
+
+
+# Statistics of the serving app and their materialized snapshot: (JSON bytes, ETag, generated at)
+stats = None
+snapshot = None
+
+
+def set_market_stats(market):
+    """Serve ``market`` (``None`` turns the statistics off) and materialize its snapshot."""
+    global stats
+    stats = market
+    refresh()
+
+
+def get_market_stats():
+    return stats
+
+
+def refresh():
+    """
+    Rebuild the served snapshot from the current statistics. The ETag hashes
+    the statistics alone, not their ``generated_at`` time (sent as
+    ``Last-Modified``), so an unchanged snapshot keeps its ETag and body.
+    """
+    global snapshot
+    if stats is None:
+        snapshot = None
+        return
+    data = stats.snapshot()
+    generated_at = data.pop("generated_at")
+    etag = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+    if snapshot is not None and snapshot[1] == etag:
+        return
+    body = json.dumps({"generated_at": generated_at, **data}).encode()
+    snapshot = (body, etag, pd.Timestamp(generated_at).to_pydatetime())
+
+
+def ingest_request_log(directory):
+    """Merge the completed request log files under ``directory`` not merged yet; returns how many were."""
+    from src.request_log import FORMATS, read_log
+
+    if stats is None or not os.path.isdir(directory):
+        return 0
+    paths = sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                   if name.endswith(tuple(FORMATS.values())) and os.path.join(directory, name) not in stats.log_files)
+    for path in paths:
+        log = read_log(path)
+        log = log[log["endpoint"] == "/predict"]
+        stats.update(log, log["prediction"].to_numpy(), timestamps=log["timestamp"], source="request_log")
+        stats.log_files.add(path)
+    if paths:
+        refresh()
+    return len(paths)
+
+
+def start_refresher(directory, interval=REFRESH_SECONDS):
+    """Merge new request log files every ``interval`` seconds in a daemon thread."""
+    def run():
+        while True:
+            try:
+                ingest_request_log(directory)
+            except Exception as e:  # keep serving the last snapshot
+                print(f"⚠️ Market statistics refresh failed: {e}")
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="market-stats", daemon=True)
+    thread.start()
+    return thread
+
+
+def market_response(request):
+    """The current snapshot as a JSON response with an ETag and Last-Modified (304 when the client has it)."""
+    from flask import Response, jsonify
+
+    current = snapshot
+    if current is None:
+        return jsonify({"error": "No market statistics loaded; retrain or set MARKET_DATA"}), 404
+    body, etag, generated_at = current
+    response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.last_modified = generated_at
+    response.cache_control.public = True
+    response.cache_control.max_age = 60
+    return response.make_conditional(request)
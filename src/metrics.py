@@ -0,0 +1,402 @@
+"""
+Low-overhead in-process metrics with a Prometheus text exposition.
+
+Counters and gauges are plain Python objects guarded by a lock. The serving
+hot path never takes a lock: histogram observations, stage timings and each
+finished request are appended as plain tuples to lock-free queues and folded
+into their metrics in batches with numpy (on scrape, or once a queue grows
+past its threshold). Handlers time their stages with plain ``perf_counter``
+readings and record them with one ``record_stages`` call, and requests in
+flight are one token each in a deque, which keeps the instrumentation of a
+request to a few microseconds. Reads and ``Registry.render`` fold under the
+drain lock, so an export never sees a half-folded batch. ``init_app`` wires
+request counting and a ``/metrics`` route into a Flask app.
+"""
+import threading
+from collections import deque
+from itertools import chain
+from operator import itemgetter
+from time import perf_counter
+
+import numpy as np
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 5, 10, 50, 100, 500, 1000, 10000, 100000, 1000000)
+DRAIN_THRESHOLD = 4096
+
+# Observations not yet folded into their metrics, one queue per kind:
+_pending = deque()          # (histogram series, value)
+_stage_pending = deque()    # (stage name, seconds) for STAGE_SECONDS
+_timings_pending = deque()  # (stage names, seconds) sequences recorded together by record_stages
+_request_pending = deque()  # ((endpoint, method, status), seconds) of each finished request
+_drain_lock = threading.Lock()
+_first, _second = itemgetter(0), itemgetter(1)
+
+
+def _take(queue):
+    popleft = queue.popleft
+    return [popleft() for _ in range(len(queue))]
+
+
+def _codes(keys):
+    """Distinct keys and the index of each key in them."""
+    codes = {key: i for i, key in enumerate(set(keys))}
+    return list(codes), np.fromiter(map(codes.__getitem__, keys), dtype=np.intp, count=len(keys))
+
+
+def _grouped(pairs):
+    """``(key, float64 values)`` per distinct key of a list of ``(key, value)`` pairs."""
+    if not pairs:
+        return
+    keys, ids = _codes(list(map(_first, pairs)))
+    values = np.fromiter(map(_second, pairs), dtype=np.float64, count=len(pairs))
+    order = np.argsort(ids, kind="stable")
+    bounds = np.searchsorted(ids[order], np.arange(len(keys) + 1)).tolist()
+    for i, key in enumerate(keys):
+        yield key, values[order[bounds[i]:bounds[i + 1]]]
+
+
+def _add(series, counts, total):
+    for i in np.flatnonzero(counts).tolist():
+        series.values[i] += int(counts[i])
+    series.values[-1] += float(total)
+
+
+def _add_values(series, values):
+    _add(series, np.bincount(np.searchsorted(series.buckets, values), minlength=len(series.buckets) + 1),
+         values.sum())
+
+
+def _fold_stages():
+    """Fold the queued stage timings, grouping ``record_stages`` calls by their stage names."""
+    for name, values in _grouped(_take(_stage_pending)):
+        _add_values(_STAGE_SERIES.get(name) or _stage_series(name), values)
+    rows = {}
+    for names, seconds in _take(_timings_pending):
+        rows.setdefault(tuple(names), []).append(seconds)
+    for names, seconds in rows.items():
+        seconds = np.fromiter(chain.from_iterable(seconds), dtype=np.float64).reshape(-1, len(names))
+        for i, name in enumerate(names):
+            _add_values(_STAGE_SERIES.get(name) or _stage_series(name), seconds[:, i])
+
+
+def _fold():
+    """Fold every queued observation into its metric; the caller holds ``_drain_lock``."""
+    for series, values in _grouped(_take(_pending)):
+        _add_values(series, values)
+    _fold_stages()
+    for (endpoint, method, status), values in _grouped(_take(_request_pending)):
+        _add_values(REQUEST_SECONDS.labels(endpoint), values)
+        REQUESTS.inc(endpoint, method, status, amount=len(values))
+        if status >= 400:
+            ERRORS.inc(endpoint, status, amount=len(values))
+
+
+def drain():
+    """Fold queued observations into their metrics, unless another thread is already doing so."""
+    if not _drain_lock.acquire(blocking=False):
+        return
+    try:
+        _fold()
+    finally:
+        _drain_lock.release()
+
+
+def _format_labels(labelnames, labels, extra=None):
+    pairs = list(zip(labelnames, labels))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        with _drain_lock:
+            _fold()
+        return self._values.get(labels, 0)
+
+    def total(self):
+        with _drain_lock:
+            _fold()
+        return sum(self._values.values())
+
+    def render(self):
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Value that can go up and down (e.g. requests in flight)."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+
+class InFlightGauge(Gauge):
+    """Requests in progress: one token per request in a deque, whose append/pop need no lock."""
+
+    def __init__(self, name, documentation):
+        super().__init__(name, documentation)
+        self.tokens = deque()
+
+    def inc(self, *labels, amount=1):
+        self.tokens.extend([None] * amount)
+
+    def dec(self, *labels, amount=1):
+        for _ in range(amount):
+            self.tokens.pop()
+
+    def value(self, *labels):
+        return len(self.tokens)
+
+    def total(self):
+        return len(self.tokens)
+
+    def render(self):
+        yield f"{self.name} {len(self.tokens)}"
+
+
+class _HistogramSeries:
+    """Bucket counts of one label combination: [per-bucket..., +Inf, sum]."""
+
+    __slots__ = ("buckets", "values")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.values = [0] * (len(buckets) + 2)
+
+    def observe(self, value):
+        _pending.append((self, value))
+        if len(_pending) >= DRAIN_THRESHOLD:
+            drain()
+
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *labels):
+        """Return the series for ``labels``; hot paths can keep it to skip the lookup."""
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _HistogramSeries(self.buckets))
+        return series
+
+    def observe(self, value, *labels):
+        (self._series.get(labels) or self.labels(*labels)).observe(value)
+
+    def count(self, *labels):
+        with _drain_lock:
+            _fold()
+        series = self._series.get(labels)
+        return sum(series.values[:-1]) if series else 0
+
+    def sum(self, *labels):
+        with _drain_lock:
+            _fold()
+        series = self._series.get(labels)
+        return series.values[-1] if series else 0.0
+
+    def render(self):
+        for labels, series in sorted(self._series.items()):
+            values = list(series.values)
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += n
+                le = ("le", _format_value(bound) if bound == float("inf") else repr(float(bound)))
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(values[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        # hold the drain lock throughout, so no fold is half-way through what is exported
+        with _drain_lock:
+            _fold()
+            for metric in self._metrics:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "house_price_requests_total", "HTTP requests handled", ("endpoint", "method", "status")))
+ERRORS = REGISTRY.register(Counter(
+    "house_price_request_errors_total", "HTTP requests answered with a 4xx/5xx status", ("endpoint", "status")))
+IN_FLIGHT = REGISTRY.register(InFlightGauge(
+    "house_price_requests_in_flight", "HTTP requests currently being handled"))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "house_price_request_duration_seconds", "End-to-end request latency", ("endpoint",)))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "house_price_stage_duration_seconds", "Latency of each serving pipeline stage", ("stage",)))
+BATCH_ROWS = REGISTRY.register(Histogram(
+    "house_price_batch_rows", "Rows scored per prediction call", buckets=SIZE_BUCKETS))
+
+_STAGE_SERIES = {}
+
+
+def _stage_series(name):
+    series = _STAGE_SERIES.get(name)
+    if series is None:
+        series = _STAGE_SERIES[name] = STAGE_SECONDS.labels(name)
+    return series
+
+
+def lap(name, start, timings=None):
+    """
+    Record the time since ``start`` as stage ``name`` and return the current
+    clock, so consecutive stages can be timed with one call each:
+
+        t = perf_counter()
+        df = add_basic_features(df)
+        t = lap("features.basic", t)
+
+    With ``timings``, a ``(names, seconds)`` pair of lists, the stage is
+    appended there instead, to be queued with the others by one
+    ``record_stages(*timings)`` call.
+    """
+    now = perf_counter()
+    if timings is None:
+        _stage_pending.append((name, now - start))
+        if len(_stage_pending) >= DRAIN_THRESHOLD:
+            drain()
+    else:
+        timings[0].append(name)
+        timings[1].append(now - start)
+    return now
+
+
+def record_stages(names, seconds):
+    """
+    Queue the durations of several stages as one observation: stage
+    ``names[i]`` took ``seconds[i]``. Hot paths time their stages with plain
+    ``perf_counter`` readings (or ``lap`` into a ``([], [])`` pair of lists)
+    and record them with one call, which costs a fraction of a ``stage``
+    block per stage.
+    """
+    if names:
+        _timings_pending.append((names, seconds))
+        if len(_timings_pending) >= DRAIN_THRESHOLD:
+            drain()
+
+
+class stage:
+    """
+    Context manager timing a pipeline stage into ``STAGE_SECONDS``; the
+    duration is also left on ``.seconds`` for per-request use.
+
+        with stage("predict"):
+            preds = model.predict(X)
+    """
+
+    __slots__ = ("name", "start", "seconds")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = seconds = perf_counter() - self.start
+        _stage_pending.append((self.name, seconds))
+        if len(_stage_pending) >= DRAIN_THRESHOLD:
+            drain()
+        return False
+
+
+def record_request(endpoint, method, status, seconds):
+    """Queue a finished request's latency, count and error status (drained every ``DRAIN_THRESHOLD // 8``)."""
+    _request_pending.append(((endpoint, method, status), seconds))
+    if len(_request_pending) >= DRAIN_THRESHOLD // 8:
+        drain()
+
+
+def init_app(app):
+    """Count requests, time them end-to-end and expose ``/metrics`` on a Flask app."""
+    from flask import Response, g, request
+
+    enter, leave = IN_FLIGHT.tokens.append, IN_FLIGHT.tokens.pop
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = perf_counter()
+        enter(None)
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return response
+        leave()
+        rule = request.url_rule
+        record_request(rule.rule if rule is not None else "unmatched", request.method, response.status_code,
+                       perf_counter() - start)
+        return response
+
+    @app.teardown_request
+    def _release_in_flight(exc):
+        # after_request is skipped when a handler raises; keep the gauge honest
+        if g.pop("_metrics_start", None) is not None:
+            leave()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Prometheus metrics endpoint"""
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+    return app
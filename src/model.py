@@ -5,18 +5,44 @@ from sklearn.metrics import mean_squared_error, r2_score
 from sklearn.model_selection import GridSearchCV, train_test_split
 from sklearn.ensemble import RandomForestRegressor
 import lightgbm as lgb
+import scipy.sparse as sp
 import shap
-from src.features import build_features, get_tfidf, set_tfidf
+from src.distill import FastModel
+from src.features import CITY_CENTER, build_features, get_poi_layer, get_ref_point, get_text_vectorizer, \
+    get_tfidf, set_poi_layer, set_ref_point, set_text_vectorizer, set_tfidf, text_free_columns
+from src.drift import set_reference as set_drift_reference
+from src.market import set_market_stats
+from src.metrics import BATCH_ROWS, lap
+from src.run_report import report_stage
+from src.wire import PayloadError
+from time import perf_counter
 
+# Serving tiers: the full model, and the distilled one when the bundle has it (see src/distill.py)
+MODEL_TIERS = ("full", "fast")
+_BATCH_ROWS = BATCH_ROWS.labels()  # the unlabelled series, kept to skip the lookup per request
 
-def train_lgb(X, y):
+
+def train_lgb(X, y, report=None, feature_names=None):
     """
     Train LightGBM model with GridSearchCV optimization.
     Target: Reduce RMSE to $42,000 or better.
     Includes SHAP explainability and fallback to RandomForest.
+    Pass a ``RunReport`` as ``report`` to record per-stage timings and memory.
+    ``X`` may also be a scipy sparse matrix (see ``build_sparse_features``),
+    with its column names given as ``feature_names``.
     """
-    X = X.copy()
-    X = X.select_dtypes(include=[np.number]).fillna(0)
+    if sp.issparse(X):
+        X = X.tocsr()
+        if feature_names is None:
+            feature_names = [f"Column_{i}" for i in range(X.shape[1])]
+    else:
+        # build_features already returns an all-numeric, NaN-free matrix; only
+        # clean up (and copy) frames that need it
+        if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in X.dtypes):
+            X = X.select_dtypes(include=[np.number])
+        if X.isna().to_numpy().any():
+            X = X.fillna(0)
+        feature_names = X.columns.tolist()
 
     if X.shape[0] < 2:
         raise ValueError(f"Not enough samples to train: n_samples={X.shape[0]}")
@@ -29,58 +55,63 @@ def train_lgb(X, y):
     print(f"Training on {X_train.shape[0]} samples with {X_train.shape[1]} features")
     print(f"Validation on {X_val.shape[0]} samples")
 
-    try:
-        # LightGBM with comprehensive parameter grid
-        model = lgb.LGBMRegressor(
-            objective="regression", 
-            n_jobs=-1,
-            random_state=42,
-            verbose=-1
-        )
+    with report_stage(report, "grid_search", rows=X_train.shape[0], features=X_train.shape[1]) as record:
+        try:
+            # LightGBM with comprehensive parameter grid
+            model = lgb.LGBMRegressor(
+                objective="regression", 
+                n_jobs=-1,
+                random_state=42,
+                verbose=-1
+            )
         
-        # Expanded parameter grid for better optimization
-        param_grid = {
-            "num_leaves": [31, 50, 100],
-            "n_estimators": [200, 500, 1000],
-            "learning_rate": [0.01, 0.05, 0.1],
-            "max_depth": [6, 8, 10],
-            "min_child_samples": [20, 30, 50],
-            "subsample": [0.8, 0.9, 1.0],
-            "colsample_bytree": [0.8, 0.9, 1.0]
-        }
-
-        print("🔍 Starting GridSearchCV optimization...")
-        gs = GridSearchCV(
-            model,
-            param_grid,
-            cv=3,
-            scoring="neg_root_mean_squared_error",
-            n_jobs=-1,
-            verbose=1,
-            error_score="raise",
-        )
-        gs.fit(X_train, y_train)
-        best = gs.best_estimator_
-        best_params = gs.best_params_
-        print(f"✅ LightGBM GridSearch completed. Best params: {best_params}")
+            # Expanded parameter grid for better optimization
+            param_grid = {
+                "num_leaves": [31, 50, 100],
+                "n_estimators": [200, 500, 1000],
+                "learning_rate": [0.01, 0.05, 0.1],
+                "max_depth": [6, 8, 10],
+                "min_child_samples": [20, 30, 50],
+                "subsample": [0.8, 0.9, 1.0],
+                "colsample_bytree": [0.8, 0.9, 1.0]
+            }
 
-    except Exception as e:
-        print(f"⚠️ Warning: LightGBM/GridSearch failed — falling back to RandomForest. Error: {e}")
-        best = RandomForestRegressor(
-            n_estimators=200, 
-            n_jobs=-1, 
-            random_state=42,
-            max_depth=10,
-            min_samples_split=5
-        )
-        best.fit(X_train, y_train)
-        best_params = {"fallback": "RandomForest"}
+            print("🔍 Starting GridSearchCV optimization...")
+            gs = GridSearchCV(
+                model,
+                param_grid,
+                cv=3,
+                scoring="neg_root_mean_squared_error",
+                n_jobs=-1,
+                verbose=1,
+                error_score="raise",
+            )
+            # names are only needed for sparse input; frames carry their own
+            fit_params = {"feature_name": feature_names} if sp.issparse(X_train) else {}
+            gs.fit(X_train, y_train, **fit_params)
+            best = gs.best_estimator_
+            best_params = gs.best_params_
+            print(f"✅ LightGBM GridSearch completed. Best params: {best_params}")
+
+        except Exception as e:
+            print(f"⚠️ Warning: LightGBM/GridSearch failed — falling back to RandomForest. Error: {e}")
+            best = RandomForestRegressor(
+                n_estimators=200, 
+                n_jobs=-1, 
+                random_state=42,
+                max_depth=10,
+                min_samples_split=5
+            )
+            best.fit(X_train, y_train)
+            best_params = {"fallback": "RandomForest"}
+        record["fallback"] = best_params.get("fallback")
 
     # Evaluate model
-    preds = best.predict(X_val)
-    mse = mean_squared_error(y_val, preds)
-    rmse = float(np.sqrt(mse))
-    r2 = float(r2_score(y_val, preds))
+    with report_stage(report, "evaluation", rows=X_val.shape[0], features=X_val.shape[1]):
+        preds = best.predict(X_val)
+        mse = mean_squared_error(y_val, preds)
+        rmse = float(np.sqrt(mse))
+        r2 = float(r2_score(y_val, preds))
 
     print(f"📊 Model Performance:")
     print(f"   RMSE: ${rmse:,.2f}")
@@ -94,41 +125,91 @@ def train_lgb(X, y):
         print(f"⚠️ Target RMSE not achieved (${rmse:,.2f} > ${target_rmse:,})")
 
     # Generate SHAP explanations
-    try:
-        print("🔍 Generating SHAP explanations...")
-        explainer = shap.TreeExplainer(best)
-        shap_values = explainer.shap_values(X_val[:100])  # Limit for performance
+    with report_stage(report, "shap", rows=min(100, X_val.shape[0]), features=X_val.shape[1]):
+        try:
+            print("🔍 Generating SHAP explanations...")
+            explainer = shap.TreeExplainer(best)
+            X_sample = X_val[:100]  # Limit for performance
+            if sp.issparse(X_sample):
+                X_sample = X_sample.toarray()
+            shap_values = explainer.shap_values(X_sample)
         
-        # Calculate feature importance
-        feature_importance = np.abs(shap_values).mean(0)
-        feature_names = X.columns.tolist()
+            # Calculate feature importance
+            feature_importance = np.abs(shap_values).mean(0)
         
-        # Create importance dataframe
-        importance_df = pd.DataFrame({
-            'feature': feature_names,
-            'importance': feature_importance
-        }).sort_values('importance', ascending=False)
+            # Create importance dataframe
+            importance_df = pd.DataFrame({
+                'feature': feature_names,
+                'importance': feature_importance
+            }).sort_values('importance', ascending=False)
         
-        print("📈 Top 10 Most Important Features:")
-        for i, (_, row) in enumerate(importance_df.head(10).iterrows()):
-            print(f"   {i+1:2d}. {row['feature']:<25} {row['importance']:.4f}")
+            print("📈 Top 10 Most Important Features:")
+            for i, (_, row) in enumerate(importance_df.head(10).iterrows()):
+                print(f"   {i+1:2d}. {row['feature']:<25} {row['importance']:.4f}")
             
-    except Exception as e:
-        print(f"⚠️ SHAP analysis failed: {e}")
-        importance_df = None
+        except Exception as e:
+            print(f"⚠️ SHAP analysis failed: {e}")
+            importance_df = None
 
     return best, best_params, rmse, r2, importance_df
 
 
+def train_text_free(X, y, feature_names=None, params=None):
+    """
+    Train the degraded-mode companion model on the basic and geo features of
+    ``X`` only (see ``src.deadline``), with the main model's LightGBM
+    ``params``. Uses the split of ``train_lgb``; returns the model, which
+    scores ``build_features`` frames built without descriptions, and its
+    validation RMSE.
+    """
+    if sp.issparse(X):
+        X = X.tocsr()
+        if feature_names is None:
+            feature_names = [f"Column_{i}" for i in range(X.shape[1])]
+    else:
+        feature_names = X.columns.tolist()
+    kept = text_free_columns(feature_names)
+    position = {name: i for i, name in enumerate(feature_names)}
+    columns = [position[name] for name in kept]
+    X = X[:, columns] if sp.issparse(X) else X[kept]
+
+    X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42)
+    params = {k: v for k, v in (params or {}).items() if k != "fallback"}
+    model = lgb.LGBMRegressor(objective="regression", n_jobs=-1, random_state=42, verbose=-1, **params)
+    fit_params = {"feature_name": kept} if sp.issparse(X_train) else {}
+    model.fit(X_train, y_train, **fit_params)
+    # the raw booster over exactly the text-free columns, in build order
+    fallback = FastModel(model.booster_, kept, range(len(kept)))
+    rmse = float(np.sqrt(mean_squared_error(y_val, fallback.predict(X_val))))
+    print(f"🪶 Text-free fallback model ({len(kept)} features): RMSE ${rmse:,.2f}")
+    return fallback, rmse
+
+
 def predict_from_model(model, input_dict):
     """Make prediction from trained model with feature engineering."""
-    X = pd.DataFrame([input_dict])
-    X = build_features(X, fit_vectorizer=False)
-    X = X.select_dtypes(include=[np.number]).fillna(0)
-    pred = model.predict(X)[0]
+    X = build_features(pd.DataFrame([input_dict]), fit_vectorizer=False)
+    pred = predict_features(model, X)[0]
     return float(pred)
 
 
+def prepare_features(model, df):
+    """
+    Features in the form ``model`` scores them: the engineered frame, or the
+    raw inputs of an exported ONNX pipeline (which engineers features itself).
+    """
+    prepare = getattr(model, "prepare", None)
+    return prepare(df) if prepare is not None else build_features(df)
+
+
+def predict_features(model, X):
+    """Score an already engineered feature matrix; returns an array of predictions."""
+    _BATCH_ROWS.observe(len(X))
+    start = perf_counter()
+    preds = model.predict(X)
+    lap("predict", start)
+    return preds
+
+
 def get_feature_importance(model, X_sample):
     """Get SHAP feature importance for a prediction."""
     try:
@@ -140,19 +221,97 @@ def get_feature_importance(model, X_sample):
         return None
 
 
-def save_model(model, path, importance_df=None):
-    """Save the ML model, TF-IDF vectorizer, and feature importance."""
+def save_model(model, path, importance_df=None, drift_reference=None, fast_model=None, fallback_model=None,
+               market_stats=None):
+    """
+    Save the ML model, TF-IDF vectorizer, and feature importance, plus the
+    training feature sketches for drift monitoring (see ``src.drift``), the
+    distilled fast tier (see ``src.distill``), the text-free fallback
+    (see ``src.deadline``) and the training market statistics (see ``src.market``).
+    """
+    text_vectorizer = get_text_vectorizer()
+    text_vectorizer.pop("n_jobs")  # a property of the machine, not the model
     bundle = {
         "model": model,
-        "tfidf": get_tfidf(),
-        "feature_importance": importance_df
+        # the hashing vectorizer is stateless: its settings are all we need to ship
+        "tfidf": get_tfidf() if text_vectorizer["method"] == "tfidf" else None,
+        "text_vectorizer": text_vectorizer,
+        "ref_point": get_ref_point(),
+        "poi_layer": get_poi_layer(),
+        "feature_importance": importance_df,
+        "drift_reference": drift_reference,
+        "fast_model": fast_model,
+        "fallback_model": fallback_model,
+        "market_stats": market_stats
     }
     joblib.dump(bundle, path)
     print(f"💾 Model saved to: {path}")
 
 
+def load_bundle(path):
+    """
+    Load a saved bundle as a dict without touching the module-level feature
+    settings; pass it to ``build_features(..., bundle=...)``. Keys missing from
+    older bundles are filled with the settings those bundles were trained with.
+    """
+    bundle = joblib.load(path)
+    # bundles saved before text_vectorizer existed always used 50 TF-IDF features
+    bundle.setdefault("text_vectorizer", {"method": "tfidf", "n_features": 50})
+    bundle.setdefault("ref_point", CITY_CENTER)
+    bundle.setdefault("poi_layer", None)
+    bundle.setdefault("drift_reference", None)
+    bundle.setdefault("fast_model", None)
+    bundle.setdefault("fallback_model", None)
+    bundle.setdefault("market_stats", None)
+    return bundle
+
+
 def load_model(path):
     """Load the ML model, TF-IDF vectorizer, and feature importance."""
-    bundle = joblib.load(path)
+    return load_tiers(path)["full"]
+
+
+def load_tiers(path):
+    """
+    Like ``load_model``, but returns ``{tier: model}``: the fast tier and the
+    text-free ``"fallback"`` are included when the bundle has them.
+    """
+    bundle = load_bundle(path)
+    set_text_vectorizer(**bundle["text_vectorizer"])
     set_tfidf(bundle["tfidf"])
-    return bundle["model"]
+    set_ref_point(bundle["ref_point"])
+    set_poi_layer(bundle["poi_layer"])
+    set_drift_reference(bundle["drift_reference"])
+    set_market_stats(bundle["market_stats"])
+    tiers = {"full": bundle["model"]}
+    if bundle["fast_model"] is not None:
+        tiers["fast"] = bundle["fast_model"]
+    if bundle["fallback_model"] is not None:
+        tiers["fallback"] = bundle["fallback_model"]  # degraded mode only, never chosen by ?tier=
+    return tiers
+
+
+def endpoint_tiers(spec):
+    """``"/sweep=fast,/analyze=fast"`` (the ``ENDPOINT_TIERS`` setting) as ``{endpoint: tier}``."""
+    tiers = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        endpoint, _, tier = item.partition("=")
+        if tier not in MODEL_TIERS:
+            raise ValueError(f"Unknown model tier {tier!r} for {endpoint}; choose from {', '.join(MODEL_TIERS)}")
+        tiers[endpoint.strip()] = tier
+    return tiers
+
+
+def select_tier(tiers, requested=None, default="full"):
+    """
+    The model for a request: the ``?tier=`` it asked for, else its endpoint's
+    default. An endpoint defaulting to a tier this bundle lacks gets the full
+    model; asking for one explicitly is a 400.
+    """
+    if requested is None:
+        return tiers.get(default, tiers["full"])
+    if requested not in MODEL_TIERS:
+        raise PayloadError(f"Unknown model tier {requested!r}; choose from {', '.join(MODEL_TIERS)}")
+    if requested not in tiers:
+        raise PayloadError(f"Model tier {requested!r} is not available for this model")
+    return tiers[requested]
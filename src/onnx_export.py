@@ -0,0 +1,430 @@
+"""
+ONNX export of the feature pipeline plus the LightGBM booster.
+
+``export_onnx`` writes one ``.onnx`` file that takes the raw numeric inputs
+(area, bedrooms, bathrooms, year_built, lat, lon) and the precomputed text
+features of a batch and returns predictions. Every numeric transform of
+``src/features.py`` (basic and geospatial, including the geodesic distance,
+via Vincenty's formula in double precision) is expressed as ONNX nodes in
+front of the converted booster. The text stage stays in Python: statistics
+and sentiment from ``features.py``, TF-IDF from the vocabulary and IDF
+weights stored in the file's metadata, so no pickled vectorizer is needed.
+
+``OnnxModel`` runs the file with onnxruntime on CPU and duck-types the
+LightGBM model for ``predict_features``:
+
+    model = load_onnx_model("models/lgb_model.onnx")
+    X = model.prepare(df)
+    preds = model.predict(X)
+"""
+import json
+import math
+import re
+
+import numpy as np
+
+from src.features import _Source, _hash_texts, _text_features, get_ref_point, get_text_vectorizer, get_tfidf
+
+RAW_COLUMNS = ["area", "bedrooms", "bathrooms", "year_built", "lat", "lon"]
+
+# WGS-84, as used by geopy.distance.geodesic
+_WGS84_A = 6378137.0
+_WGS84_F = 1 / 298.257223563
+_VINCENTY_ITERATIONS = 6
+
+ONNX_OPSET = 15
+ONNX_ML_OPSET = 1
+
+
+class _Expr:
+    """An ONNX tensor inside a ``_GraphBuilder``, with numpy-style operators."""
+
+    __slots__ = ("graph", "name")
+
+    def __init__(self, graph, name):
+        self.graph = graph
+        self.name = name
+
+    def _binary(self, op_type, other, reverse=False):
+        other = self.graph.wrap(other)
+        return self.graph.op(op_type, other, self) if reverse else self.graph.op(op_type, self, other)
+
+    def __add__(self, other):
+        return self._binary("Add", other)
+
+    def __radd__(self, other):
+        return self._binary("Add", other, reverse=True)
+
+    def __sub__(self, other):
+        return self._binary("Sub", other)
+
+    def __rsub__(self, other):
+        return self._binary("Sub", other, reverse=True)
+
+    def __mul__(self, other):
+        return self._binary("Mul", other)
+
+    def __rmul__(self, other):
+        return self._binary("Mul", other, reverse=True)
+
+    def __truediv__(self, other):
+        return self._binary("Div", other)
+
+    def __rtruediv__(self, other):
+        return self._binary("Div", other, reverse=True)
+
+    def __neg__(self):
+        return self.graph.op("Neg", self)
+
+    def __le__(self, other):
+        return self._binary("LessOrEqual", other)
+
+    def __lt__(self, other):
+        return self._binary("Less", other)
+
+    def __ge__(self, other):
+        return self._binary("GreaterOrEqual", other)
+
+    def __gt__(self, other):
+        return self._binary("Greater", other)
+
+    def eq(self, other):
+        return self._binary("Equal", other)
+
+
+class _GraphBuilder:
+    """Collects nodes and constants while feature formulas are written against ``_Expr``."""
+
+    def __init__(self):
+        self.nodes = []
+        self.initializers = []
+        self._constants = {}
+        self._count = 0
+
+    def _name(self, hint):
+        self._count += 1
+        return f"{hint}_{self._count}"
+
+    def constant(self, value, dtype=np.float64):
+        value = np.asarray(value, dtype=dtype)
+        key = (value.dtype.str, value.shape, value.tobytes())
+        if key not in self._constants:
+            from onnx import numpy_helper
+            name = self._name("const")
+            self.initializers.append(numpy_helper.from_array(value, name))
+            self._constants[key] = _Expr(self, name)
+        return self._constants[key]
+
+    def wrap(self, value):
+        return value if isinstance(value, _Expr) else self.constant(value)
+
+    def op(self, op_type, *inputs, n_outputs=1, domain=None, **attrs):
+        from onnx import helper
+        outputs = [self._name(op_type.lower()) for _ in range(n_outputs)]
+        self.nodes.append(helper.make_node(op_type, [i.name for i in inputs], outputs, domain=domain, **attrs))
+        exprs = [_Expr(self, name) for name in outputs]
+        return exprs[0] if n_outputs == 1 else exprs
+
+    # numpy-like helpers
+    def where(self, cond, a, b):
+        return self.op("Where", cond, self.wrap(a), self.wrap(b))
+
+    def isnan(self, x):
+        return self.op("IsNaN", x)
+
+    def flag(self, cond):
+        return self.op("Cast", cond, to=11)  # bool -> double
+
+    def sqrt(self, x):
+        return self.op("Sqrt", x)
+
+    def sin(self, x):
+        return self.op("Sin", x)
+
+    def cos(self, x):
+        return self.op("Cos", x)
+
+    def square(self, x):
+        return x * x
+
+    def atan2(self, y, x):
+        """
+        atan2 for y >= 0 in double precision. onnxruntime has no double Atan, so
+        take a float32 estimate and refine it with Newton steps on
+        x*sin(t) - y*cos(t) = 0.
+        """
+        ratio = self.op("Cast", x / y, to=1)  # double -> float
+        theta = math.pi / 2 - self.op("Cast", self.op("Atan", ratio), to=11)
+        for _ in range(2):
+            sin_t, cos_t = self.sin(theta), self.cos(theta)
+            theta = theta - (x * sin_t - y * cos_t) / (x * cos_t + y * sin_t)
+        return theta
+
+    def column_reduce(self, op_type, x):
+        """Reduce over rows keeping a [1, 1] result, so it broadcasts against the column."""
+        if op_type == "ReduceSum":
+            return self.op(op_type, x, self.constant([0], dtype=np.int64), keepdims=1)
+        return self.op(op_type, x, axes=[0], keepdims=1)
+
+
+def _vincenty_km(g, lat, lon, ref_point):
+    """Ellipsoidal distance in km (Vincenty inverse, fixed iterations); NaN for invalid latitudes."""
+    a, f = _WGS84_A, _WGS84_F
+    b = (1 - f) * a
+    deg = math.pi / 180
+
+    # reduced latitudes, written without tan() so the poles stay finite
+    sin_phi, cos_phi = g.sin(lat * deg), g.cos(lat * deg)
+    norm = g.sqrt(g.square(cos_phi) + (1 - f) ** 2 * g.square(sin_phi))
+    sin_u1, cos_u1 = (1 - f) * sin_phi / norm, cos_phi / norm
+    sin_phi2, cos_phi2 = math.sin(ref_point[0] * deg), math.cos(ref_point[0] * deg)
+    norm2 = math.hypot(cos_phi2, (1 - f) * sin_phi2)
+    sin_u2, cos_u2 = (1 - f) * sin_phi2 / norm2, cos_phi2 / norm2
+
+    big_l = (ref_point[1] * deg) - lon * deg
+    lam = big_l
+    for _ in range(_VINCENTY_ITERATIONS):
+        sin_lam, cos_lam = g.sin(lam), g.cos(lam)
+        sin_sigma = g.sqrt(g.square(cos_u2 * sin_lam) + g.square(cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam))
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = g.atan2(sin_sigma, cos_sigma)
+        coincident = sin_sigma.eq(0)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / g.where(coincident, 1.0, sin_sigma)
+        cos2_alpha = 1 - g.square(sin_alpha)
+        # equatorial lines have cos2_alpha == 0
+        cos_2sigma_m = g.where(cos2_alpha.eq(0), 0.0,
+                               cos_sigma - 2 * sin_u1 * sin_u2 / g.where(cos2_alpha.eq(0), 1.0, cos2_alpha))
+        c = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+        lam = big_l + (1 - c) * f * sin_alpha * (
+            sigma + c * sin_sigma * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * g.square(cos_2sigma_m))))
+
+    u2 = cos2_alpha * (a * a - b * b) / (b * b)
+    big_a = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    big_b = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = big_b * sin_sigma * (cos_2sigma_m + big_b / 4 * (
+        cos_sigma * (-1 + 2 * g.square(cos_2sigma_m))
+        - big_b / 6 * cos_2sigma_m * (-3 + 4 * g.square(sin_sigma)) * (-3 + 4 * g.square(cos_2sigma_m))))
+    meters = g.where(coincident, 0.0, b * big_a * (sigma - delta_sigma))
+
+    # geopy rejects latitudes outside [-90, 90] (and non-finite input), which build_features maps to NaN
+    valid = g.op("LessOrEqual", g.op("Abs", lat), g.constant(90.0))
+    return g.where(valid, meters / 1000, np.nan)
+
+
+def _numeric_features(g, cols, ref_point):
+    """
+    ``{name: expr}`` for the passthrough and engineered numeric features,
+    mirroring ``_basic_features`` and ``_geo_features`` (before NaN -> 0).
+    """
+    area, bedrooms, bathrooms, year_built, lat, lon = (cols[c] for c in RAW_COLUMNS)
+    out = dict(cols)
+
+    property_age = 2025 - g.where(g.isnan(year_built), 2025.0, year_built)
+    out["property_age"] = property_age
+    out["is_new_property"] = g.flag(property_age <= 5)
+    out["is_old_property"] = g.flag(property_age >= 20)
+
+    out["area_sqrt"] = g.sqrt(area)
+    out["area_log"] = g.op("Log", 1 + area)
+    out["is_large_property"] = g.flag(area >= 1500)
+    out["is_small_property"] = g.flag(area <= 800)
+
+    safe_bedrooms = g.where(bedrooms.eq(0), 1.0, bedrooms)
+    out["area_per_bedroom"] = area / safe_bedrooms
+    out["bedroom_density"] = bedrooms / area * 1000
+    out["bathroom_bedroom_ratio"] = bathrooms / safe_bedrooms
+    out["total_rooms"] = bedrooms + bathrooms
+
+    out["is_studio"] = g.flag(bedrooms.eq(1))
+    out["is_family_home"] = g.flag(bedrooms >= 3)
+    out["is_luxury"] = g.flag(bedrooms >= 4)
+
+    # batch-level statistics behave like their numpy counterparts in _geo_features
+    dist = _vincenty_km(g, lat, lon, ref_point)
+    missing = g.isnan(dist)
+    total = g.column_reduce("ReduceSum", g.where(missing, 0.0, dist))
+    count = g.column_reduce("ReduceSum", g.flag(g.op("Not", missing)))
+    dist = g.where(missing, total / count, dist)
+    out["dist_to_cbd_km"] = dist
+    out["is_central"] = g.flag(dist <= 5)
+    out["is_suburban"] = g.flag(dist > 10)
+
+    for name, values in (("lat_normalized", lat), ("lon_normalized", lon)):
+        lo = g.column_reduce("ReduceMin", g.where(g.isnan(values), np.inf, values))
+        hi = g.column_reduce("ReduceMax", g.where(g.isnan(values), -np.inf, values))
+        out[name] = (values - lo) / (hi - lo)
+
+    out["dist_to_cbd_squared"] = dist * dist
+    return out
+
+
+def _text_settings():
+    """Text stage parameters stored with the export, from the current vectorizer settings."""
+    settings = get_text_vectorizer()
+    settings.pop("n_jobs")
+    if settings["method"] != "tfidf":
+        return settings
+
+    tfidf = get_tfidf()
+    if tfidf is None:
+        raise ValueError("No fitted TF-IDF vectorizer; load the model bundle first")
+    defaults = {"lowercase": True, "token_pattern": r"(?u)\b\w\w+\b", "ngram_range": (1, 1), "analyzer": "word",
+                "norm": "l2", "use_idf": True, "sublinear_tf": False, "strip_accents": None,
+                "preprocessor": None, "tokenizer": None}
+    params = tfidf.get_params()
+    changed = [k for k, v in defaults.items() if params.get(k) != v]
+    if changed:
+        raise ValueError(f"TF-IDF settings {changed} are not supported by the ONNX text stage")
+    vocabulary = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+    return {**settings, "vocabulary": vocabulary, "idf": tfidf.idf_.tolist()}
+
+
+def export_onnx(model, path, ref_point=None):
+    """
+    Write the numeric feature transforms and ``model`` (a fitted LightGBM
+    regressor, as returned by ``load_model``) to ``path`` as one ONNX graph.
+    ``ref_point`` defaults to the loaded bundle's.
+    """
+    import lightgbm as lgb
+    import onnx
+    from onnx import TensorProto, helper
+    from onnxmltools.convert import convert_lightgbm
+    from onnxmltools.convert.common.data_types import FloatTensorType
+
+    if not isinstance(model, lgb.LGBMModel):
+        raise TypeError(f"Only LightGBM models can be exported, got {type(model).__name__}")
+
+    feature_names = list(model.feature_name_)
+    ref_point = tuple(ref_point) if ref_point is not None else get_ref_point()
+    g = _GraphBuilder()
+    inputs = _Expr(g, "inputs")  # [N, raw numeric columns + text features], double
+
+    # numeric block: every numeric feature the model uses, in model order
+    cols = dict(zip(RAW_COLUMNS, g.op("Split", g.op("Slice", inputs, g.constant([0], np.int64),
+                                                    g.constant([len(RAW_COLUMNS)], np.int64),
+                                                    g.constant([1], np.int64)),
+                                      axis=1, n_outputs=len(RAW_COLUMNS))))
+    numeric = _numeric_features(g, cols, ref_point)
+    numeric_names = [n for n in feature_names if n in numeric]
+    text_names = [n for n in feature_names if n not in numeric]
+    known_text = [name for name, _ in _text_features(_Source(_empty_frame()))]
+    unknown = [n for n in text_names if n not in known_text and not re.fullmatch(r"(tfidf|hash)_\d+", n)]
+    if unknown:
+        raise ValueError(f"Cannot express features {unknown} in the ONNX graph")
+
+    block = g.op("Concat", *(numeric[n] for n in numeric_names), axis=1)
+    block = g.op("Cast", g.where(g.isnan(block), 0.0, block), to=1)  # NaN -> 0, then float32 like build_features
+    parts = [block]
+    if text_names:
+        text = g.op("Slice", inputs, g.constant([len(RAW_COLUMNS)], np.int64),
+                    g.constant([len(RAW_COLUMNS) + len(text_names)], np.int64), g.constant([1], np.int64))
+        parts.append(g.op("Cast", text, to=1))
+    order = [(numeric_names + text_names).index(n) for n in feature_names]
+    features = g.op("Gather", g.op("Concat", *parts, axis=1), g.constant(order, np.int64), axis=1)
+    g.nodes.append(helper.make_node("Identity", [features.name], ["input"]))
+
+    booster = convert_lightgbm(model, initial_types=[("input", FloatTensorType([None, len(feature_names)]))],
+                               target_opset=ONNX_OPSET)
+    graph = helper.make_graph(
+        g.nodes + list(booster.graph.node),
+        "house_price_pipeline",
+        [helper.make_tensor_value_info("inputs", TensorProto.DOUBLE, [None, len(RAW_COLUMNS) + len(text_names)])],
+        list(booster.graph.output),
+        initializer=g.initializers + list(booster.graph.initializer),
+    )
+    onnx_model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", ONNX_OPSET),
+                                                         helper.make_opsetid("ai.onnx.ml", ONNX_ML_OPSET)],
+                                   ir_version=8, producer_name="house-price-prediction")
+    helper.set_model_props(onnx_model, {
+        "raw_columns": json.dumps(RAW_COLUMNS),
+        "text_columns": json.dumps(text_names),
+        "text_vectorizer": json.dumps(_text_settings() if text_names else None),
+        "feature_names": json.dumps(feature_names),
+        "ref_point": json.dumps(list(ref_point)),
+    })
+    onnx.checker.check_model(onnx_model)
+    onnx.save(onnx_model, path)
+    print(f"💾 ONNX model saved to: {path}")
+    return path
+
+
+def _empty_frame():
+    import pandas as pd
+    return pd.DataFrame({"description": pd.Series([], dtype=object)})
+
+
+_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def _tfidf_rows(texts, vocabulary, idf):
+    """TfidfVectorizer.transform with default settings, from a stored vocabulary and IDF weights."""
+    out = np.zeros((len(texts), len(idf)))
+    for i, text in enumerate(texts):
+        for token in _TOKEN.findall(text.lower()):
+            j = vocabulary.get(token)
+            if j is not None:
+                out[i, j] += 1
+    out *= idf
+    norms = np.sqrt(np.einsum("ij,ij->i", out, out))[:, None]
+    return np.divide(out, norms, out=out, where=norms > 0)
+
+
+class OnnxModel:
+    """An exported pipeline running on onnxruntime (CPU)."""
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        self.path = path
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        meta = {k: json.loads(v) for k, v in self.session.get_modelmeta().custom_metadata_map.items()}
+        self.raw_columns = meta["raw_columns"]
+        self.text_columns = meta["text_columns"]
+        self.feature_name_ = meta["feature_names"]
+        self.text_vectorizer = meta["text_vectorizer"]
+        if self.text_vectorizer and self.text_vectorizer["method"] == "tfidf":
+            self._vocabulary = {term: j for j, term in enumerate(self.text_vectorizer["vocabulary"])}
+            self._idf = np.asarray(self.text_vectorizer["idf"])
+        self._output = self.session.get_outputs()[0].name
+
+    def _text_block(self, df):
+        """Text features in ``text_columns`` order (zeros without a description column)."""
+        block = np.zeros((len(df), len(self.text_columns)))
+        if not self.text_columns or "description" not in df.columns:
+            return block
+        src = _Source(df)
+        position = {name: j for j, name in enumerate(self.text_columns)}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name, values in _text_features(src):
+                if name in position:
+                    block[:, position[name]] = values
+
+        texts = src.texts("description")
+        if self.text_vectorizer["method"] == "tfidf":
+            vectors, prefix = _tfidf_rows(texts, self._vocabulary, self._idf), "tfidf_"
+        else:
+            vectors, prefix = _hash_texts(texts, self.text_vectorizer["n_features"]).toarray(), "hash_"
+        for j in range(vectors.shape[1]):
+            k = position.get(f"{prefix}{j}")
+            if k is not None:
+                block[:, k] = vectors[:, j]
+        return block
+
+    def prepare(self, df):
+        """Graph input for a frame of raw listings: numeric columns, then text features."""
+        src = _Source(df)
+        numeric = [src[c] if c in src else np.full(len(df), np.nan) for c in self.raw_columns]
+        return np.hstack([np.column_stack(numeric) if numeric else np.empty((len(df), 0)),
+                          self._text_block(df)])
+
+    def predict(self, X):
+        """Predictions (float64) for ``prepare`` output."""
+        return self.session.run([self._output], {"inputs": X})[0].ravel().astype(np.float64)
+
+    def predict_frame(self, df):
+        return self.predict(self.prepare(df))
+
+
+def load_onnx_model(path):
+    """Load an exported pipeline for inference."""
+    return OnnxModel(path)
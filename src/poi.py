@@ -0,0 +1,143 @@
+"""
+Points of interest (metro stations, schools, hospitals, malls) for the geo features.
+
+A POI file is a CSV of ``category, name, lat, lon`` rows. ``data/pois.csv``
+is a small sample for Bangalore with approximate coordinates; for real
+training, use an export of OpenStreetMap or the city's GIS layer.
+``load_pois`` indexes each category once in a haversine ``BallTree``.
+For all rows of a frame at once, ``PoiLayer.features`` yields:
+
+- ``dist_<category>_km``: distance to the nearest POI of that category;
+- ``<category>_within_<radius>km``: POIs of that category within ``radius_km``.
+
+Small layers and small batches skip the trees: a numpy broadcast against
+every POI is cheaper than a tree query there. Both paths measure haversine
+distance on a sphere of the Earth's mean radius. That is within about
+0.5% of the geodesic used for ``dist_to_cbd_km``. The layer and its trees
+are pickled into the model bundle, so serving needs no POI file.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+# Brute force beats the trees for layers up to this many points (about 30 ns per
+# row-POI pair vs ~5 µs per row and category), and for queries of few pairs
+BRUTE_FORCE_POINTS = 128
+BRUTE_FORCE_PAIRS = 30_000
+BRUTE_FORCE_CHUNK_PAIRS = 1_000_000  # bounds the distance matrix held at once
+
+
+def _category_slug(category):
+    return re.sub(r"[^0-9a-z]+", "_", str(category).strip().lower()).strip("_")
+
+
+def _haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between radian coordinates (broadcasting)."""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class PoiLayer:
+    """POIs by category, with a haversine BallTree per category."""
+
+    def __init__(self, pois, radius_km=1.0):
+        pois = pois.assign(category=pois["category"].map(_category_slug))
+        pois = pois.dropna(subset=["lat", "lon"]).sort_values("category", kind="stable")
+        if pois.empty:
+            raise ValueError("The POI layer has no points with coordinates")
+        self.radius_km = float(radius_km)
+        self.categories = pd.unique(pois["category"]).tolist()
+        self.names = pois["name"].astype(str).tolist() if "name" in pois else [""] * len(pois)
+        points = np.radians(pois[["lat", "lon"]].to_numpy(dtype=np.float64))
+        categories = pois["category"].to_numpy()
+        # points grouped by category: category i is points[starts[i]:starts[i + 1]]
+        self.points = points
+        self.starts = np.append(np.searchsorted(categories, self.categories), len(categories))
+        self.trees = {c: BallTree(points[self.starts[i]:self.starts[i + 1]], metric="haversine")
+                      for i, c in enumerate(self.categories)}
+
+    def __len__(self):
+        return len(self.points)
+
+    def feature_names(self):
+        radius = f"{self.radius_km:g}".replace(".", "_")
+        return [name for c in self.categories for name in (f"dist_{c}_km", f"{c}_within_{radius}km")]
+
+    def _brute_force(self, lat, lon):
+        nearest = np.empty((len(lat), len(self.categories)))
+        within = np.empty((len(lat), len(self.categories)), dtype=np.int64)
+        starts = self.starts[:-1]
+        step = max(1, BRUTE_FORCE_CHUNK_PAIRS // len(self.points))
+        for i in range(0, len(lat), step):
+            rows = slice(i, i + step)
+            dist = _haversine_km(lat[rows, None], lon[rows, None], self.points[:, 0], self.points[:, 1])
+            nearest[rows] = np.minimum.reduceat(dist, starts, axis=1)
+            within[rows] = np.add.reduceat((dist <= self.radius_km).astype(np.int64), starts, axis=1)
+        return nearest, within
+
+    def _trees(self, lat, lon):
+        X = np.column_stack([lat, lon])
+        nearest = np.empty((len(X), len(self.categories)))
+        within = np.empty((len(X), len(self.categories)), dtype=np.int64)
+        for j, c in enumerate(self.categories):
+            tree = self.trees[c]
+            nearest[:, j] = tree.query(X, k=1, return_distance=True)[0][:, 0] * EARTH_RADIUS_KM
+            within[:, j] = tree.query_radius(X, self.radius_km / EARTH_RADIUS_KM, count_only=True)
+        return nearest, within
+
+    def query(self, lat, lon):
+        """
+        ``(nearest km, counts within radius)``, each shaped ``(rows, categories)``,
+        for degree coordinates; rows with invalid coordinates are NaN.
+        """
+        lat, lon = np.radians(np.asarray(lat, dtype=np.float64)), np.radians(np.asarray(lon, dtype=np.float64))
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        nearest = np.full((len(lat), len(self.categories)), np.nan)
+        within = np.full((len(lat), len(self.categories)), np.nan)
+        if valid.any():
+            lat_v, lon_v = (lat, lon) if valid.all() else (lat[valid], lon[valid])
+            brute = len(self.points) <= BRUTE_FORCE_POINTS or len(lat_v) * len(self.points) <= BRUTE_FORCE_PAIRS
+            near_v, within_v = self._brute_force(lat_v, lon_v) if brute else self._trees(lat_v, lon_v)
+            nearest[valid], within[valid] = near_v, within_v
+        return nearest, within
+
+    def features(self, lat, lon):
+        """Yield ``(name, values)`` of the POI features; missing distances take the column mean."""
+        nearest, within = self.query(lat, lon)
+        names = iter(self.feature_names())
+        for j in range(len(self.categories)):
+            dist = nearest[:, j]
+            missing = np.isnan(dist)
+            if missing.any() and not missing.all():
+                dist[missing] = dist[~missing].mean()
+            yield next(names), dist
+            yield next(names), within[:, j]
+
+    def nearby(self, lat, lon):
+        """Nearest POI per category for one location: ``{category: {"name", "distance_km", "within_radius"}}``."""
+        lat_r, lon_r = np.radians(float(lat)), np.radians(float(lon))
+        dist = _haversine_km(lat_r, lon_r, self.points[:, 0], self.points[:, 1])
+        result = {}
+        for i, c in enumerate(self.categories):
+            block = dist[self.starts[i]:self.starts[i + 1]]
+            k = int(np.argmin(block))
+            result[c] = {
+                "name": self.names[self.starts[i] + k],
+                "distance_km": round(float(block[k]), 3),
+                "within_radius": int((block <= self.radius_km).sum()),
+            }
+        return result
+
+
+def load_pois(path, radius_km=1.0):
+    """Read a ``category, name, lat, lon`` CSV into an indexed ``PoiLayer``."""
+    pois = pd.read_csv(path)
+    missing = {"category", "lat", "lon"} - set(pois.columns)
+    if missing:
+        raise ValueError(f"POI file {path} is missing columns: {', '.join(sorted(missing))}")
+    layer = PoiLayer(pois, radius_km=radius_km)
+    print(f"📍 Loaded {len(layer)} POIs in {len(layer.categories)} categories from {path}")
+    return layer
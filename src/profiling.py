@@ -0,0 +1,153 @@
+"""
+Opt-in per-request profiling for the Flask apps.
+
+Two switches, both off by default:
+
+* ``PROFILE_ADMIN_TOKEN``: a request carrying ``X-Profile: 1`` and a matching
+  ``X-Profile-Token`` header runs under cProfile. The stage and function-level
+  breakdown is added to the JSON response under ``"profile"`` and saved to
+  ``PROFILE_DIR``.
+* ``PROFILE_SAMPLE_RATE``: profile this fraction (0-1) of all requests into
+  ``PROFILE_DIR``, keeping the newest ``PROFILE_MAX_FILES`` profiles.
+
+Settings are read from ``app.config`` first, then the environment. When neither
+switch is set ``init_app`` registers nothing, so there is no per-request cost.
+Saved ``.prof`` files load with ``pstats`` or snakeviz.
+"""
+import cProfile
+import glob
+import hmac
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+
+# Stage name -> (source file suffix(es), function name) whose cumulative time is the stage time,
+# or a list of such pairs when different endpoints parse or serialize differently
+STAGE_FUNCTIONS = {
+    "parse": [(("request.py", "wrappers.py"), "get_json"), ("wire.py", "read_frame")],
+    "features": ("features.py", "build_features"),
+    "features.basic": ("features.py", "_basic_features"),
+    "features.geo": ("features.py", "_geo_features"),
+    "features.nlp": ("features.py", "_text_features"),
+    "features.tfidf": ("features.py", "_text_matrix"),
+    "predict": ("model.py", "predict_features"),
+    "serialize": [("__init__.py", "jsonify"), ("wire.py", "encode_predictions")],
+}
+
+# cProfile can only run one profiler per process on newer Pythons; never stack them
+_active = threading.Lock()
+
+
+def _setting(app, name, default):
+    value = app.config.get(name, os.environ.get(name))
+    return default if value in (None, "") else value
+
+
+def summarize(profiler, top=25):
+    """Return ``{"total_ms", "stages", "functions"}`` for a finished profiler."""
+    stats = pstats.Stats(profiler)
+    rows = stats.stats  # (file, line, func) -> (cc, nc, tottime, cumtime, callers)
+
+    stages = {}
+    for name, targets in STAGE_FUNCTIONS.items():
+        targets = targets if isinstance(targets, list) else [targets]
+        times = [ct for (file, _, fn), (_, _, _, ct, _) in rows.items()
+                 if any(fn == func and file.endswith(suffix) for suffix, func in targets)]
+        if times:
+            stages[name] = round(max(times) * 1000, 3)
+
+    functions = []
+    for (file, line, func), (cc, nc, tt, ct, _) in sorted(rows.items(), key=lambda kv: kv[1][3], reverse=True)[:top]:
+        functions.append({
+            "function": f"{os.path.basename(file)}:{line}({func})",
+            "calls": nc,
+            "tottime_ms": round(tt * 1000, 3),
+            "cumtime_ms": round(ct * 1000, 3),
+        })
+
+    return {
+        "total_ms": round(stats.total_tt * 1000, 3),
+        "stages": stages,
+        "functions": functions,
+    }
+
+
+def save_profile(profiler, report, directory, max_files, label):
+    """Write ``<id>.prof`` and ``<id>.json``, then drop the oldest beyond ``max_files``."""
+    os.makedirs(directory, exist_ok=True)
+    profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{label}-{uuid.uuid4().hex[:8]}"
+    base = os.path.join(directory, profile_id)
+    profiler.dump_stats(base + ".prof")
+    with open(base + ".json", "w") as f:
+        json.dump(report, f, indent=2)
+
+    profiles = sorted(glob.glob(os.path.join(directory, "*.prof")), key=os.path.getmtime)
+    for old in profiles[:max(0, len(profiles) - max_files)]:
+        for path in (old, old[:-len(".prof")] + ".json"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return profile_id
+
+
+def init_app(app):
+    """Register the profiling hooks on a Flask app if profiling is configured."""
+    token = _setting(app, "PROFILE_ADMIN_TOKEN", None)
+    sample_rate = float(_setting(app, "PROFILE_SAMPLE_RATE", 0))
+    if not token and sample_rate <= 0:
+        return app
+
+    from flask import g, request
+
+    directory = _setting(app, "PROFILE_DIR", "profiles")
+    max_files = int(_setting(app, "PROFILE_MAX_FILES", 100))
+
+    @app.before_request
+    def _start_profiler():
+        requested = bool(
+            token
+            and request.headers.get("X-Profile")
+            and hmac.compare_digest(request.headers.get("X-Profile-Token", ""), token)
+        )
+        if not requested and not (sample_rate > 0 and random.random() < sample_rate):
+            return
+        if not _active.acquire(blocking=False):
+            return
+        g._profile_inline = requested
+        g._profiler = cProfile.Profile()
+        g._profiler.enable()
+
+    @app.after_request
+    def _finish_profiler(response):
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return response
+        profiler.disable()
+        _active.release()
+
+        report = summarize(profiler)
+        label = (request.endpoint or "unmatched").replace("/", "_")
+        report["endpoint"] = request.path
+        report["profile_id"] = save_profile(profiler, report, directory, max_files, label)
+        response.headers["X-Profile-Id"] = report["profile_id"]
+
+        if g.pop("_profile_inline", False) and response.is_json:
+            body = response.get_json()
+            if isinstance(body, dict):
+                body["profile"] = report
+                response.set_data(json.dumps(body))
+        return response
+
+    @app.teardown_request
+    def _release_profiler(exc):
+        profiler = g.pop("_profiler", None)
+        if profiler is not None:
+            profiler.disable()
+            _active.release()
+
+    return app
@@ -0,0 +1,220 @@
+"""
+Per-region model registry for the serving apps.
+
+A registry config lists one model bundle per region with the lat/lon box it
+covers:
+
+    {
+      "max_models": 4,
+      "memory_budget_mb": 1024,
+      "default_region": "bangalore",
+      "regions": [
+        {"name": "bangalore", "model": "models/bangalore.pkl", "bounds": [12.7, 77.3, 13.3, 77.9]},
+        {"name": "mumbai", "model": "models/mumbai.pkl", "bounds": [18.8, 72.7, 19.4, 73.1]}
+      ]
+    }
+
+``bounds`` are ``[min_lat, min_lon, max_lat, max_lon]``; the first matching
+region wins and listings outside every box go to ``default_region`` (if set).
+Bundles are loaded on first use and features are built with each bundle's own
+vectorizer and reference point. At most ``max_models`` stay resident, and
+their on-disk size (a proxy for their memory) stays within
+``memory_budget_mb``; the least recently used bundle is evicted first.
+``.onnx`` paths are served with onnxruntime.
+
+``RegionRegistry`` duck-types a model for ``prepare_features`` /
+``predict_features``, so the apps use it like a single model.
+"""
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from src.features import build_features
+from src.metrics import REGISTRY, Counter, Gauge
+from src.request_log import model_version
+from src.wire import PayloadError
+
+MODEL_LOADS = REGISTRY.register(Counter(
+    "house_price_model_loads_total", "Region model bundles loaded from disk", ("region",)))
+MODEL_HITS = REGISTRY.register(Counter(
+    "house_price_model_cache_hits_total", "Region model lookups served by a resident bundle", ("region",)))
+MODEL_EVICTIONS = REGISTRY.register(Counter(
+    "house_price_model_evictions_total", "Region model bundles evicted from memory", ("region",)))
+MODELS_RESIDENT = REGISTRY.register(Gauge(
+    "house_price_models_resident", "Region model bundles currently in memory"))
+
+
+class _BundleScorer:
+    """A loaded pickle bundle: features built with its own vectorizer and reference point."""
+
+    def __init__(self, path):
+        from src.model import load_bundle
+
+        self.bundle = load_bundle(path)
+        self.model = self.bundle["model"]
+
+    def prepare(self, df):
+        return build_features(df, bundle=self.bundle)
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+def _load_scorer(path):
+    if path.endswith(".onnx"):
+        from src.onnx_export import load_onnx_model
+        return load_onnx_model(path)
+    return _BundleScorer(path)
+
+
+class RoutedBatch:
+    """Rows of one request grouped by region, each with features from that region's bundle."""
+
+    def __init__(self, n_rows, groups, regions):
+        self.n_rows = n_rows
+        self.groups = groups      # [(region, row positions, scorer, X)]
+        self.regions = regions    # region name per row
+
+    def __len__(self):
+        return self.n_rows
+
+
+class RegionRegistry:
+    """Routes listings to region models; loads lazily and keeps an LRU of resident bundles."""
+
+    def __init__(self, regions, max_models=4, memory_budget_mb=None, default_region=None, loader=_load_scorer):
+        self.regions = list(regions)
+        self.max_models = max_models
+        self.memory_budget_mb = memory_budget_mb
+        self.default_region = default_region
+        self._by_name = {r["name"]: r for r in self.regions}
+        if default_region is not None and default_region not in self._by_name:
+            raise ValueError(f"default_region {default_region!r} is not a configured region")
+        self._loader = loader
+        self._resident = OrderedDict()  # name -> (scorer, size_mb), least recently used first
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._versions = {}  # name -> model version of its bundle file, hashed on first load
+        self.loads = self.hits = self.evictions = 0
+
+    def route(self, df):
+        """Region name per row, by the first region whose bounds contain (lat, lon)."""
+        n_rows = len(df)
+        lat = pd.to_numeric(df["lat"], errors="coerce").to_numpy(dtype=float) if "lat" in df else np.full(n_rows, np.nan)
+        lon = pd.to_numeric(df["lon"], errors="coerce").to_numpy(dtype=float) if "lon" in df else np.full(n_rows, np.nan)
+        index = np.full(n_rows, -1)
+        for i, region in enumerate(self.regions):
+            min_lat, min_lon, max_lat, max_lon = region["bounds"]
+            inside = (index < 0) & (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+            index[inside] = i
+
+        names = np.array([r["name"] for r in self.regions] + [self.default_region], dtype=object)
+        routed = names[index]  # -1 picks the default
+        if (routed == None).any():  # noqa: E711 - elementwise on an object array
+            first = int(np.flatnonzero(routed == None)[0])  # noqa: E711
+            raise PayloadError(f"No regional model covers lat={lat[first]}, lon={lon[first]}", status=422)
+        return routed
+
+    def get(self, name):
+        """The scorer for ``name``, loading it on first use."""
+        with self._lock:
+            entry = self._resident.get(name)
+            if entry is not None:
+                self._resident.move_to_end(name)
+                self.hits += 1
+                MODEL_HITS.inc(name)
+                return entry[0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # one loader per region; other regions keep serving meanwhile
+        with load_lock:
+            with self._lock:
+                entry = self._resident.get(name)
+                if entry is not None:
+                    self._resident.move_to_end(name)
+                    self.hits += 1
+                    MODEL_HITS.inc(name)
+                    return entry[0]
+            path = self._by_name[name]["model"]
+            scorer = self._loader(path)
+            size_mb = os.path.getsize(path) / 1024 ** 2
+            if name not in self._versions:
+                self._versions[name] = model_version(path)
+
+            with self._lock:
+                self._resident[name] = (scorer, size_mb)
+                self.loads += 1
+                MODEL_LOADS.inc(name)
+                self._evict(keep=name)
+                MODELS_RESIDENT.set(len(self._resident))
+            return scorer
+
+    def _evict(self, keep):
+        """Drop least recently used bundles until within max_models and the memory budget."""
+        def over():
+            if len(self._resident) > self.max_models:
+                return True
+            budget = self.memory_budget_mb
+            return budget is not None and sum(size for _, size in self._resident.values()) > budget
+
+        while len(self._resident) > 1 and over():
+            name = next(iter(self._resident))
+            if name == keep:
+                break
+            del self._resident[name]
+            self.evictions += 1
+            MODEL_EVICTIONS.inc(name)
+
+    def prepare(self, df):
+        """Route rows and build each region's features with its own bundle."""
+        regions = self.route(df)
+        groups = []
+        for name in pd.unique(regions):
+            rows = np.flatnonzero(regions == name)
+            scorer = self.get(name)
+            part = df if len(rows) == len(df) else df.iloc[rows]
+            groups.append((name, rows, scorer, scorer.prepare(part)))
+        return RoutedBatch(len(df), groups, regions)
+
+    def predict(self, batch):
+        preds = np.empty(batch.n_rows)
+        for _, rows, scorer, X in batch.groups:
+            preds[rows] = scorer.predict(X)
+        return preds
+
+    def model_versions(self, batch):
+        """Model version of the region bundle that scored each row of ``batch``, for the request log."""
+        versions = np.empty(batch.n_rows, dtype=object)
+        for name, rows, _, _ in batch.groups:
+            versions[rows] = self._versions.get(name)
+        return versions
+
+    def stats(self):
+        with self._lock:
+            resident = [{"region": name, "size_mb": round(size, 2)} for name, (_, size) in self._resident.items()]
+            return {
+                "regions": len(self.regions),
+                "resident": resident,  # least recently used first
+                "resident_mb": round(sum(r["size_mb"] for r in resident), 2),
+                "max_models": self.max_models,
+                "memory_budget_mb": self.memory_budget_mb,
+                "loads": self.loads,
+                "hits": self.hits,
+                "evictions": self.evictions,
+            }
+
+
+def load_registry(path):
+    """Build a ``RegionRegistry`` from a JSON config (model paths relative to the working directory)."""
+    with open(path) as f:
+        config = json.load(f)
+    return RegionRegistry(
+        config["regions"],
+        max_models=config.get("max_models", 4),
+        memory_budget_mb=config.get("memory_budget_mb"),
+        default_region=config.get("default_region"),
+    )
@@ -0,0 +1,248 @@
+"""
+Columnar log of served requests and predictions.
+
+``RequestLog.record`` only puts a reference to the request's frame on a
+bounded queue, so the handler never waits on disk. A background thread
+collects the queued requests into one row per listing, with these columns:
+
+- request id, timestamp, endpoint and model version (per row when a
+  registry routes listings to region bundles);
+- the listing fields;
+- the prediction;
+- the request's stage timings in ms.
+
+The thread appends the rows to Parquet (or Arrow IPC) files in batches of
+``flush_rows`` rows, or every ``flush_seconds``. Files rotate after
+``rotate_rows`` rows or ``rotate_seconds``. A file is written under a
+``.tmp`` name and renamed when it is closed, so ``read_log`` only sees
+complete files. When the queue is full, requests are dropped and counted
+rather than slowing serving down.
+
+The apps log /predict traffic when ``REQUEST_LOG_DIR`` is set.
+``python -m benchmarks.replay`` feeds a captured log back through a model or
+a running app.
+"""
+import atexit
+import glob
+import hashlib
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # logging needs pyarrow; serving does not
+    pa = pq = None
+
+from src.metrics import REGISTRY, Counter
+
+# Listing fields kept in the log, with a fixed schema so batches can share a file
+NUMERIC_FIELDS = ["area", "bedrooms", "bathrooms", "year_built", "lat", "lon"]
+TEXT_FIELDS = ["description"]
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+LOGGED_ROWS = REGISTRY.register(Counter(
+    "house_price_request_log_rows_total", "Listings written to the request log"))
+DROPPED_REQUESTS = REGISTRY.register(Counter(
+    "house_price_request_log_dropped_total", "Requests not logged because the log queue was full"))
+
+_STOP = object()
+
+
+def model_version(path):
+    """``<file name>:<first 12 hex digits of its sha256>``, computed once at startup."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return f"{os.path.basename(path)}:{digest.hexdigest()[:12]}"
+
+
+class RequestLog:
+    """Background writer of rotating columnar request logs."""
+
+    def __init__(self, directory, model_version=None, fmt="parquet", flush_rows=5_000, flush_seconds=5.0,
+                 rotate_rows=500_000, rotate_seconds=3600.0, max_pending=10_000):
+        if pa is None:
+            raise ImportError("The request log needs pyarrow installed")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown log format {fmt!r}; choose from {', '.join(FORMATS)}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.model_version = model_version
+        self.fmt = fmt
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.rotate_rows = rotate_rows
+        self.rotate_seconds = rotate_seconds
+        self.schema = pa.schema(
+            [("request_id", pa.string()), ("timestamp", pa.timestamp("ms", tz="UTC")),
+             ("endpoint", pa.string()), ("model_version", pa.string()), ("rows", pa.int32())]
+            + [(name, pa.float64()) for name in NUMERIC_FIELDS]
+            + [(name, pa.string()) for name in TEXT_FIELDS]
+            + [("prediction", pa.float64()), ("timings_ms", pa.map_(pa.string(), pa.float64()))]
+        )
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = None
+        self._path = None
+        self._file_rows = 0
+        self._opened_at = 0.0
+        self._sequence = itertools.count()
+        self.files = []
+        self._thread = threading.Thread(target=self._run, name="request-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, endpoint, df, preds, timings=None, model_versions=None):
+        """
+        Queue one served request; never blocks. ``df`` must not be modified
+        afterwards. ``model_versions`` (one per row) overrides the log's own
+        version, e.g. with the region bundle that scored each listing.
+        """
+        item = (time.time(), endpoint, df, preds, timings or {}, model_versions)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            DROPPED_REQUESTS.inc()
+
+    def _run(self):
+        pending, n_rows = [], 0
+        deadline = time.monotonic() + self.flush_seconds
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+            if item is _STOP:
+                break
+            if item is not None:
+                pending.append(item)
+                n_rows += len(item[2])
+            if n_rows >= self.flush_rows or (pending and time.monotonic() >= deadline):
+                self._write(pending)
+                pending, n_rows = [], 0
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_seconds
+                if self._writer is not None and time.time() - self._opened_at >= self.rotate_seconds:
+                    self._close_file()
+        if pending:
+            self._write(pending)
+        self._close_file()
+
+    def _table(self, pending):
+        """One Arrow table (a row per listing) for a batch of queued requests."""
+        columns = {name: [] for name in self.schema.names}
+        for ts, endpoint, df, preds, timings, model_versions in pending:
+            n = len(df)
+            request_id = uuid.uuid4().hex
+            columns["request_id"].append(np.full(n, request_id, dtype=object))
+            columns["timestamp"].append(np.full(n, int(ts * 1000), dtype=np.int64))
+            columns["endpoint"].append(np.full(n, endpoint, dtype=object))
+            columns["model_version"].append(np.full(n, self.model_version, dtype=object) if model_versions is None
+                                            else np.asarray(model_versions, dtype=object))
+            columns["rows"].append(np.full(n, n, dtype=np.int32))
+            # one object matrix per request: per-column Series access costs more than this for small requests
+            position = {name: j for j, name in enumerate(df.columns.tolist())}
+            values = df.to_numpy(dtype=object)
+            for name in NUMERIC_FIELDS + TEXT_FIELDS:
+                j = position.get(name)
+                columns[name].append(values[:, j] if j is not None else np.full(n, None, dtype=object))
+            columns["prediction"].append(np.asarray(preds, dtype=np.float64))
+            timings_ms = [(stage, round(seconds * 1000, 3)) for stage, seconds in timings.items()]
+            columns["timings_ms"].append([timings_ms] * n)
+
+        arrays = {name: np.concatenate(parts) for name, parts in columns.items() if name != "timings_ms"}
+        for name in NUMERIC_FIELDS:
+            arrays[name] = pd.to_numeric(arrays[name], errors="coerce").astype(np.float64)
+        for name in TEXT_FIELDS:
+            text = arrays[name]
+            text[pd.isna(text)] = None
+        arrays["timings_ms"] = list(itertools.chain.from_iterable(columns["timings_ms"]))
+        return pa.Table.from_arrays([pa.array(arrays[field.name], type=field.type) for field in self.schema],
+                                    schema=self.schema)
+
+    def _write(self, pending):
+        try:
+            table = self._table(pending)
+            if self._writer is None:
+                self._open_file()
+            self._writer.write_table(table)
+            self._file_rows += table.num_rows
+            LOGGED_ROWS.inc(amount=table.num_rows)
+            if self._file_rows >= self.rotate_rows:
+                self._close_file()
+        except Exception as e:  # a bad batch must not kill the writer thread
+            print(f"⚠️ Request log write failed: {e}")
+
+    def _open_file(self):
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime())
+        self._path = os.path.join(self.directory, f"requests-{stamp}-{next(self._sequence):04d}{FORMATS[self.fmt]}")
+        if self.fmt == "parquet":
+            self._writer = pq.ParquetWriter(self._path + ".tmp", self.schema, compression="zstd")
+        else:
+            self._writer = pa.ipc.new_file(self._path + ".tmp", self.schema)
+        self._file_rows = 0
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.replace(self._path + ".tmp", self._path)
+        self.files.append(self._path)
+        self._writer = None
+
+    def close(self):
+        """Flush everything queued, close the current file and stop the thread."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+
+def read_log(path):
+    """Completed log files under ``path`` (a file or directory) as one DataFrame, oldest first."""
+    if pa is None:
+        raise ImportError("Reading the request log needs pyarrow installed")
+    paths = [path] if os.path.isfile(path) else sorted(
+        p for ext in FORMATS.values() for p in glob.glob(os.path.join(path, f"*{ext}")))
+    tables = []
+    for p in paths:
+        if p.endswith(FORMATS["parquet"]):
+            tables.append(pq.read_table(p))
+        else:
+            with pa.memory_map(p) as source:
+                tables.append(pa.ipc.open_file(source).read_all())
+    if not tables:
+        raise FileNotFoundError(f"No request log files under {path}")
+    return pa.concat_tables(tables).to_pandas().sort_values("timestamp", kind="stable", ignore_index=True)
+
+
+# Log of the serving app (None when request logging is off)
+request_log = None
+
+
+def set_request_log(log):
+    global request_log
+    request_log = log
+
+
+def get_request_log():
+    return request_log
+
+
+def log_request(endpoint, df, preds, timings=None, model=None, X=None):
+    """
+    Record a served request if logging is on. Pass the ``model`` that scored
+    the feature matrix ``X`` to log each row's region bundle version when it
+    is a ``RegionRegistry``.
+    """
+    if request_log is not None:
+        versions = model.model_versions(X) if hasattr(model, "model_versions") else None
+        request_log.record(endpoint, df, preds, timings, versions)
@@ -0,0 +1,139 @@
+"""
+Structured instrumentation for training runs.
+
+``RunReport`` records, per pipeline stage, wall and CPU time, peak resident
+memory and throughput, and writes everything to a JSON file next to the model
+artifact. Library functions take an optional ``report`` and wrap their stages
+in ``report_stage(report, name)``, which does nothing when no report is given.
+"""
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (falls back to the peak off Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / 1024 ** 2
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Process-lifetime peak RSS in MB."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def _cpu_seconds():
+    """CPU time of this process plus finished child processes (e.g. joblib workers)."""
+    if resource is None:
+        return time.process_time()
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+class _RssSampler(threading.Thread):
+    """Background thread tracking the highest RSS seen since the last reset."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.peak = current_rss_mb()
+        self._stop_event = threading.Event()
+
+    def reset(self):
+        peak, self.peak = self.peak, current_rss_mb()
+        return peak
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak = max(self.peak, current_rss_mb())
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class RunReport:
+    """Collects per-stage measurements for one training run."""
+
+    def __init__(self, sample_interval=0.05):
+        self.stages = []
+        self.meta = {}
+        self._started = time.perf_counter()
+        self._sampler = _RssSampler(sample_interval)
+        self._sampler.start()
+
+    @contextmanager
+    def stage(self, name, rows=None, features=None):
+        """
+        Time a stage. The yielded dict can be updated with ``rows`` / ``features``
+        (or any extra fields) once they are known inside the block.
+        """
+        record = {"stage": name, "rows": rows, "features": features}
+        self._sampler.reset()
+        rss_start = current_rss_mb()
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield record
+        finally:
+            wall = time.perf_counter() - wall_start
+            record["wall_seconds"] = round(wall, 6)
+            record["cpu_seconds"] = round(_cpu_seconds() - cpu_start, 6)
+            record["rss_start_mb"] = round(rss_start, 1)
+            record["peak_rss_mb"] = round(max(self._sampler.reset(), current_rss_mb()), 1)
+            if record["rows"] and wall > 0:
+                record["rows_per_sec"] = round(record["rows"] / wall, 1)
+                if record["features"]:
+                    # engineered feature values produced (or consumed) per second
+                    record["features_per_sec"] = round(record["rows"] * record["features"] / wall, 1)
+            self.stages.append(record)
+
+    def to_dict(self):
+        return {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "total_wall_seconds": round(time.perf_counter() - self._started, 6),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+            },
+            **self.meta,
+            "stages": self.stages,
+        }
+
+    def save(self, path):
+        self._sampler.stop()
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2, default=str)
+        print(f"📝 Run report saved to: {path}")
+
+
+def report_stage(report, name, rows=None, features=None):
+    """``report.stage(...)`` when a report is given, otherwise a no-op yielding a scratch dict."""
+    if report is None:
+        return nullcontext({})
+    return report.stage(name, rows=rows, features=features)
+
+
+def report_path(model_path):
+    """Report location next to the model artifact: ``models/x.pkl`` -> ``models/x.report.json``."""
+    root, _ = os.path.splitext(model_path)
+    return root + ".report.json"
@@ -0,0 +1,272 @@
+"""
+Bulk VADER sentiment: the ``compound`` score of a whole text column at once.
+
+``SentimentIntensityAnalyzer.polarity_scores`` walks every word of every
+description in Python. ``BulkSentiment`` applies the same rules as array
+operations over all tokens of the column:
+
+- Each distinct token is looked up once: punctuation stripping, lowercase,
+  lexicon valence, booster value, negation and ALL CAPS.
+- The results are broadcast to every occurrence through the factorized
+  token codes.
+- The context rules read the neighbouring tokens through shifted arrays
+  within each description. These rules are "no" negation, ALL CAPS
+  emphasis, the boosters and negations up to three words back, "never
+  so", "without doubt", the special-case idioms, "least", contrastive
+  "but", and "!"/"?" emphasis.
+
+Descriptions that contain emoji are scored with the exact analyzer, since
+VADER first rewrites emoji into words.
+
+Scores equal ``polarity_scores(text)["compound"]``, including VADER's
+quirks. One example is the "but" rule, which finds scores by value with
+``list.index``, so it is replayed per description for the few that contain
+"but". The documented tolerance is ``BULK_TOLERANCE``: one unit in the
+fourth decimal, which VADER rounds to. It leaves room for float summation
+order. Below ``BULK_MIN_ROWS`` texts the fixed cost of the array setup
+exceeds the per-text cost of VADER, so small batches use the exact
+analyzer.
+"""
+import string
+
+import numpy as np
+import pandas as pd
+from vaderSentiment.vaderSentiment import (BOOSTER_DICT, C_INCR, N_SCALAR, NEGATE, SPECIAL_CASES,
+                                           SentimentIntensityAnalyzer)
+
+# Largest |bulk - exact| difference of the compound score allowed by the tests
+BULK_TOLERANCE = 1e-4
+# Fewer texts than this are scored by the exact analyzer (faster below ~50 texts)
+BULK_MIN_ROWS = 64
+
+_NEGATE = frozenset(NEGATE)
+_SEPARATOR = "\x00end\x00"
+_PUNCTUATION = string.punctuation
+# word offsets (relative to the scored word) of VADER's n-gram checks, in the order it applies them
+_IDIOMS_BEFORE = [(-1, 0), (-2, -1, 0), (-2, -1), (-3, -2, -1), (-3, -2)]
+_IDIOMS_AFTER = [(0, 1), (0, 1, 2)]
+_BOOSTER_NGRAMS = [(-3, -2, -1), (-3, -2), (-2, -1)]
+
+
+def _strip_punc_if_word(token):
+    stripped = token.strip(_PUNCTUATION)
+    return token if len(stripped) <= 2 else stripped
+
+
+def _but_check(sentiments, bi):
+    """VADER's contrastive "but" rule, including its ``list.index`` lookup of repeated values."""
+    for sentiment in sentiments:
+        si = sentiments.index(sentiment)
+        if si < bi:
+            sentiments[si] = sentiment * 0.5
+        elif si > bi:
+            sentiments[si] = sentiment * 1.5
+    return sentiments
+
+
+class BulkSentiment:
+    """VADER compound scores for lists of texts, computed over all their tokens at once."""
+
+    def __init__(self, analyzer=None):
+        self.analyzer = analyzer or SentimentIntensityAnalyzer()
+        self.lexicon = self.analyzer.lexicon
+        self._emoji = frozenset(e for e in self.analyzer.emojis if len(e) == 1)
+
+    def _token_table(self, uniques):
+        """Per distinct raw token: lowercase form, valence, booster value and flags."""
+        lexicon = self.lexicon
+        words = [_strip_punc_if_word(u) for u in uniques]
+        lowered = [w.lower() for w in words]
+        return {
+            "lower": lowered,
+            "valence": np.array([lexicon.get(w, 0.0) for w in lowered]),
+            "in_lexicon": np.array([w in lexicon for w in lowered]),
+            "booster": np.array([BOOSTER_DICT.get(w, 0.0) for w in lowered]),
+            "is_booster": np.array([w in BOOSTER_DICT for w in lowered]),
+            "upper": np.array([w.isupper() for w in words]),
+            "negation": np.array([w in _NEGATE or "n't" in w for w in lowered]),
+            "exclamations": np.array([u.count("!") for u in uniques], dtype=np.float64),
+            "questions": np.array([u.count("?") for u in uniques], dtype=np.float64),
+        }
+
+    def scores(self, texts):
+        """Compound score per text, as a float64 array."""
+        texts = list(texts)
+        if len(texts) < BULK_MIN_ROWS:
+            return np.array([self.analyzer.polarity_scores(t)["compound"] for t in texts])
+        out = np.zeros(len(texts))
+        # emoji are never ASCII, so most descriptions skip the character scan
+        with_emoji = [i for i, t in enumerate(texts) if not t.isascii() and not self._emoji.isdisjoint(t)]
+        for i in with_emoji:
+            out[i] = self.analyzer.polarity_scores(texts[i])["compound"]
+        if with_emoji:
+            keep = np.ones(len(texts), dtype=bool)
+            keep[with_emoji] = False
+            rows = np.flatnonzero(keep)
+            out[rows] = self._compound([texts[i] for i in rows])
+        else:
+            out[:] = self._compound(texts)
+        return out
+
+    def _compound(self, texts):
+        n_docs = len(texts)
+        if n_docs == 0:
+            return np.zeros(0)
+        # one split over the whole column; a separator token closes every description
+        tokens = f" {_SEPARATOR} ".join(texts).split()
+        tokens.append(_SEPARATOR)
+        all_codes, uniques = pd.factorize(np.array(tokens, dtype=object))
+        is_separator = all_codes == all_codes[-1]
+        ends = np.flatnonzero(is_separator)
+        if len(ends) != n_docs:  # a description contains the separator itself
+            return np.array([self.analyzer.polarity_scores(t)["compound"] for t in texts])
+        lengths = np.diff(ends, prepend=-1) - 1
+        n_tokens = len(tokens) - n_docs
+        if n_tokens == 0:
+            return np.zeros(n_docs)
+        codes = all_codes[~is_separator]
+
+        table = self._token_table(uniques)
+        lower_codes, lower_uniques = pd.factorize(np.asarray(table["lower"], dtype=object))
+        lc = lower_codes[codes]                       # lowercase word id per token
+        word_id = {w: i for i, w in enumerate(lower_uniques)}
+
+        doc = np.repeat(np.arange(n_docs), lengths)
+        starts = np.cumsum(lengths) - lengths
+        pos = np.arange(n_tokens) - starts[doc]       # position within the description
+        remaining = lengths[doc] - pos - 1            # words after this one
+
+        def prev(values, k, fill):
+            shifted = np.full_like(values, fill)
+            shifted[k:] = values[:-k]
+            shifted[pos < k] = fill
+            return shifted
+
+        def nxt(values, k, fill):
+            shifted = np.full_like(values, fill)
+            shifted[:-k] = values[k:]
+            shifted[remaining < k] = fill
+            return shifted
+
+        def is_word(word):
+            return lc == word_id.get(word, -1)
+
+        def phrase_at(words, offsets):
+            """Tokens at ``offsets`` from each position spell ``words``."""
+            match = np.ones(n_tokens, dtype=bool)
+            for word, offset in zip(words, offsets):
+                target = word_id.get(word)
+                if target is None:
+                    return np.zeros(n_tokens, dtype=bool)
+                match &= (prev(lc, -offset, -1) if offset < 0 else nxt(lc, offset, -1) if offset > 0 else lc) == target
+            return match
+
+        lexicon_value = table["valence"][codes]
+        in_lexicon = table["in_lexicon"][codes]
+        booster = table["booster"][codes]
+        is_booster = table["is_booster"][codes]
+        upper = table["upper"][codes]
+        negation = table["negation"][codes]
+
+        # some but not all words in ALL CAPS
+        n_caps = np.bincount(doc, weights=upper, minlength=n_docs)
+        cap_diff = ((n_caps < lengths) & (n_caps > 0))[doc]
+
+        # words that carry valence: lexicon words that are not boosters, and not "kind" in "kind of"
+        scored = in_lexicon & ~is_booster & ~(is_word("kind") & nxt(is_word("of"), 1, False))
+        valence = np.where(scored, lexicon_value, 0.0)
+
+        # "no" negates the next lexicon word instead of scoring itself
+        is_no = is_word("no")
+        valence[scored & is_no & nxt(in_lexicon, 1, False)] = 0.0
+        no_before = prev(is_no, 1, False) | prev(is_no, 2, False) | \
+            (prev(is_no, 3, False) & prev(is_word("or") | is_word("nor"), 1, False))
+        valence = np.where(scored & no_before, lexicon_value * N_SCALAR, valence)
+
+        caps = scored & upper & cap_diff
+        valence = np.where(caps, np.where(valence > 0, valence + C_INCR, valence - C_INCR), valence)
+
+        never, without, doubt = is_word("never"), is_word("without"), is_word("doubt")
+        so_this = is_word("so") | is_word("this")
+        for k in range(3):
+            j = k + 1
+            applies = scored & (pos > k) & ~prev(in_lexicon, j, True)
+
+            # booster / dampener j words back, scaled down with distance
+            s = prev(booster, j, 0.0)
+            s = np.where(valence < 0, -s, s)
+            boost_caps = prev(is_booster & upper, j, False) & cap_diff
+            s = np.where(boost_caps, np.where(valence > 0, s + C_INCR, s - C_INCR), s)
+            if k == 1:
+                s = np.where(s != 0, s * 0.95, s)
+            elif k == 2:
+                s = np.where(s != 0, s * 0.9, s)
+            valence = np.where(applies, valence + s, valence)
+
+            # negation j words back
+            negated = prev(negation, j, False)
+            if k == 0:
+                valence = np.where(applies & negated, valence * N_SCALAR, valence)
+            else:
+                if k == 1:
+                    emphasis = prev(never, 2, False) & prev(so_this, 1, False)
+                    kept = prev(without, 2, False) & prev(doubt, 1, False)
+                else:
+                    emphasis = (prev(never, 3, False) & prev(so_this, 2, False)) | prev(so_this, 1, False)
+                    kept = prev(without, 3, False) & (prev(doubt, 2, False) | prev(doubt, 1, False))
+                valence = np.where(applies & emphasis, valence * 1.25,
+                                   np.where(applies & ~emphasis & ~kept & negated, valence * N_SCALAR, valence))
+
+            if k == 2:
+                valence = self._idioms(valence, applies, remaining, phrase_at)
+
+        # "least" negates the next word, except in "at least" / "very least"
+        least = scored & prev(is_word("least"), 1, False) & ~prev(in_lexicon, 1, True)
+        at_very = prev(is_word("at") | is_word("very"), 2, False)
+        valence = np.where(least & ((pos == 1) | ((pos > 1) & ~at_very)), valence * N_SCALAR, valence)
+
+        # contrastive "but" (rare in listings): VADER's own loop over those descriptions only
+        first_but = np.full(n_docs, n_tokens)
+        is_but = is_word("but")
+        np.minimum.at(first_but, doc[is_but], pos[is_but])
+        for d in np.flatnonzero(first_but < n_tokens).tolist():
+            start, stop = starts[d], starts[d] + lengths[d]
+            valence[start:stop] = _but_check(valence[start:stop].tolist(), first_but[d])
+
+        total = np.bincount(doc, weights=valence, minlength=n_docs)
+
+        # "!" and "?" emphasis
+        # "!" and "?" only occur inside tokens, so count them per distinct token
+        exclamations = np.minimum(np.bincount(doc, weights=table["exclamations"][codes], minlength=n_docs), 4)
+        questions = np.bincount(doc, weights=table["questions"][codes], minlength=n_docs)
+        amplifier = exclamations * 0.292 + np.where(questions > 1, np.where(questions <= 3, questions * 0.18, 0.96), 0)
+        total = np.where(total > 0, total + amplifier, np.where(total < 0, total - amplifier, total))
+
+        compound = np.clip(total / np.sqrt(total * total + 15), -1.0, 1.0)
+        # Python's round (as VADER uses), once per distinct score
+        values, inverse = np.unique(compound, return_inverse=True)
+        return np.array([round(x, 4) for x in values.tolist()])[inverse]
+
+    @staticmethod
+    def _idioms(valence, applies, remaining, phrase_at):
+        """VADER's special-case idioms and multi-word boosters around the scored word."""
+        assigned = np.zeros_like(applies)
+        for offsets in _IDIOMS_BEFORE:
+            for phrase, value in SPECIAL_CASES.items():
+                words = phrase.split()
+                if len(words) == len(offsets):
+                    match = applies & ~assigned & phrase_at(words, offsets)
+                    valence = np.where(match, value, valence)
+                    assigned |= match
+        for offsets in _IDIOMS_AFTER:
+            for phrase, value in SPECIAL_CASES.items():
+                words = phrase.split()
+                if len(words) == len(offsets):
+                    match = applies & (remaining >= len(offsets) - 1) & phrase_at(words, offsets)
+                    valence = np.where(match, value, valence)
+        for offsets in _BOOSTER_NGRAMS:
+            for phrase, value in BOOSTER_DICT.items():
+                words = phrase.split()
+                if len(words) == len(offsets) > 1:
+                    valence = np.where(applies & phrase_at(words, offsets), valence + value, valence)
+        return valence
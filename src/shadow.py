@@ -0,0 +1,258 @@
+"""
+Shadow evaluation of a candidate model on live traffic.
+
+Before a retrained bundle replaces ``models/lgb_model.pkl``, the apps can
+load it as a shadow (``SHADOW_MODEL_PATH``). ``ShadowEvaluator.record`` is
+called after /predict has scored a request. It samples ``sample_rate`` of
+requests and puts a reference to the request's feature matrix and
+predictions on a bounded queue, so the handler never waits on the candidate.
+A background thread scores the candidate and aggregates, per listing:
+
+- the prediction delta (candidate - primary): mean, MAE, RMSE, mean
+  absolute percentage, percentiles of the absolute delta;
+- the predict latency of both models per request and per row.
+
+The candidate scores the same engineered matrix as the primary. When its
+bundle was trained with a different vectorizer, reference point or POI
+layer, the thread builds its features from the request's frame with the
+candidate's own bundle instead.
+
+Shadow scoring is capped at ``cpu_budget`` of one core, charged in wall
+seconds. It runs on one thread (LightGBM candidates predict with
+``num_threads=1`` and own features use the pandas backend), so the wall time
+charged is never less than the CPU time used. A token bucket
+refills at that rate (up to ``BURST_SECONDS`` of it). Each sampled request
+reserves its expected cost from a ``CostModel`` of recent shadow scoring
+(see ``src.deadline``), settled once it has been scored. Requests that find
+the bucket empty, or the queue full, are skipped and counted. ``report()``
+is served on ``/shadow`` (``/api/shadow`` in the web app) and the skip
+counts are on ``/metrics``.
+"""
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import lightgbm as lgb
+import numpy as np
+
+from src.deadline import CostModel
+from src.features import build_features, get_poi_layer, get_ref_point, get_text_vectorizer, get_tfidf
+from src.metrics import REGISTRY, Counter, Gauge
+
+SHADOW_REQUESTS = REGISTRY.register(Counter(
+    "house_price_shadow_requests_total",
+    "Served requests by shadow outcome (scored, unsampled, budget, queue_full, error)", ("outcome",)))
+SHADOW_ABS_DELTA = REGISTRY.register(Gauge(
+    "house_price_shadow_mean_abs_delta", "Mean absolute difference between shadow and primary predictions"))
+
+BURST_SECONDS = 10.0   # budget that can accumulate while traffic is idle
+WINDOW = 10_000        # recent listings / requests kept for percentiles
+OUTCOMES = ("scored", "unsampled", "budget", "queue_full", "error")
+
+
+def shares_features(bundle):
+    """Whether ``bundle`` builds the same features as the module-level settings the primary serves with."""
+    served = get_text_vectorizer()
+    served.pop("n_jobs")
+    if bundle["text_vectorizer"] != served or tuple(bundle["ref_point"]) != tuple(get_ref_point()):
+        return False
+    tfidf, served_tfidf = bundle["tfidf"], get_tfidf()
+    if (tfidf is None) != (served_tfidf is None):
+        return False
+    if tfidf is not None and (tfidf.vocabulary_ != served_tfidf.vocabulary_
+                              or not np.array_equal(tfidf.idf_, served_tfidf.idf_)):
+        return False
+    layer, served_layer = bundle["poi_layer"], get_poi_layer()
+    if (layer is None) != (served_layer is None):
+        return False
+    return layer is None or (layer.feature_names() == served_layer.feature_names()
+                             and np.array_equal(layer.points, served_layer.points))
+
+
+def _predict_on_one_core(model, X):
+    """Predict on the calling thread only, so wall seconds are CPU seconds; LightGBM defaults to every core."""
+    if isinstance(model, lgb.LGBMModel):
+        return model.predict(X, num_threads=1)
+    return model.predict(X)
+
+
+def _percentiles(values, qs):
+    if not values:
+        return {f"p{q}": None for q in qs}
+    return {f"p{q}": float(v) for q, v in zip(qs, np.percentile(np.fromiter(values, dtype=np.float64), qs))}
+
+
+class ShadowEvaluator:
+    """Scores a candidate bundle on sampled live requests in a background thread."""
+
+    def __init__(self, bundle, version=None, sample_rate=0.1, cpu_budget=0.05, max_pending=1_000, seed=None):
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f"Shadow sample rate must be within [0, 1], got {sample_rate}")
+        if not 0 < cpu_budget <= 1:
+            raise ValueError(f"Shadow CPU budget must be within (0, 1], got {cpu_budget}")
+        self.bundle = bundle
+        self.model = bundle["model"]
+        self.version = version
+        self.shared_features = shares_features(bundle)
+        self.sample_rate = sample_rate
+        self.cpu_budget = cpu_budget
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = cpu_budget * BURST_SECONDS
+        self._refilled = time.monotonic()
+        self.cost = CostModel()  # seconds per shadow request, fitted to measured scoring
+        self._started = time.time()
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+
+        # aggregates over every scored listing
+        self.rows = 0
+        self.requests = 0
+        self._sums = np.zeros(4)  # delta, |delta|, delta², |delta| / |primary|
+        self._abs_deltas = deque(maxlen=WINDOW)
+        self._latency = {"primary": deque(maxlen=WINDOW), "shadow": deque(maxlen=WINDOW)}
+        self._seconds = {"primary": 0.0, "shadow": 0.0}
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="shadow-model", daemon=True)
+        self._thread.start()
+
+    def _count(self, outcome):
+        with self._lock:
+            self.outcomes[outcome] += 1
+        SHADOW_REQUESTS.inc(outcome)
+
+    def _admit(self, rows):
+        """Reserve the expected cost of scoring ``rows`` from the budget; None if it is spent."""
+        now = time.monotonic()
+        with self._lock:
+            self._tokens = min(self.cpu_budget * BURST_SECONDS,
+                               self._tokens + (now - self._refilled) * self.cpu_budget)
+            self._refilled = now
+            if self._tokens <= 0:
+                return None
+            cost = self.cost.estimate(rows)
+            self._tokens -= cost
+            return cost
+
+    def record(self, df, X, preds, primary_seconds):
+        """Queue a sampled request for shadow scoring; never blocks. ``df`` and ``X`` must not be modified."""
+        if self._rng.random() >= self.sample_rate:
+            self._count("unsampled")
+            return
+        reserved = self._admit(len(X))
+        if reserved is None:
+            self._count("budget")
+            return
+        try:
+            self._queue.put_nowait((df, X, np.asarray(preds, dtype=np.float64), primary_seconds, reserved))
+        except queue.Full:
+            with self._lock:
+                self._tokens += reserved
+            self._count("queue_full")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                self._score(*item)
+            except Exception as e:  # a bad request must not kill the shadow thread
+                self._count("error")
+                print(f"⚠️ Shadow scoring failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _score(self, df, X, preds, primary_seconds, reserved):
+        start = time.perf_counter()
+        try:
+            if not self.shared_features:
+                X = build_features(df, bundle=self.bundle, backend="pandas")
+            t = time.perf_counter()
+            shadow = np.asarray(_predict_on_one_core(self.model, X), dtype=np.float64)
+            shadow_seconds = time.perf_counter() - t
+        finally:
+            spent = time.perf_counter() - start
+            with self._lock:  # settle the reservation against what scoring really cost
+                self._tokens += reserved - spent
+            self.cost.observe(len(df), spent)
+
+        delta = shadow - preds
+        abs_delta = np.abs(delta)
+        with self._lock:
+            self.rows += len(delta)
+            self.requests += 1
+            self._sums += [delta.sum(), abs_delta.sum(), (delta ** 2).sum(),
+                           (abs_delta / np.maximum(np.abs(preds), 1e-9)).sum()]
+            self._abs_deltas.extend(abs_delta.tolist())
+            self._latency["primary"].append(primary_seconds * 1000)
+            self._latency["shadow"].append(shadow_seconds * 1000)
+            self._seconds["primary"] += primary_seconds
+            self._seconds["shadow"] += shadow_seconds
+            SHADOW_ABS_DELTA.set(round(self._sums[1] / self.rows, 6))
+        self._count("scored")
+
+    def drain(self):
+        """Wait until every queued request has been scored."""
+        self._queue.join()
+
+    def report(self):
+        """Comparison of the candidate against the primary over the scored traffic."""
+        with self._lock:
+            rows = max(self.rows, 1)
+            mean, mae, mse, mape = self._sums / rows
+            latency = {
+                name: {
+                    **_percentiles(self._latency[name], (50, 99)),
+                    "us_per_row": self._seconds[name] / rows * 1e6 if self.rows else None,
+                }
+                for name in ("primary", "shadow")
+            }
+            return {
+                "candidate": self.version,
+                "since": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._started)),
+                "sample_rate": self.sample_rate,
+                "cpu_budget": self.cpu_budget,
+                "shared_features": self.shared_features,
+                "requests": self.requests,
+                "rows": self.rows,
+                "outcomes": dict(self.outcomes),
+                "delta": {
+                    "mean": float(mean) if self.rows else None,
+                    "mae": float(mae) if self.rows else None,
+                    "rmse": float(np.sqrt(mse)) if self.rows else None,
+                    "mape_pct": float(mape * 100) if self.rows else None,
+                    **_percentiles(self._abs_deltas, (50, 95, 99)),
+                },
+                "latency_ms": latency,
+            }
+
+
+def load_shadow(path, **kwargs):
+    """Load the candidate bundle at ``path`` (without touching the served feature settings) as a shadow."""
+    from src.model import load_bundle
+    from src.request_log import model_version
+
+    evaluator = ShadowEvaluator(load_bundle(path), version=model_version(path), **kwargs)
+    print(f"👥 Shadow model {evaluator.version} (sampling {evaluator.sample_rate:.0%}, "
+          f"CPU budget {evaluator.cpu_budget:.0%})")
+    return evaluator
+
+
+# Shadow of the serving app (None when shadow mode is off)
+shadow = None
+
+
+def set_shadow(evaluator):
+    global shadow
+    shadow = evaluator
+
+
+def get_shadow():
+    return shadow
+
+
+def shadow_request(df, X, preds, primary_seconds):
+    """Offer a served request to the shadow model if one is loaded."""
+    if shadow is not None:
+        shadow.record(df, X, preds, primary_seconds)
@@ -0,0 +1,121 @@
+"""
+What-if sweeps: one property scored across a grid of one or two attributes.
+
+A sweep is a base listing plus one or two parameter ranges, e.g.
+``[{"name": "area", "min": 500, "max": 5000, "steps": 10}, {"name": "bedrooms", "values": [1, 2, 3, 4, 5, 6]}]``.
+The grid is scored in one batched predict. Text and location features depend
+only on the shared description and coordinates, so they are built once from
+the base row and broadcast. Only the attribute-derived features are built per
+grid point.
+"""
+import numpy as np
+import pandas as pd
+
+from src.features import build_features
+from src.model import predict_features, prepare_features
+
+# Attributes that can be swept (True: whole numbers only)
+SWEEP_PARAMS = {"area": False, "bedrooms": True, "bathrooms": True, "year_built": True}
+MAX_SWEEP_PARAMS = 2
+MAX_SWEEP_POINTS = 10_000
+DEFAULT_STEPS = 20
+
+
+def _axis_values(spec):
+    """
+    Sorted unique values of one sweep axis from ``values`` or ``min``/``max``/``steps``.
+    Sizes are checked before anything is allocated.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Each sweep parameter must be an object, got {spec!r}")
+    name = spec.get("name")
+    if name not in SWEEP_PARAMS:
+        raise ValueError(f"Cannot sweep {name!r}; choose from {', '.join(SWEEP_PARAMS)}")
+    try:
+        if "values" in spec:
+            values = spec["values"]
+            if not isinstance(values, list) or len(values) > MAX_SWEEP_POINTS:
+                raise ValueError(f"Sweep of {name!r} needs a list of at most {MAX_SWEEP_POINTS:,} 'values'")
+            values = np.asarray(values, dtype=np.float64)
+        elif "min" in spec and "max" in spec:
+            steps = spec.get("steps", DEFAULT_STEPS)
+            if isinstance(steps, bool) or not isinstance(steps, int) or not 1 <= steps <= MAX_SWEEP_POINTS:
+                raise ValueError(f"Sweep of {name!r} needs 'steps' between 1 and {MAX_SWEEP_POINTS:,}")
+            values = np.linspace(float(spec["min"]), float(spec["max"]), steps)
+        else:
+            raise ValueError(f"Sweep of {name!r} needs either 'values' or 'min' and 'max'")
+    except TypeError:
+        raise ValueError(f"Sweep of {name!r} has non-numeric bounds or values") from None
+    if values.ndim != 1:
+        raise ValueError(f"Sweep of {name!r} needs a flat list of 'values'")
+    if SWEEP_PARAMS[name]:
+        values = np.round(values)
+    values = np.unique(values[np.isfinite(values)])
+    if len(values) == 0:
+        raise ValueError(f"Sweep of {name!r} has no values")
+    return name, values
+
+
+def sweep_grid(base, params):
+    """
+    Expand ``params`` into a grid around the ``base`` listing.
+    Returns ``(axes, grid)``: ``[(name, values)]`` per axis and a DataFrame
+    with one row per grid point (first axis varying slowest).
+    """
+    if not isinstance(params, list):
+        raise ValueError("Sweep 'params' must be a list")
+    if not 1 <= len(params) <= MAX_SWEEP_PARAMS:
+        raise ValueError(f"Sweep 1 to {MAX_SWEEP_PARAMS} parameters, got {len(params)}")
+    axes = [_axis_values(spec) for spec in params]
+    if len({name for name, _ in axes}) != len(axes):
+        raise ValueError("Each parameter can only be swept once")
+    n_points = int(np.prod([len(values) for _, values in axes]))
+    if n_points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Sweep grid has {n_points:,} points; the limit is {MAX_SWEEP_POINTS:,}")
+
+    columns = np.meshgrid(*[values for _, values in axes], indexing="ij")
+    grid = pd.DataFrame({name: column.ravel() for (name, _), column in zip(axes, columns)})
+    return axes, grid
+
+
+def _sweep_features(base, grid):
+    """
+    Feature matrix of the grid: the base row's features repeated, with the
+    columns the swept attributes feed rebuilt for every grid point.
+    """
+    # the base row carries the first grid point, so every feature column exists
+    X_base = build_features(pd.DataFrame([{**base, **grid.iloc[0].to_dict()}]))
+    attributes = {name: value for name, value in base.items() if name in SWEEP_PARAMS and name not in grid}
+    X_grid = build_features(grid.assign(**attributes))
+
+    values = np.repeat(X_base.to_numpy(), len(grid), axis=0)
+    for name in X_grid.columns:
+        values[:, X_base.columns.get_loc(name)] = X_grid[name].to_numpy()
+    return pd.DataFrame(values, columns=X_base.columns, copy=False)
+
+
+def predict_sweep(model, base, params):
+    """
+    Score the ``base`` listing over the grid of ``params``.
+    Returns ``(axes, predictions)`` with predictions shaped like the grid,
+    i.e. ``(len(values),)`` for one axis and ``(len(x), len(y))`` for two.
+    """
+    axes, grid = sweep_grid(base, params)
+    if hasattr(model, "prepare"):
+        # exported / routed models engineer features themselves
+        X = prepare_features(model, grid.assign(**{k: v for k, v in base.items() if k not in grid}))
+    else:
+        X = _sweep_features(base, grid)
+    preds = np.asarray(predict_features(model, X), dtype=np.float64)
+    return axes, preds.reshape([len(values) for _, values in axes])
+
+
+def sweep_response(model, data):
+    """JSON-ready sweep result for a ``{"base": {...}, "params": [...]}`` request body."""
+    if not isinstance(data, dict) or not isinstance(data.get("base"), dict) or not data.get("params"):
+        raise ValueError("Sweep needs a 'base' listing and a list of 'params'")
+    axes, preds = predict_sweep(model, data["base"], data["params"])
+    return {
+        "axes": [{"name": name, "values": values.tolist()} for name, values in axes],
+        "predictions": preds.tolist(),
+    }
@@ -0,0 +1,217 @@
+"""
+Precomputed price-surface tiles for map heatmaps.
+
+``build_tiles`` scores one template property (typical area, rooms, age and
+description) at the center of every cell of ``size`` x ``size`` grids laid
+over Web Mercator tiles (the z/x/y scheme of OSM / Leaflet), for each zoom
+level covering ``bounds``. Features are built the way ``/sweep`` builds
+them: the template's row once, and only the location-driven columns for
+every cell. Cells are scored in batches of ``BATCH_ROWS`` rows.
+
+Tiles are written under ``<output>/<version>/<z>/<x>/<y>.<ext>``:
+
+- ``png``: a heatmap image, colored on one scale for the whole run;
+- ``npy``: the float32 predicted prices, for clients that color themselves.
+
+``metadata.json`` next to them records the template, zooms, bounds and
+color scale. The version is the model's plus a hash of the build settings,
+so a new model, template, format, tile size, bounds or zoom list (the last
+two set the color scale) gets a new directory and a tile never changes once
+written. The apps serve them at
+``/tiles/<version>/<z>/<x>/<y>.<ext>`` with a one-year immutable
+``Cache-Control`` header that nginx caches. ``/tiles/current`` names the
+newest version built for the model being served.
+
+    python train.py --mode tiles --model models/lgb_model.pkl --tiles_output tiles
+"""
+import glob
+import hashlib
+import json
+import math
+import os
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from src.model import predict_features
+from src.request_log import model_version
+from src.sweep import _sweep_features
+
+# Typical listing scored over the map (overridable per run)
+TILE_TEMPLATE = {"area": 1200, "bedrooms": 2, "bathrooms": 2, "year_built": 2012,
+                 "description": "2BHK apartment with modern amenities"}
+TILE_BOUNDS = (12.80, 77.40, 13.15, 77.80)  # min_lat, min_lon, max_lat, max_lon: Bangalore
+TILE_ZOOMS = (10, 11, 12, 13)
+TILE_SIZE = 64        # cells per tile side; map clients stretch them to 256 px
+TILE_FORMATS = {"png": "image/png", "npy": "application/octet-stream"}  # format: served mimetype
+BATCH_ROWS = 250_000
+MAX_TILES = 20_000
+TILE_MAX_AGE = 365 * 24 * 3600  # a version's tiles never change
+
+# min-max scaled over the frame: from one listing's own row they are what /predict gives it,
+# and the same in every batch, so tiles agree at their seams
+_BATCH_DEPENDENT = ("lat_normalized", "lon_normalized")
+
+# Heatmap color ramp, low to high: blue, cyan, green, yellow, red
+_RAMP = np.array([[49, 54, 149], [69, 171, 209], [102, 189, 99], [254, 224, 139], [215, 48, 39]], dtype=np.float64)
+_ALPHA = 170
+
+
+def tile_version(path, settings=None):
+    """
+    Directory name for the tiles of the model bundle at ``path``:
+    ``<file name>-<sha256 prefix>``, followed by a hash of the build
+    ``settings`` (template, format, size, bounds, zooms) when given.
+    """
+    version = model_version(path).replace(":", "-")
+    if settings is None:
+        return version
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:12]
+    return f"{version}-{digest}"
+
+
+def tile_range(bounds, zoom):
+    """``(x0, x1, y0, y1)``: the inclusive tile index ranges covering ``bounds`` at ``zoom``."""
+    min_lat, min_lon, max_lat, max_lon = bounds
+    n = 2 ** zoom
+
+    def x_of(lon):
+        return min(n - 1, max(0, int((lon + 180) / 360 * n)))
+
+    def y_of(lat):
+        lat = math.radians(max(-85.0511, min(85.0511, lat)))
+        return min(n - 1, max(0, int((1 - math.asinh(math.tan(lat)) / math.pi) / 2 * n)))
+
+    return x_of(min_lon), x_of(max_lon), y_of(max_lat), y_of(min_lat)
+
+
+def cell_centers(z, x, y, size=TILE_SIZE):
+    """Latitudes and longitudes of the cell centers of tile ``z/x/y``, each ``(size, size)``, north row first."""
+    n = 2 ** z
+    offsets = (np.arange(size) + 0.5) / size
+    lon = (x + offsets) / n * 360 - 180
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y + offsets) / n))))
+    lat, lon = np.meshgrid(lat, lon, indexing="ij")
+    return lat, lon
+
+
+def _score_cells(model, template, lat, lon):
+    grid = pd.DataFrame({"lat": lat, "lon": lon})
+    X = _sweep_features(template, grid)
+    X_single = _sweep_features(template, grid.iloc[:1])
+    for name in _BATCH_DEPENDENT:
+        if name in X.columns:
+            X[name] = X_single[name].iloc[0]
+    return np.asarray(predict_features(model, X), dtype=np.float32)
+
+
+def score_tiles(model, tiles, template=None, size=TILE_SIZE):
+    """Predicted prices per tile, ``{(z, x, y): (size, size) float32}``, in batches of ``BATCH_ROWS`` cells."""
+    template = dict(TILE_TEMPLATE if template is None else template)
+    per_batch = max(1, BATCH_ROWS // (size * size))
+    prices = {}
+    for start in range(0, len(tiles), per_batch):
+        batch = tiles[start:start + per_batch]
+        centers = [cell_centers(z, x, y, size) for z, x, y in batch]
+        lat = np.concatenate([c[0].ravel() for c in centers])
+        lon = np.concatenate([c[1].ravel() for c in centers])
+        preds = _score_cells(model, template, lat, lon).reshape(len(batch), size, size)
+        prices.update(zip(batch, preds))
+    return prices
+
+
+def colorize(prices, low, high):
+    """RGBA heatmap (uint8) of a price array on the ``low``..``high`` scale."""
+    t = np.clip((prices - low) / max(high - low, 1e-9), 0, 1) * (len(_RAMP) - 1)
+    i = np.minimum(t.astype(np.int64), len(_RAMP) - 2)
+    frac = (t - i)[..., None]
+    rgb = _RAMP[i] * (1 - frac) + _RAMP[i + 1] * frac
+    alpha = np.full(prices.shape + (1,), _ALPHA, dtype=np.float64)
+    return np.concatenate([rgb, alpha], axis=-1).round().astype(np.uint8)
+
+
+def encode_png(rgba):
+    """Minimal PNG (8-bit RGBA, no filtering) of an ``(h, w, 4)`` uint8 array."""
+    height, width = rgba.shape[:2]
+    raw = b"".join(b"\x00" + rgba[row].tobytes() for row in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 9)) + chunk(b"IEND", b"")
+
+
+def build_tiles(model, model_path, output, bounds=TILE_BOUNDS, zooms=TILE_ZOOMS, template=None,
+                fmt="png", size=TILE_SIZE):
+    """Score and write every tile of ``zooms`` covering ``bounds``; returns the version directory."""
+    if fmt not in TILE_FORMATS:
+        raise ValueError(f"Unknown tile format {fmt!r}; choose from {', '.join(TILE_FORMATS)}")
+    tiles = []
+    for z in zooms:
+        x0, x1, y0, y1 = tile_range(bounds, z)
+        tiles += [(z, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    if len(tiles) > MAX_TILES:
+        raise ValueError(f"{len(tiles):,} tiles requested (limit {MAX_TILES:,}); narrow the bounds or zooms")
+
+    template = dict(TILE_TEMPLATE if template is None else template)
+    print(f"🗺️ Scoring {len(tiles):,} tiles ({len(tiles) * size * size:,} cells) at zooms {list(zooms)}")
+    prices = score_tiles(model, tiles, template, size)
+
+    # one color scale for the whole run, so tiles of every zoom match
+    values = np.concatenate([p.ravel() for p in prices.values()])
+    low, high = (float(v) for v in np.percentile(values, [2, 98]))
+
+    version = tile_version(model_path, {"template": template, "format": fmt, "size": size,
+                                        "bounds": list(bounds), "zooms": list(zooms)})
+    root = os.path.join(output, version)
+    for (z, x, y), tile in prices.items():
+        directory = os.path.join(root, str(z), str(x))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{y}.{fmt}")
+        if fmt == "png":
+            with open(path, "wb") as f:
+                f.write(encode_png(colorize(tile, low, high)))
+        else:
+            np.save(path, tile)
+
+    metadata = {
+        "version": version,
+        "format": fmt,
+        "tile_size": size,
+        "zooms": list(zooms),
+        "bounds": list(bounds),
+        "template": template,
+        "scale": {"low": low, "high": high},
+        "tiles": len(prices),
+        "url": f"/tiles/{version}/{{z}}/{{x}}/{{y}}.{fmt}",
+    }
+    with open(os.path.join(root, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    print(f"💾 Tiles saved to: {root}")
+    return root
+
+
+def tile_metadata(output, model_path):
+    """``metadata.json`` of the newest tiles built for the bundle at ``model_path``, or None."""
+    paths = glob.glob(os.path.join(glob.escape(output), glob.escape(tile_version(model_path)) + "-*",
+                                   "metadata.json"))
+    if not paths:
+        return None
+    with open(max(paths, key=os.path.getmtime)) as f:
+        return json.load(f)
+
+
+def send_tile(directory, version, z, x, y, fmt):
+    """Flask response for one tile file, cacheable for a year by browsers and nginx; 404 if absent."""
+    from flask import abort, send_from_directory
+
+    if fmt not in TILE_FORMATS:
+        abort(404)
+    response = send_from_directory(os.path.abspath(directory), f"{version}/{z}/{x}/{y}.{fmt}",
+                                   mimetype=TILE_FORMATS[fmt], max_age=TILE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,123 @@
+"""
+Request and response encodings for the prediction endpoints.
+
+JSON stays the default: one listing object is answered with
+``{"prediction": x}``, a list of listing objects with ``{"predictions": [...]}``.
+
+Bulk clients can send an Arrow IPC stream instead
+(``Content-Type: application/vnd.apache.arrow.stream``) whose columns are the
+listing fields. It is decoded column by column straight into a DataFrame, with
+no per-row Python dicts, and the predictions come back as an Arrow stream with
+a single ``prediction`` column unless the client only accepts JSON.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # JSON-only deployments
+    pa = None
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+JSON = "application/json"
+
+
+class PayloadError(ValueError):
+    """A request body that cannot be decoded; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _require_arrow():
+    if pa is None:
+        raise PayloadError("Arrow payloads need pyarrow installed on the server", status=415)
+
+
+def is_arrow(content_type):
+    return (content_type or "").split(";")[0].strip().lower() == ARROW_STREAM
+
+
+def encode_frame(df):
+    """Arrow IPC stream of a DataFrame (what bulk clients send)."""
+    _require_arrow()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_frame(body, content_type):
+    """
+    Decode a request body into ``(df, single)``; ``single`` is True for a lone
+    JSON object, which keeps the original one-prediction response shape.
+    """
+    if is_arrow(content_type):
+        _require_arrow()
+        try:
+            table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        except (pa.ArrowInvalid, OSError) as e:
+            raise PayloadError(f"Invalid Arrow stream: {e}")
+        return table.to_pandas(), False
+
+    try:
+        data = json.loads(body) if body else None
+    except ValueError as e:
+        raise PayloadError(f"Invalid JSON: {e}")
+    if isinstance(data, dict) and data:
+        return pd.DataFrame([data]), True
+    if isinstance(data, list) and data and all(isinstance(row, dict) for row in data):
+        return pd.DataFrame(data), False
+    raise PayloadError("No input provided")
+
+
+def encode_predictions(preds, arrow, single=False, extra=None):
+    """Response body and mimetype for an array of predictions; ``extra`` fields go into JSON bodies."""
+    preds = np.asarray(preds, dtype=np.float64)
+    if arrow:
+        _require_arrow()
+        batch = pa.record_batch([pa.array(preds)], names=["prediction"])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes(), ARROW_STREAM
+    if single:
+        return json.dumps({"prediction": float(preds[0]), **(extra or {})}), JSON
+    return json.dumps({"predictions": preds.tolist(), **(extra or {})}), JSON
+
+
+def decode_predictions(body, content_type):
+    """Client side: predictions array from a response body in either format."""
+    if is_arrow(content_type):
+        _require_arrow()
+        return pa.ipc.open_stream(pa.py_buffer(body)).read_all().column("prediction").to_numpy()
+    data = json.loads(body)
+    return np.asarray(data["predictions"] if "predictions" in data else [data["prediction"]], dtype=np.float64)
+
+
+def read_frame(request):
+    """``decode_frame`` for a Flask request."""
+    return decode_frame(request.get_data(cache=False), request.content_type)
+
+
+def prediction_response(request, preds, single, degraded=None):
+    """
+    Flask response in the format the client asked for (Accept, else the
+    request's own format). A ``degraded`` reason (see ``src.deadline``) is
+    flagged in the ``X-Prediction-Degraded`` header and in JSON bodies.
+    """
+    from flask import Response
+
+    default = ARROW_STREAM if is_arrow(request.content_type) else JSON
+    other = JSON if default == ARROW_STREAM else ARROW_STREAM
+    arrow = request.accept_mimetypes.best_match([default, other], default=default) == ARROW_STREAM
+    extra = {"degraded": True} if degraded else None
+    body, mimetype = encode_predictions(preds, arrow and pa is not None, single, extra)
+    response = Response(body, mimetype=mimetype)
+    if degraded:
+        response.headers["X-Prediction-Degraded"] = degraded
+    return response
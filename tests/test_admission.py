@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+import time
+
+import pytest
+
+from src.admission import DEFAULT_PRIORITIES, AdmissionController, endpoint_priorities, priority_for
+
+
+def wait_for_queue(controller, n):
+    deadline = time.monotonic() + 2
+    while controller.stats()["queued"] < n and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert controller.stats()["queued"] == n
+
+
+def test_priorities_and_queue_order():
+    """Low priority is shed first; a freed slot goes to the highest-priority waiter"""
+    controller = AdmissionController(max_concurrent=2, max_queue=2, queue_timeout=5)
+    assert controller.acquire("low") == (None, 0.0)
+    assert controller.acquire("low") == ("full", 0.0)    # low only fills half of the slots
+    assert controller.acquire("high") == (None, 0.0)
+    assert controller.acquire("low") == ("full", 0.0)    # and never waits
+
+    order = []
+
+    def waiting(priority):
+        reason, _ = controller.acquire(priority)
+        order.append((priority, reason))
+
+    normal = threading.Thread(target=waiting, args=("normal",))
+    normal.start()
+    wait_for_queue(controller, 1)
+    assert controller.acquire("normal") == ("full", 0.0)  # normal may use half of the queue
+    high = threading.Thread(target=waiting, args=("high",))
+    high.start()
+    wait_for_queue(controller, 2)
+    assert controller.acquire("high") == ("full", 0.0)
+
+    controller.release(0.01)
+    high.join(2)
+    controller.release(0.01)
+    normal.join(2)
+    assert order == [("high", None), ("normal", None)]
+    assert controller.stats()["in_service"] == 2 and controller.stats()["queued"] == 0
+
+
+def test_queue_timeout_and_retry_after():
+    """A waiter that gets no slot in time is shed; Retry-After grows with the queue"""
+    controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=0.05)
+    assert controller.acquire("high")[0] is None
+    reason, waited = controller.acquire("high")
+    assert reason == "timeout" and waited >= 0.05
+    assert controller.stats()["queued"] == 0
+
+    controller.service_seconds = 2.0
+    assert controller.retry_after() == 2
+    controller.record_shed("/predict", "timeout")
+    assert controller.stats()["shed"] == {"/predict": 1}
+
+    priorities = {**DEFAULT_PRIORITIES, **endpoint_priorities("/nearby=low,/drift=critical")}
+    assert priority_for("/nearby", priorities) == "low"
+    assert priority_for("/tiles/v1/12/1/2.png", priorities) == "critical"
+    assert priority_for("/api/features", priorities) == "normal"
+    with pytest.raises(ValueError):
+        endpoint_priorities("/analyze=urgent")
+
+
+def test_app_sheds_with_503():
+    """With every slot taken, /analyze gets a fast 503 + Retry-After while /health still answers"""
+    from app.api_server import app
+
+    controller = app.extensions["admission"]
+    test_data = {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+                 "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"}
+    held = 0
+    try:
+        for _ in range(controller.max_concurrent):
+            assert controller.acquire("high")[0] is None
+            held += 1
+        with app.test_client() as client:
+            response = client.post('/analyze', json=test_data)
+            assert response.status_code == 503
+            assert int(response.headers["Retry-After"]) >= 1
+
+            health = client.get('/health')
+            assert health.status_code == 200
+            assert health.get_json()["admission"]["shed"]["/analyze"] >= 1
+    finally:
+        for _ in range(held):
+            controller.release(0.01)
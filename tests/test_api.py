@@ -44,3 +44,167 @@ def test_api_endpoints():
         data = response.get_json()
         assert 'status' in data
         assert data['status'] == 'healthy'
+
+def test_metrics_endpoint():
+    """Test Prometheus metrics exposition after a prediction"""
+    test_data = {
+        "area": 1200,
+        "bedrooms": 3,
+        "bathrooms": 2,
+        "year_built": 2015,
+        "lat": 12.9716,
+        "lon": 77.5946,
+        "description": "3BHK near IT hub"
+    }
+
+    with app.test_client() as client:
+        assert client.post('/predict', json=test_data).status_code == 200
+
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        body = response.get_data(as_text=True)
+        assert 'house_price_requests_total{endpoint="/predict",method="POST",status="200"}' in body
+        for name in ["parse", "features", "features.basic", "features.geo",
+                     "features.nlp", "features.tfidf", "predict", "serialize"]:
+            assert f'house_price_stage_duration_seconds_count{{stage="{name}"}}' in body
+        assert 'house_price_batch_rows_bucket{le="1.0"}' in body
+
+def test_metrics_render_is_consistent_under_load():
+    """Every queued observation is exported exactly once, even while other threads keep recording"""
+    from src.metrics import REGISTRY, STAGE_SECONDS, record_request, record_stages
+
+    def count(body, series):
+        return int(next(line for line in body.splitlines() if line.startswith(series)).split()[-1])
+
+    stage_series = 'house_price_stage_duration_seconds_count{stage="test.render"}'
+    request_series = 'house_price_requests_total{endpoint="/test-render",method="GET",status="200"}'
+
+    def work():
+        for _ in range(5000):
+            record_stages(("test.render",), (0.001,))
+            record_request("/test-render", "GET", 200, 0.001)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    seen = []
+    while any(t.is_alive() for t in threads):
+        body = REGISTRY.render()
+        if stage_series in body:
+            seen.append(count(body, stage_series))
+    for t in threads:
+        t.join()
+
+    body = REGISTRY.render()
+    assert seen == sorted(seen)
+    assert count(body, stage_series) == count(body, request_series) == 20000
+    assert abs(STAGE_SECONDS.sum("test.render") - 20.0) < 1e-6
+
+def test_predict_bulk_formats():
+    """Bulk scoring with a JSON list and an Arrow stream gives the same predictions"""
+    import pytest
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+    from src.wire import ARROW_STREAM, decode_predictions, encode_frame
+
+    rows = [
+        {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+         "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"},
+        {"area": 800, "bedrooms": 1, "bathrooms": 1, "year_built": 1995,
+         "lat": 13.02, "lon": 77.64, "description": "Compact flat"},
+    ]
+
+    with app.test_client() as client:
+        response = client.post('/predict', json=rows)
+        assert response.status_code == 200
+        from_json = response.get_json()['predictions']
+        assert len(from_json) == 2
+
+        response = client.post('/predict', data=encode_frame(pd.DataFrame(rows)),
+                               content_type=ARROW_STREAM)
+        assert response.status_code == 200
+        assert response.mimetype == ARROW_STREAM
+        assert decode_predictions(response.data, response.mimetype).tolist() == from_json
+
+        # Arrow in, JSON out when that is all the client accepts
+        response = client.post('/predict', data=encode_frame(pd.DataFrame(rows)),
+                               content_type=ARROW_STREAM, headers={"Accept": "application/json"})
+        assert response.get_json()['predictions'] == from_json
+
+        response = client.post('/predict', data=b"not arrow", content_type=ARROW_STREAM)
+        assert response.status_code == 400
+
+
+def test_sweep_endpoint():
+    """A what-if sweep matches scoring each grid point on its own"""
+    from src.model import predict_from_model
+    import app.api_server as api_server
+
+    base = {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+            "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"}
+    params = [{"name": "area", "min": 500, "max": 5000, "steps": 4},
+              {"name": "bedrooms", "values": [1, 2, 6]}]
+
+    with app.test_client() as client:
+        response = client.post('/sweep', json={"base": base, "params": params})
+        assert response.status_code == 200
+        data = response.get_json()
+        areas, bedrooms = [axis["values"] for axis in data["axes"]]
+        assert areas == [500, 2000, 3500, 5000] and bedrooms == [1, 2, 6]
+        for i, area in enumerate(areas):
+            for j, beds in enumerate(bedrooms):
+                expected = predict_from_model(api_server.model, {**base, "area": area, "bedrooms": beds})
+                assert abs(data["predictions"][i][j] - expected) < 1e-6
+
+        response = client.post('/sweep', json={"base": base, "params": [{"name": "lat", "values": [12.9]}]})
+        assert response.status_code == 400
+
+        # oversized or malformed grids are rejected before anything is allocated
+        for bad in ([{"name": "area", "min": 500, "max": 5000, "steps": 10 ** 13}],
+                    [{"name": "area", "min": 500, "max": 5000, "steps": 0}],
+                    [{"name": "area", "values": list(range(20000))}],
+                    [["area"]], "area"):
+            response = client.post('/sweep', json={"base": base, "params": bad})
+            assert response.status_code == 400, bad
+
+
+def test_model_tier_param():
+    """?tier=full is the default model; unknown tiers and tiers the bundle lacks are a 400"""
+    test_data = {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+                 "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"}
+
+    with app.test_client() as client:
+        default = client.post('/predict', json=test_data).get_json()['prediction']
+        assert client.post('/predict?tier=full', json=test_data).get_json()['prediction'] == default
+        assert client.post('/predict?tier=tiny', json=test_data).status_code == 400
+        tiers = client.get('/health').get_json()['model_tiers']
+        if "fast" not in tiers:
+            assert client.post('/predict?tier=fast', json=test_data).status_code == 400
+            assert client.post('/analyze?tier=fast', json=test_data).status_code == 400
+
+
+def test_endpoint_tiers_serve_the_fast_tier(monkeypatch):
+    """ENDPOINT_TIERS="/sweep=fast" serves /sweep, and the web app's /api/sweep, from the fast tier"""
+    import numpy as np
+    import app.api_server as api_server
+    import app.web_app as web_app
+    from src.model import endpoint_tiers
+
+    class Shifted:
+        """Stand-in fast tier whose predictions are easy to tell apart from the full model's"""
+        def __init__(self, model):
+            self.model = model
+
+        def predict(self, X):
+            return self.model.predict(X) + 1e6
+
+    body = {"base": {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+                     "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"},
+            "params": [{"name": "area", "values": [800, 1600]}]}
+    for module, path in ((api_server, "/sweep"), (web_app, "/api/sweep")):
+        monkeypatch.setattr(module, "tiers", {**module.tiers, "fast": Shifted(module.model)})
+        monkeypatch.setattr(module, "ENDPOINT_TIERS", endpoint_tiers("/sweep=fast"))
+        with module.app.test_client() as client:
+            fast = client.post(path, json=body).get_json()["predictions"]
+            full = client.post(path + "?tier=full", json=body).get_json()["predictions"]
+        assert np.allclose(np.subtract(fast, full), 1e6), path
@@ -3,9 +3,18 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.model import train_lgb, predict_from_model
-from src.features import build_features
+import src.features as features
+from src.features import build_features, set_text_vectorizer
 import pandas as pd
 import numpy as np
+import pytest
+
+@pytest.fixture(autouse=True)
+def restore_text_vectorizer():
+    saved, saved_tfidf = features.get_text_vectorizer(), features.get_tfidf()
+    yield
+    set_text_vectorizer(**saved)
+    features.set_tfidf(saved_tfidf)
 
 def test_imports():
     """Test that all modules can be imported successfully"""
@@ -80,3 +89,36 @@ def test_training_and_prediction():
     assert rmse > 0, f"RMSE should be positive, got {rmse}"
     # R² can be NaN with very small datasets, so we check if it's either valid or NaN
     assert np.isnan(r2) or (0 <= r2 <= 1), f"R² should be between 0 and 1 or NaN, got {r2}"
+
+def test_build_features_compact_matrix():
+    """Features come back as one float32 matrix with no NaNs"""
+    df = pd.DataFrame({
+        'area': [1000, np.nan, 800],
+        'bedrooms': [2, 0, 1],
+        'bathrooms': [1, 2, 1],
+        'year_built': [2010, 2015, np.nan],
+        'lat': [12.97, 12.98, 12.96],
+        'lon': [77.59, 77.60, 77.58],
+        'description': ["Nice 2BHK", None, "Compact 1BHK near metro"],
+    })
+    X = build_features(df, fit_vectorizer=True)
+
+    assert set(X.dtypes) == {np.dtype(np.float32)}
+    assert not X.isna().any().any()
+    assert list(X.index) == list(df.index)
+    assert X.columns[:6].tolist() == ['area', 'bedrooms', 'bathrooms', 'year_built', 'lat', 'lon']
+    assert X.columns[-1].startswith('tfidf_')
+
+def test_parallel_build_features_matches_serial(monkeypatch):
+    """Process-parallel feature building gives exactly the serial features"""
+    import src.features
+    from benchmarks.synthetic import make_properties
+
+    monkeypatch.setattr(src.features, "PARALLEL_CHUNK_ROWS", 100)
+    df = make_properties(500).drop(columns=['price'])
+    df.loc[3, 'lat'] = np.nan  # distance fill uses the mean over all chunks
+
+    serial = build_features(df, fit_vectorizer=True)
+    parallel = build_features(df, n_jobs=2)
+
+    assert parallel.equals(serial)
@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_properties
+from benchmarks.bench_pipeline import compare
+from benchmarks.loadtest import summarize
+
+def test_synthetic_matches_sample_schema():
+    """Synthetic generator produces the same columns as the sample dataset"""
+    sample = pd.read_csv("data/sample_properties.csv")
+    df = make_properties(100)
+    assert list(df.columns) == list(sample.columns)
+    assert len(df) == 100
+    assert (df["price"] > 0).all()
+
+def test_compare_flags_regressions():
+    """Only metrics slower than baseline beyond the threshold are reported"""
+    baseline = {"metrics": {"a@1": {"seconds": 1.0}, "b@1": {"seconds": 1.0}}}
+    current = {"metrics": {"a@1": {"seconds": 1.1}, "b@1": {"seconds": 2.0}}}
+    regressions = compare(current, baseline, threshold=0.25, min_delta=0.0)
+    assert [r["metric"] for r in regressions] == ["b@1"]
+
+def test_loadtest_summarize_percentiles_and_errors():
+    """Latency percentiles, throughput and error counts per endpoint and overall"""
+    samples = [("/predict", i / 1000, i not in (10, 20)) for i in range(1, 101)]
+    samples += [("/health", 0.005, True)] * 10
+    report = summarize(samples, elapsed=2.0)
+
+    predict = report["endpoints"]["/predict"]
+    assert predict["requests"] == 100 and predict["errors"] == 2 and predict["error_rate"] == 0.02
+    assert predict["throughput_rps"] == 50.0
+    assert predict["mean_ms"] == pytest.approx(50.5)
+    assert predict["p50_ms"] == pytest.approx(50.5) and predict["p95_ms"] == pytest.approx(95.05)
+    assert predict["p99_ms"] == pytest.approx(99.01) and predict["p999_ms"] == pytest.approx(99.901)
+    assert report["endpoints"]["/health"]["p99_ms"] == pytest.approx(5.0)
+    assert report["endpoints"]["/health"]["errors"] == 0
+    assert report["overall"]["requests"] == 110 and report["overall"]["errors"] == 2
+    assert summarize([], elapsed=1.0)["overall"] == {"requests": 0}
@@ -0,0 +1,102 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.deadline import CostModel, plan, text_free_features
+import src.features as features
+from src.features import build_features, set_text_vectorizer
+from src.model import train_text_free
+from benchmarks.synthetic import make_properties
+
+
+@pytest.fixture(scope="module")
+def fallback():
+    saved, saved_tfidf = features.get_text_vectorizer(), features.get_tfidf()
+    df = make_properties(1000, seed=6)
+    y = df.pop("price")
+    model, rmse = train_text_free(build_features(df, fit_vectorizer=True), y, params={"n_estimators": 50})
+    assert rmse > 0
+    yield model
+    set_text_vectorizer(**saved)
+    features.set_tfidf(saved_tfidf)
+
+
+def test_text_free_fallback(fallback):
+    """The fallback scores frames built without descriptions, matching the full matrix's columns"""
+    df = make_properties(200, seed=7).drop(columns=["price"])
+    X_full = build_features(df)
+    X_free = text_free_features(df)
+    assert X_free.columns.tolist() == fallback.all_features
+    assert not any(name.startswith(("tfidf_", "hash_")) or name == "sentiment" for name in X_free.columns)
+    assert np.allclose(fallback.predict(X_free), fallback.predict(X_full))
+
+
+def test_cost_model_and_plan():
+    """The cost model learns fixed + per-row time; plan degrades on the deadline or the queue"""
+    cost = CostModel()
+    for rows in [1, 5, 20, 100] * 100:
+        cost.observe(rows, 0.002 + 0.0001 * rows)
+    assert cost.fixed == pytest.approx(0.002, rel=0.05)
+    assert cost.per_row == pytest.approx(0.0001, rel=0.05)
+
+    import src.deadline as deadline
+    saved, deadline.full_cost = deadline.full_cost, cost
+    deadline._degraded_run = 0
+    try:
+        assert plan(1, deadline=0.050, elapsed=0.001) is None
+        assert plan(1000, deadline=0.050, elapsed=0.001) == "deadline"
+        assert plan(1, deadline=0.050, elapsed=0.049) == "deadline"
+        assert plan(100, deadline=0.050, elapsed=0.001, in_flight=8) == "queue"
+    finally:
+        deadline.full_cost = saved
+
+
+def test_plan_recovers_after_a_slowdown(monkeypatch):
+    """Probes re-measure the full pipeline, so a passing slowdown does not degrade requests for good"""
+    import src.deadline as deadline
+
+    monkeypatch.setattr(deadline, "full_cost", CostModel())
+    monkeypatch.setattr(deadline, "_degraded_run", 0)
+    for _ in range(30):
+        deadline.observe_full(1, 0.120)
+    assert deadline.full_cost.estimate(1) > 0.050
+
+    reasons = []
+    for _ in range(2000):
+        reason = plan(1, deadline=0.050, elapsed=0.001)
+        if reason is None:
+            deadline.observe_full(1, 0.010)  # the slowdown is over: full requests are fast again
+        reasons.append(reason)
+    assert reasons[:deadline.PROBE_EVERY - 1] == ["deadline"] * (deadline.PROBE_EVERY - 1)
+    assert reasons[deadline.PROBE_EVERY - 1] is None
+    assert deadline.full_cost.estimate(1) < 0.050
+    assert reasons[-100:] == [None] * 100
+
+
+def test_predict_degrades_past_deadline(fallback, monkeypatch):
+    """A request that cannot make its deadline is scored by the fallback and flagged"""
+    import app.api_server as api_server
+
+    test_data = {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+                 "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"}
+    monkeypatch.setitem(api_server.tiers, "fallback", fallback)
+    with api_server.app.test_client() as client:
+        response = client.post('/predict', json=test_data, headers={"X-Deadline-Ms": "10000"})
+        assert response.status_code == 200
+        assert "degraded" not in response.get_json() and "X-Prediction-Degraded" not in response.headers
+
+        response = client.post('/predict', json=test_data, headers={"X-Deadline-Ms": "0.001"})
+        assert response.status_code == 200
+        assert response.get_json()["degraded"] is True
+        assert response.headers["X-Prediction-Degraded"] == "deadline"
+        expected = fallback.predict(text_free_features(pd.DataFrame([test_data])))[0]
+        assert response.get_json()["prediction"] == pytest.approx(expected)
+
+        assert client.post('/predict?deadline_ms=soon', json=test_data).status_code == 400
+        body = client.get('/metrics').get_data(as_text=True)
+        assert 'house_price_degraded_requests_total{reason="deadline"}' in body
+        assert "house_price_degraded_ratio" in body
@@ -0,0 +1,75 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+import lightgbm as lgb
+import scipy.sparse as sp
+
+from src.distill import distill, pick_fast_tier
+import src.features as features
+from src.features import build_features, set_text_vectorizer
+from src.model import load_bundle, save_model, select_tier
+from src.wire import PayloadError
+from benchmarks.synthetic import make_properties
+
+CANDIDATES = [(20, 7, 5), (40, 15, None)]
+
+
+@pytest.fixture(scope="module")
+def distilled():
+    saved, saved_tfidf = features.get_text_vectorizer(), features.get_tfidf()
+    df = make_properties(1500, seed=4)
+    y = df.pop("price")
+    X = build_features(df, fit_vectorizer=True)
+    teacher = lgb.LGBMRegressor(n_estimators=300, num_leaves=31, verbose=-1).fit(X, y)
+    table, students = distill(teacher, X, y, candidates=CANDIDATES)
+    yield X, teacher, table, students
+    set_text_vectorizer(**saved)
+    features.set_tfidf(saved_tfidf)
+
+
+def test_distill_reports_each_candidate(distilled):
+    """The trade-off table has the full model and each student, with RMSE and latency"""
+    X, teacher, table, students = distilled
+    assert [row["name"] for row in table] == ["full", "t20_l7_f5", f"t40_l15_f{X.shape[1]}"]
+    assert set(students) == {"t20_l7_f5", f"t40_l15_f{X.shape[1]}"}
+    for row in table:
+        assert row["rmse"] > 0 and row["p50_ms"] > 0 and row["batch_rows_per_sec"] > 0
+    assert table[0]["fidelity_rmse"] == 0.0 and table[1]["fidelity_rmse"] > 0
+
+    assert pick_fast_tier(table, tolerance=10.0) in students
+    assert pick_fast_tier(table, tolerance=-1.0) is None
+
+
+def test_fast_model_input_forms(distilled):
+    """A student scores frames (in any column order), arrays and sparse matrices alike"""
+    X, teacher, table, students = distilled
+    fast = students["t20_l7_f5"]
+    expected = fast.predict(X)
+    assert expected.shape == (len(X),)
+    assert np.allclose(fast.predict(X[X.columns[::-1]]), expected)
+    assert np.allclose(fast.predict(X.to_numpy()), expected)
+    assert np.allclose(fast.predict(sp.csr_matrix(X.to_numpy())), expected)
+
+
+def test_fast_tier_in_bundle(distilled, tmp_path):
+    """The fast tier round-trips through the bundle and is picked per request or endpoint"""
+    X, teacher, table, students = distilled
+    fast = students["t20_l7_f5"]
+    save_model(teacher, tmp_path / "tiered.pkl", fast_model=fast)
+    loaded = load_bundle(tmp_path / "tiered.pkl")["fast_model"]
+    assert np.allclose(loaded.predict(X), fast.predict(X))
+
+    tiers = {"full": teacher, "fast": loaded}
+    assert select_tier(tiers) is teacher
+    assert select_tier(tiers, default="fast") is loaded
+    assert select_tier(tiers, "full", default="fast") is teacher
+    # an endpoint defaulting to fast still works on bundles without one; asking for it does not
+    assert select_tier({"full": teacher}, default="fast") is teacher
+    with pytest.raises(PayloadError):
+        select_tier({"full": teacher}, "fast")
+    with pytest.raises(PayloadError):
+        select_tier(tiers, "tiny")
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import src.drift as drift
+import src.features as features
+from src.drift import DriftMonitor, reference_sketches
+from src.features import build_features, build_sparse_features
+from benchmarks.synthetic import make_properties
+
+
+@pytest.fixture(scope="module")
+def reference():
+    saved_tfidf = features.get_tfidf()
+    X, names = build_sparse_features(make_properties(5000, seed=1).drop(columns=["price"]), fit_vectorizer=True)
+    yield reference_sketches(X, names)
+    features.set_tfidf(saved_tfidf)
+
+
+def test_reference_from_sparse_matches_dense(reference):
+    X = build_features(make_properties(5000, seed=1).drop(columns=["price"]))
+    assert reference_sketches(X) == reference
+    assert {"area", "lat", "lon", "dist_to_cbd_km", "sentiment"} <= set(reference)
+    for sketch in reference.values():
+        assert len(sketch["fractions"]) == len(sketch["edges"]) + 1
+        assert sum(sketch["fractions"]) == pytest.approx(1)
+
+
+def test_monitor_flags_shifted_feature(reference):
+    monitor = DriftMonitor(reference, half_life_rows=2000)
+    assert monitor.report()["status"] == "insufficient data"
+
+    for seed in range(5):
+        monitor.observe(build_features(make_properties(400, seed=10 + seed).drop(columns=["price"])))
+    report = monitor.report()
+    assert report["status"] == "stable", report
+    assert report["rows_observed"] == 2000
+
+    # traffic moves to much larger listings; the old rows decay away
+    for seed in range(5):
+        df = make_properties(400, seed=20 + seed).drop(columns=["price"])
+        df["area"] *= 2
+        monitor.observe(build_features(df))
+    features = monitor.report()["features"]
+    assert features["area"]["status"] == "major"
+    assert features["area"]["ks"] > 0.3
+    assert features["lat"]["status"] == "stable"
+
+
+def test_monitor_installed_from_bundle(reference, tmp_path):
+    from src.model import load_model, save_model
+    import lightgbm as lgb
+
+    saved_monitor = drift.get_monitor()
+    df = make_properties(300, seed=2)
+    y = df.pop("price")
+    model = lgb.LGBMRegressor(n_estimators=5, verbose=-1).fit(build_features(df), y)
+    save_model(model, tmp_path / "model.pkl", drift_reference=reference)
+    try:
+        load_model(tmp_path / "model.pkl")
+        assert drift.get_monitor().reference == reference
+        drift.observe(build_features(df))
+        assert drift.drift_report()["rows_observed"] == len(df)
+    finally:
+        drift.monitor = saved_monitor
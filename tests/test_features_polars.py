@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+pytest.importorskip("polars")
+
+import src.features as features
+from src.features import build_features, build_sparse_features
+from src.poi import load_pois
+from benchmarks.synthetic import make_properties
+
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    saved = (features.get_tfidf(), features.get_poi_layer(), features.get_sentiment_mode(),
+             features.get_feature_backend())
+    yield
+    features.set_tfidf(saved[0])
+    features.set_poi_layer(saved[1])
+    features.set_sentiment_mode(saved[2])
+    features.set_feature_backend(saved[3])
+
+
+def messy_properties(n_rows, seed=3):
+    """Synthetic listings with the inputs the pandas backend special-cases"""
+    df = make_properties(n_rows, seed=seed).drop(columns=["price"])
+    df.loc[::7, "lat"] = np.nan
+    df.loc[::11, "description"] = None
+    df.loc[::13, "year_built"] = np.nan
+    df.loc[3, "lat"] = 95.0  # out of range: null distance in both backends, whatever geopy does
+    df.loc[4, "lat"] = -100.0
+    df.loc[5, "area"] = 0
+    df.loc[6, "bedrooms"] = 0
+    df.loc[8, "description"] = "  Luxury   VILLA\tnear the metro,  renovated  "
+    return df
+
+
+def assert_same_features(pandas_X, polars_X):
+    assert list(polars_X.columns) == list(pandas_X.columns)
+    for name in pandas_X.columns:
+        np.testing.assert_allclose(polars_X[name], pandas_X[name], rtol=1e-6, atol=1e-5, err_msg=name)
+
+
+def test_polars_matches_pandas_column_for_column():
+    """Every engineered column agrees with the pandas backend, including missing and invalid inputs"""
+    df = messy_properties(3000)
+    pandas_X = build_features(df, fit_vectorizer=True)
+    assert_same_features(pandas_X, build_features(df, backend="polars"))
+
+    # frames missing whole input groups lay out the same columns
+    for columns in (["area", "bedrooms"], ["area", "lat", "lon"], ["bathrooms", "description"]):
+        assert_same_features(build_features(df[columns]), build_features(df[columns], backend="polars"))
+    one_row = df.iloc[[0]]
+    assert_same_features(build_features(one_row), build_features(one_row, backend="polars"))
+
+
+def test_polars_with_pois_exact_sentiment_and_sparse():
+    """POI features, exact VADER sentiment and the sparse builder go through the polars backend too"""
+    df = messy_properties(500, seed=4)
+    build_features(df, fit_vectorizer=True)
+    features.set_poi_layer(load_pois("data/pois.csv"))
+    features.set_sentiment_mode("exact")
+    assert_same_features(build_features(df), build_features(df, backend="polars"))
+
+    features.set_feature_backend("polars")
+    S, names = build_sparse_features(df)
+    assert names == list(build_features(df, backend="pandas").columns)
+    np.testing.assert_allclose(S.toarray(), build_features(df, backend="pandas").to_numpy(), rtol=1e-6, atol=1e-5)
+
+
+def test_geodesic_matches_geopy_and_backend_is_validated():
+    """Vincenty distances agree with geopy's geodesic; unknown backends are rejected"""
+    import polars as pl
+    from geopy.distance import geodesic
+    from src.features_polars import with_geodesic_km
+
+    lat = np.array([12.9716, 13.2, -33.87, 51.5, 0.0, 89.9])
+    lon = np.array([77.5946, 77.1, 151.21, -0.12, 0.0, 10.0])
+    ref_point = (12.9716, 77.5946)
+    km = with_geodesic_km(pl.LazyFrame({"lat": lat, "lon": lon}), ref_point).collect()["_geodesic_km"]
+    expected = [geodesic((a, b), ref_point).km for a, b in zip(lat, lon)]
+    np.testing.assert_allclose(km.to_numpy(), expected, rtol=1e-9, atol=1e-6)
+
+    lat, lon = np.array([95.0, -100.0, 90.0]), np.array([77.59, 10.0, 0.0])
+    km = with_geodesic_km(pl.LazyFrame({"lat": lat, "lon": lon}), ref_point).collect()["_geodesic_km"]
+    assert km.null_count() == 2 and km[2] == pytest.approx(geodesic((90.0, 0.0), ref_point).km)
+    np.testing.assert_array_equal(np.isnan(features._geodesic_km(lat, lon, ref_point)), [True, True, False])
+
+    with pytest.raises(ValueError):
+        features.set_feature_backend("spark")
+    with pytest.raises(ValueError):
+        build_features(messy_properties(10), backend="spark")
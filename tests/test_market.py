@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.market as market
+from src.market import MarketStats, ingest_request_log, market_stats, set_market_stats
+from benchmarks.synthetic import make_properties
+
+
+def test_aggregates_are_incremental():
+    """Updating in parts gives the same aggregates as one pass; medians and premiums match the data"""
+    df = make_properties(2000, seed=5)
+    central = np.hypot(df["lat"] - 12.9716, df["lon"] - 77.5946) < 0.03
+    df.loc[central, "price"] *= 1.3
+    prices = df.pop("price")
+
+    whole = market_stats(df, prices, ref_point=(12.9716, 77.5946))
+    parts = MarketStats((12.9716, 77.5946))
+    parts.update(df.iloc[:700], prices.iloc[:700])
+    rest = MarketStats((12.9716, 77.5946))
+    rest.update(df.iloc[700:], prices.iloc[700:])
+    parts.merge(rest)
+
+    assert parts.segments.keys() == whole.segments.keys()
+    for key, (rows, price_sum, hist) in whole.segments.items():
+        assert parts.segments[key][0] == rows and np.isclose(parts.segments[key][1], price_sum)
+        assert (parts.segments[key][2] == hist).all()
+
+    assert whole.median_ppsf("all") == pytest.approx(np.median(prices / df["area"]), rel=0.015)
+    snapshot = whole.snapshot()
+    assert snapshot["rows"]["training"] == 2000
+    assert snapshot["trends"]["central_premium_pct"] > 5  # most central listings are within 3 km
+    assert snapshot["trends"]["new_construction_premium_pct"] > 0  # older homes lose 800 per year of age
+    assert set(snapshot["price_per_sqft"]["by_bedrooms"]) == {"1", "2", "3", "4", "5+"}
+    assert snapshot["trends"]["price_growth_pct"] is None and snapshot["monthly"] == []
+
+
+def test_monthly_growth_and_request_log(tmp_path):
+    """Dated rows give a monthly index and growth; each request log file is merged once"""
+    pytest.importorskip("pyarrow")
+    from src.request_log import RequestLog
+
+    df = make_properties(200, seed=6)
+    prices = df.pop("price")
+    stats = MarketStats()
+    stats.update(df, prices, timestamps=pd.Series(["2026-01-15"] * 200))
+    stats.update(df, prices * 1.1, timestamps=pd.Series(["2026-03-02"] * 200))
+    snapshot = stats.snapshot()
+    assert [row["month"] for row in snapshot["monthly"]] == ["2026-01", "2026-03"]
+    assert snapshot["trends"]["price_growth_pct"] == pytest.approx(10, abs=1.5)
+    assert snapshot["trends"]["growth_period"] == ["2026-01", "2026-03"]
+
+    log = RequestLog(tmp_path, model_version="test:1")
+    log.record("/predict", df.iloc[:50], prices.iloc[:50].to_numpy())
+    log.close()
+    saved = market.get_market_stats()
+    try:
+        set_market_stats(stats)
+        etag = market.snapshot[1]
+        assert ingest_request_log(str(tmp_path)) == 1
+        assert ingest_request_log(str(tmp_path)) == 0
+        assert stats.rows["request_log"] == 50
+        assert market.snapshot[1] != etag
+    finally:
+        set_market_stats(saved)
+
+
+def test_market_data_endpoint_etag(monkeypatch):
+    """/api/market-data serves the snapshot with an ETag and answers If-None-Match with a 304"""
+    from app.web_app import app
+
+    df = make_properties(300, seed=7)
+    monkeypatch.setattr(market, "stats", None)
+    monkeypatch.setattr(market, "snapshot", None)
+    with app.test_client() as client:
+        assert client.get('/api/market-data').status_code == 404
+
+        set_market_stats(market_stats(df, df["price"]))
+        response = client.get('/api/market-data')
+        assert response.status_code == 200
+        assert response.get_json()["rows"]["training"] == 300
+        etag = response.headers["ETag"]
+
+        assert response.headers["Last-Modified"]
+
+        cached = client.get('/api/market-data', headers={"If-None-Match": etag})
+        assert cached.status_code == 304 and cached.data == b""
+        assert client.get('/api/market-data').headers["ETag"] == etag
+
+        # rebuilding unchanged statistics later keeps the ETag (and body), though generated_at would differ
+        body = market.snapshot[0]
+        time.sleep(0.01)
+        set_market_stats(market_stats(df, df["price"]))
+        assert market.snapshot[0] == body
+        assert client.get('/api/market-data', headers={"If-None-Match": etag}).status_code == 304
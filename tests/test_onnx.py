@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnxmltools")
+
+import lightgbm as lgb
+
+import src.features as features
+from src.features import build_features
+from src.model import load_model, predict_from_model, save_model
+from src.onnx_export import export_onnx, load_onnx_model
+from benchmarks.synthetic import make_properties
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    """A small LightGBM bundle trained on synthetic listings, and its ONNX export"""
+    tmp = tmp_path_factory.mktemp("onnx")
+    saved, saved_tfidf = features.get_text_vectorizer(), features.get_tfidf()
+    df = make_properties(1000, seed=1)
+    y = df.pop("price")
+    model = lgb.LGBMRegressor(n_estimators=40, verbose=-1).fit(build_features(df, fit_vectorizer=True), y)
+    save_model(model, tmp / "model.pkl")
+
+    model = load_model(tmp / "model.pkl")
+    export_onnx(model, str(tmp / "model.onnx"))
+    yield model, load_onnx_model(str(tmp / "model.onnx"))
+    features.set_text_vectorizer(**saved)
+    features.set_tfidf(saved_tfidf)
+
+
+def edge_cases(n_rows):
+    df = make_properties(n_rows, seed=7).drop(columns=["price"])
+    df.loc[0, "lat"] = np.nan         # distance filled with the batch mean
+    df.loc[1, "bedrooms"] = 0         # ratio guards
+    df.loc[2, "year_built"] = np.nan
+    df.loc[3, "description"] = None
+    df.loc[4, "lat"] = 95             # invalid coordinate
+    return df
+
+
+def test_onnx_matches_predict_from_model(exported):
+    """Single listings score the same through onnxruntime and predict_from_model"""
+    model, onnx_model = exported
+    for row in edge_cases(30).to_dict(orient="records"):
+        expected = predict_from_model(model, row)
+        actual = onnx_model.predict(onnx_model.prepare(pd.DataFrame([row])))[0]
+        assert actual == pytest.approx(expected, rel=1e-5)
+
+
+def test_onnx_matches_batch_features(exported):
+    """Batch-level statistics (mean fill, min-max scaling) match build_features"""
+    model, onnx_model = exported
+    df = edge_cases(200)
+    np.testing.assert_allclose(onnx_model.predict_frame(df), model.predict(build_features(df)), rtol=1e-5)
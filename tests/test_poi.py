@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import lightgbm as lgb
+
+import src.features as features
+from src.features import build_features
+from src.model import load_bundle, save_model
+from src.poi import PoiLayer, load_pois
+from benchmarks.synthetic import make_properties
+
+POI_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "pois.csv")
+
+
+def test_brute_force_matches_trees():
+    """Both query paths give the same nearest distances and counts; invalid coordinates stay NaN"""
+    rng = np.random.default_rng(0)
+    n = 600
+    layer = PoiLayer(pd.DataFrame({
+        "category": rng.choice(["Metro Station", "school", "hospital"], n),
+        "name": [f"poi {i}" for i in range(n)],
+        "lat": 12.97 + rng.normal(0, 0.1, n),
+        "lon": 77.59 + rng.normal(0, 0.1, n),
+    }), radius_km=1.5)
+    assert layer.feature_names()[:2] == ["dist_hospital_km", "hospital_within_1_5km"]
+    assert "dist_metro_station_km" in layer.feature_names()
+
+    lat, lon = 12.97 + rng.normal(0, 0.05, 500), 77.59 + rng.normal(0, 0.05, 500)
+    brute = layer._brute_force(np.radians(lat), np.radians(lon))
+    trees = layer._trees(np.radians(lat), np.radians(lon))
+    assert np.allclose(brute[0], trees[0], atol=1e-9)
+    assert (brute[1] == trees[1]).all()
+
+    lat[3] = np.nan
+    nearest, within = layer.query(lat, lon)
+    assert np.isnan(nearest[3]).all() and np.isnan(within[3]).all()
+    assert np.allclose(np.delete(nearest, 3, axis=0), np.delete(brute[0], 3, axis=0))
+
+
+def test_poi_features_in_bundle(tmp_path):
+    """POI features are built from the bundle's layer, the same as from the module-level one"""
+    layer = load_pois(POI_FILE)
+    df = make_properties(300, seed=2)
+    y = df.pop("price")
+    saved, saved_tfidf = features.get_poi_layer(), features.get_tfidf()
+    try:
+        features.set_poi_layer(layer)
+        X = build_features(df, fit_vectorizer=True)
+        assert set(layer.feature_names()) <= set(X.columns)
+        assert (X["dist_metro_km"] > 0).all() and (X["metro_within_1km"] >= 0).all()
+        save_model(lgb.LGBMRegressor(n_estimators=5, verbose=-1).fit(X, y), tmp_path / "pois.pkl")
+    finally:
+        features.set_poi_layer(saved)
+        features.set_tfidf(saved_tfidf)
+
+    bundle = load_bundle(tmp_path / "pois.pkl")
+    assert bundle["poi_layer"] is not None
+    X_bundle = build_features(df, bundle=bundle)
+    assert X_bundle.columns.tolist() == X.columns.tolist()
+    assert np.allclose(X_bundle.to_numpy(), X.to_numpy())
+
+
+def test_nearby_endpoint(monkeypatch):
+    """/nearby lists the nearest POI per category, or 404s without a POI layer"""
+    from app.api_server import app
+
+    with app.test_client() as client:
+        monkeypatch.setattr(features, "poi_layer", None)
+        assert client.get('/nearby?lat=12.97&lon=77.59').status_code == 404
+
+        monkeypatch.setattr(features, "poi_layer", load_pois(POI_FILE))
+        response = client.get('/nearby?lat=12.9755&lon=77.6068')
+        assert response.status_code == 200
+        nearby = response.get_json()["nearby"]
+        assert set(nearby) == {"hospital", "mall", "metro", "school"}
+        assert nearby["metro"]["name"] == "MG Road" and nearby["metro"]["distance_km"] < 0.01
+        assert client.get('/nearby?lat=north').status_code == 400
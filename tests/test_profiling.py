@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+from flask import Flask, jsonify, request
+from src.features import build_features
+from src.profiling import init_app
+from src.wire import prediction_response, read_frame
+
+def make_app(tmp_path, **config):
+    app = Flask(__name__)
+    app.config.update(PROFILE_DIR=str(tmp_path), **config)
+    init_app(app)
+
+    @app.route("/features", methods=["POST"])
+    def features():
+        X = build_features(pd.DataFrame([request.get_json()]))
+        return jsonify({"feature_count": X.shape[1]})
+
+    @app.route("/predict", methods=["POST"])
+    def predict():
+        frame, single = read_frame(request)
+        return prediction_response(request, frame["area"] * 1000.0, single)
+
+    return app
+
+PAYLOAD = {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+           "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"}
+
+def test_profile_header_requires_token(tmp_path):
+    """Profiling runs only with the admin token and returns a stage breakdown"""
+    app = make_app(tmp_path, PROFILE_ADMIN_TOKEN="secret")
+    with app.test_client() as client:
+        response = client.post("/features", json=PAYLOAD, headers={"X-Profile": "1", "X-Profile-Token": "wrong"})
+        assert "profile" not in response.get_json()
+
+        response = client.post("/features", json=PAYLOAD, headers={"X-Profile": "1", "X-Profile-Token": "secret"})
+        profile = response.get_json()["profile"]
+        assert {"parse", "features", "features.basic", "features.nlp", "serialize"} <= set(profile["stages"])
+        assert profile["functions"]
+        assert (tmp_path / (profile["profile_id"] + ".prof")).exists()
+
+        response = client.post("/predict", json=PAYLOAD, headers={"X-Profile": "1", "X-Profile-Token": "secret"})
+        assert {"parse", "serialize"} <= set(response.get_json()["profile"]["stages"])
+
+def test_sampling_rotates_files(tmp_path):
+    """Sampled profiles are written to disk and capped at PROFILE_MAX_FILES"""
+    app = make_app(tmp_path, PROFILE_SAMPLE_RATE=1.0, PROFILE_MAX_FILES=2)
+    with app.test_client() as client:
+        for _ in range(4):
+            response = client.post("/features", json=PAYLOAD)
+            assert "profile" not in response.get_json()
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+
+def test_disabled_registers_nothing(tmp_path):
+    """Without a token or sample rate no hooks are installed"""
+    app = make_app(tmp_path)
+    assert not app.before_request_funcs
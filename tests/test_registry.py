@@ -0,0 +1,129 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+
+import numpy as np
+import pytest
+
+import lightgbm as lgb
+
+import src.features as features
+from src.features import build_features
+from src.model import load_bundle, save_model
+from src.registry import load_registry
+from src.wire import PayloadError
+from benchmarks.synthetic import make_properties
+
+REGIONS = [
+    # name, bounds [min_lat, min_lon, max_lat, max_lon], reference point, text vectorizer
+    ("south", [12.0, 77.0, 12.97, 78.0], (12.90, 77.60), "hashing"),
+    ("north", [12.97, 77.0, 14.0, 78.0], (13.05, 77.58), "tfidf"),
+    ("west", [12.0, 76.0, 14.0, 77.0], (12.30, 76.65), "tfidf"),
+]
+
+
+@pytest.fixture(scope="module")
+def regions_file(tmp_path_factory):
+    """One tiny bundle per region, each with its own reference point and vectorizer"""
+    tmp = tmp_path_factory.mktemp("registry")
+    saved, saved_tfidf, saved_ref = features.get_text_vectorizer(), features.get_tfidf(), features.get_ref_point()
+    regions = []
+    for seed, (name, bounds, ref_point, method) in enumerate(REGIONS):
+        features.set_text_vectorizer(method, n_features=8)
+        features.set_ref_point(ref_point)
+        df = make_properties(300, seed=seed)
+        y = df.pop("price")
+        model = lgb.LGBMRegressor(n_estimators=10, verbose=-1).fit(build_features(df, fit_vectorizer=True), y)
+        save_model(model, tmp / f"{name}.pkl")
+        regions.append({"name": name, "model": str(tmp / f"{name}.pkl"), "bounds": bounds})
+    features.set_text_vectorizer(**saved)
+    features.set_tfidf(saved_tfidf)
+    features.set_ref_point(saved_ref)
+
+    path = tmp / "regions.json"
+    path.write_text(json.dumps({"max_models": 2, "default_region": "north", "regions": regions}))
+    return path
+
+
+def test_registry_routes_with_each_bundle(regions_file):
+    """Rows are scored by their region's model with its own reference point, in request order"""
+    registry = load_registry(regions_file)
+    df = make_properties(50, seed=9).drop(columns=["price"])
+    df.loc[0, ["lat", "lon"]] = [12.35, 76.7]   # west
+    df.loc[1, ["lat", "lon"]] = [40.0, -74.0]   # outside every box: default region
+
+    batch = registry.prepare(df)
+    preds = registry.predict(batch)
+    assert len(batch) == len(df) and preds.shape == (len(df),)
+    assert batch.regions[0] == "west" and batch.regions[1] == "north"
+    assert set(batch.regions) == {"south", "north", "west"}
+
+    for name, *_ in REGIONS:
+        rows = np.flatnonzero(batch.regions == name)
+        bundle = load_bundle(registry._by_name[name]["model"])
+        X = build_features(df.iloc[rows], bundle=bundle)
+        np.testing.assert_allclose(preds[rows], bundle["model"].predict(X))
+        assert bundle["ref_point"] == dict((r[0], r[2]) for r in REGIONS)[name]
+    # the global reference point was not touched by scoring
+    assert features.get_ref_point() == features.CITY_CENTER
+
+
+def test_registry_lru_eviction_and_stats(regions_file):
+    """At most max_models bundles stay resident; the least recently used goes first"""
+    registry = load_registry(regions_file)
+    at = {"south": (12.9, 77.5), "north": (13.1, 77.5), "west": (12.3, 76.7)}
+
+    def score(name):
+        df = make_properties(3, seed=1).drop(columns=["price"])
+        df["lat"], df["lon"] = at[name]
+        return registry.predict(registry.prepare(df))
+
+    score("south")
+    score("north")
+    score("south")   # hit; north is now least recently used
+    score("west")    # evicts north
+    stats = registry.stats()
+    assert [r["region"] for r in stats["resident"]] == ["south", "west"]
+    assert (stats["loads"], stats["hits"], stats["evictions"]) == (3, 1, 1)
+
+    score("north")   # reloaded, evicts south
+    stats = registry.stats()
+    assert [r["region"] for r in stats["resident"]] == ["west", "north"]
+    assert (stats["loads"], stats["evictions"]) == (4, 2)
+
+
+def test_registry_without_default_rejects_unrouted(regions_file):
+    config = json.loads(regions_file.read_text())
+    config.pop("default_region")
+    path = regions_file.parent / "no_default.json"
+    path.write_text(json.dumps(config))
+    df = make_properties(2, seed=3).drop(columns=["price"])
+    df.loc[1, "lat"] = np.nan
+    with pytest.raises(PayloadError) as e:
+        load_registry(path).prepare(df)
+    assert e.value.status == 422
+
+
+def test_request_log_records_each_rows_region_bundle(regions_file, tmp_path, monkeypatch):
+    """In registry mode each logged row carries the version of the region bundle that scored it"""
+    pytest.importorskip("pyarrow")
+    import src.request_log as request_log
+    from src.request_log import RequestLog, log_request, model_version, read_log
+
+    registry = load_registry(regions_file)
+    df = make_properties(20, seed=9).drop(columns=["price"])
+    df.loc[0, ["lat", "lon"]] = [12.35, 76.7]   # west
+    batch = registry.prepare(df)
+    preds = registry.predict(batch)
+
+    log = RequestLog(str(tmp_path / "log"), model_version=model_version(regions_file))
+    monkeypatch.setattr(request_log, "request_log", log)
+    log_request("/predict", df, preds, None, registry, batch)
+    log.close()
+
+    logged = read_log(str(tmp_path / "log"))
+    expected = [model_version(registry._by_name[name]["model"]) for name in batch.regions]
+    assert logged["model_version"].tolist() == expected
+    assert len(set(expected)) > 1
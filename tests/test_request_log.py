@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import src.request_log as request_log
+from src.request_log import RequestLog, read_log
+from benchmarks.replay import logged_requests, model_scorer, replay
+from benchmarks.synthetic import make_properties
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_request_log_rotates_and_reads_back(tmp_path, fmt):
+    log = RequestLog(tmp_path, model_version="test:1", fmt=fmt, flush_rows=10, rotate_rows=20)
+    frames = [make_properties(n, seed=n).drop(columns=["price"]) for n in (1, 7, 12, 3)]
+    for df in frames:
+        log.record("/predict", df, np.arange(len(df), dtype=float), {"features": 0.002})
+    log.close()
+
+    assert len(log.files) >= 2 and not any(p.endswith(".tmp") for p in os.listdir(tmp_path))
+    logged = read_log(str(tmp_path))
+    assert len(logged) == sum(len(df) for df in frames)
+    assert logged["request_id"].nunique() == len(frames)
+    assert (logged["model_version"] == "test:1").all()
+    first = logged[logged["rows"] == 7]
+    np.testing.assert_array_equal(first["area"], frames[1]["area"])
+    assert first["description"].tolist() == frames[1]["description"].tolist()
+    assert dict(first["timings_ms"].iloc[0]) == {"features": 2.0}
+
+
+def test_predict_traffic_replays_to_same_predictions(tmp_path):
+    """Requests logged by /predict replay in-process to the predictions that were served"""
+    from app.api_server import app, MODEL_PATH
+
+    log = RequestLog(tmp_path, model_version="lgb", flush_seconds=0.05)
+    saved = request_log.get_request_log()
+    request_log.set_request_log(log)
+    try:
+        rows = make_properties(5, seed=4).drop(columns=["price"]).to_dict(orient="records")
+        with app.test_client() as client:
+            assert client.post('/predict', json=rows[0]).status_code == 200
+            assert client.post('/predict', json=rows[1:]).status_code == 200
+    finally:
+        request_log.set_request_log(saved)
+        log.close()
+
+    logged = read_log(str(tmp_path))
+    assert logged["rows"].tolist() == [1, 4, 4, 4, 4]
+    assert set(dict(logged["timings_ms"].iloc[0])) == {"parse", "features", "predict"}
+    result = replay(logged_requests(logged), model_scorer(MODEL_PATH))
+    assert result["requests"] == 2 and result["rows"] == 5
+    assert result["prediction_change"]["max_abs"] < 1e-6
@@ -0,0 +1,44 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from src.run_report import RunReport, report_path, report_stage
+
+
+def test_run_report_records_each_stage(tmp_path):
+    """Two stages are saved with their seconds, rows and RSS; without a report, stages are no-ops"""
+    report = RunReport(sample_interval=0.01)
+    with report_stage(report, "load", rows=1000) as record:
+        time.sleep(0.02)
+        record["features"] = 6
+    with report_stage(report, "allocate") as record:
+        block = np.ones((64, 1024, 1024), dtype=np.uint8)  # 64 MB, touched
+        record["rows"] = len(block)
+        time.sleep(0.05)  # let the RSS sampler see it
+        del block
+    with report_stage(None, "ignored") as record:
+        record["rows"] = 1
+    report.meta["model"] = "test"
+
+    path = report_path(str(tmp_path / "model.pkl"))
+    assert path == str(tmp_path / "model.report.json")
+    report.save(path)
+    with open(path) as f:
+        saved = json.load(f)
+
+    assert saved["model"] == "test" and saved["total_wall_seconds"] > 0
+    load, allocate = saved["stages"]
+    assert [load["stage"], allocate["stage"]] == ["load", "allocate"]
+    assert load["rows"] == 1000 and load["features"] == 6
+    assert load["wall_seconds"] >= 0.02 and load["cpu_seconds"] >= 0
+    assert load["rows_per_sec"] == pytest.approx(1000 / load["wall_seconds"], rel=1e-3)
+    assert allocate["rows"] == 64
+    for stage in (load, allocate):
+        assert stage["rss_start_mb"] > 0 and stage["peak_rss_mb"] >= stage["rss_start_mb"]
+    assert allocate["peak_rss_mb"] - allocate["rss_start_mb"] >= 32
@@ -0,0 +1,47 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import src.features as features
+from src.features import build_features
+from src.sentiment import BULK_MIN_ROWS, BULK_TOLERANCE, BulkSentiment
+from benchmarks.synthetic import make_properties
+
+# VADER's own examples plus the context rules: negation, boosters, caps, idioms, "least", "but", punctuation
+SENTENCES = [
+    "VADER is smart, handsome, and funny.", "VADER is VERY SMART, uber handsome, and FRIGGIN FUNNY!!!",
+    "VADER is not smart, handsome, nor funny.", "At least it isn't a horrible book.",
+    "The book was only kind of good.", "The plot was good, but the characters are uncompelling and the dialog is not great.",
+    "Today only kinda sux! But I'll get by, lol", "Make sure you :) or :D today!",
+    "Catch utf-8 emoji such as 💘 and 💋 and 😁", "Not bad at all", "no good", "it is no bad or good",
+    "it was never so good", "without a doubt great", "the very least good", "near the bus stop nice",
+    "this place is to die for", "good?? bad???? ok", "NOT VERY GOOD at all but ok", "sort of good place to live",
+    "nice hhok but hhok nice", "", "   ",
+]
+
+
+def test_bulk_sentiment_matches_vader():
+    bulk = BulkSentiment(features.analyzer)
+    df = pd.read_csv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  "data", "sample_properties.csv"))
+    texts = SENTENCES * 4 + df["description"].fillna("").astype(str).tolist() \
+        + make_properties(2000, seed=3)["description"].fillna("").astype(str).tolist()
+    assert len(texts) >= BULK_MIN_ROWS
+    exact = np.array([features.analyzer.polarity_scores(t)["compound"] for t in texts])
+    np.testing.assert_allclose(bulk.scores(texts), exact, rtol=0, atol=BULK_TOLERANCE)
+
+
+def test_sentiment_mode_in_build_features():
+    df = make_properties(500, seed=5).drop(columns=["price"])
+    df.loc[0, "description"] = "Not a bad flat, but VERY noisy!!"
+    try:
+        features.set_sentiment_mode("exact")
+        exact = build_features(df)["sentiment"].to_numpy()
+        features.set_sentiment_mode("bulk")
+        bulk = build_features(df)["sentiment"].to_numpy()
+    finally:
+        features.set_sentiment_mode("bulk")
+    np.testing.assert_allclose(bulk, exact, rtol=0, atol=BULK_TOLERANCE)
@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+
+import numpy as np
+
+import src.shadow as shadow
+from src.features import build_features
+from src.model import load_bundle, load_model
+from src.shadow import ShadowEvaluator
+from benchmarks.synthetic import make_properties
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "lgb_model.pkl")
+
+
+class Shifted:
+    """The primary model plus a constant (and a delay): a candidate with a known delta."""
+
+    def __init__(self, model, shift, delay=0.0):
+        self.model, self.shift, self.delay = model, shift, delay
+
+    def predict(self, X):
+        time.sleep(self.delay)
+        return self.model.predict(X) + self.shift
+
+
+def candidate(shift=1000.0, delay=0.0, **settings):
+    primary = load_model(MODEL_PATH)
+    bundle = load_bundle(MODEL_PATH)
+    bundle.update(model=Shifted(bundle["model"], shift, delay), **settings)
+    return primary, bundle
+
+
+def test_shadow_reports_deltas_and_latency():
+    """Sampled requests are scored off the request path and compared with the primary's predictions"""
+    primary, bundle = candidate(shift=1000.0)
+    evaluator = ShadowEvaluator(bundle, version="candidate", sample_rate=1.0, cpu_budget=1.0, seed=0)
+    assert evaluator.shared_features
+
+    df = make_properties(40, seed=3).drop(columns="price")
+    for start in range(0, 40, 10):
+        part = df.iloc[start:start + 10]
+        X = build_features(part)
+        evaluator.record(part, X, primary.predict(X), 0.002)
+    evaluator.drain()
+
+    report = evaluator.report()
+    assert report["requests"] == 4 and report["rows"] == 40
+    assert report["outcomes"]["scored"] == 4
+    assert np.isclose(report["delta"]["mean"], 1000.0) and np.isclose(report["delta"]["rmse"], 1000.0)
+    assert np.isclose(report["delta"]["p95"], 1000.0)
+    assert report["latency_ms"]["primary"]["p50"] == 2.0
+    assert report["latency_ms"]["shadow"]["p50"] > 0
+
+
+def test_sampling_and_cpu_budget():
+    """Unsampled requests are skipped, and so are requests once the CPU budget is spent"""
+    primary, bundle = candidate(delay=0.03)
+    df = make_properties(100, seed=4).drop(columns="price")
+    X = build_features(df)
+    preds = primary.predict(X)
+
+    unsampled = ShadowEvaluator(bundle, sample_rate=0.0)
+    for _ in range(5):
+        unsampled.record(df, X, preds, 0.001)
+    assert unsampled.outcomes["unsampled"] == 5 and unsampled.outcomes["scored"] == 0
+
+    # a 0.1% budget holds 10 ms of burst: the first 100-row request (~55 ms reserved, 30+ ms spent) overdraws it
+    budgeted = ShadowEvaluator(bundle, sample_rate=1.0, cpu_budget=0.001)
+    for _ in range(5):
+        budgeted.record(df, X, preds, 0.001)
+    budgeted.drain()
+    assert budgeted.outcomes["scored"] == 1 and budgeted.outcomes["budget"] == 4
+
+
+def test_candidate_features_and_endpoint(monkeypatch):
+    """A candidate with another reference point builds its own features; /shadow serves the report"""
+    from app.api_server import app
+
+    primary, bundle = candidate(shift=0.0, ref_point=(19.076, 72.8777))
+    evaluator = ShadowEvaluator(bundle, version="candidate", sample_rate=1.0, cpu_budget=1.0)
+    assert not evaluator.shared_features
+
+    with app.test_client() as client:
+        monkeypatch.setattr(shadow, "shadow", None)
+        assert client.get('/shadow').status_code == 404
+
+        monkeypatch.setattr(shadow, "shadow", evaluator)
+        test_data = {"area": 1200, "bedrooms": 3, "bathrooms": 2, "year_built": 2015,
+                     "lat": 12.9716, "lon": 77.5946, "description": "3BHK near IT hub"}
+        assert client.post('/predict', json=test_data).status_code == 200
+        evaluator.drain()
+        report = client.get('/shadow').get_json()
+    assert report["candidate"] == "candidate" and report["shared_features"] is False
+    assert report["requests"] == 1 and report["outcomes"]["error"] == 0
+
+
+def test_cpu_budget_holds_under_load(monkeypatch):
+    """A real LightGBM candidate offered every request uses no more CPU than its budget grants"""
+    monkeypatch.setattr(shadow, "BURST_SECONDS", 0.5)
+    primary = load_model(MODEL_PATH)
+    evaluator = ShadowEvaluator(load_bundle(MODEL_PATH), sample_rate=1.0, cpu_budget=0.1)
+    df = make_properties(2000, seed=5).drop(columns="price")
+    X = build_features(df)
+    preds = primary.predict(X)
+
+    cpu, start = time.process_time(), time.monotonic()
+    while time.monotonic() - start < 3.0:
+        evaluator.record(df, X, preds, 0.01)
+        time.sleep(0.01)
+    evaluator.drain()
+    used, elapsed = time.process_time() - cpu, time.monotonic() - start
+
+    granted = 0.1 * (0.5 + elapsed)
+    assert evaluator.outcomes["scored"] > 0 and evaluator.outcomes["budget"] > 0
+    # the shadow thread's scoring is nearly all of this process's CPU; allow one overdrawn request and the loop
+    assert used < granted * 1.5 + 0.1
@@ -0,0 +1,71 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import joblib
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+import src.features as features
+from src.features import build_features, build_sparse_features, set_text_vectorizer
+from src.model import load_model, save_model
+from benchmarks.synthetic import make_properties
+
+
+@pytest.fixture(autouse=True)
+def restore_text_vectorizer():
+    saved, saved_tfidf = features.get_text_vectorizer(), features.get_tfidf()
+    yield
+    set_text_vectorizer(**saved)
+    features.set_tfidf(saved_tfidf)
+
+
+def test_sparse_features_match_dense():
+    """build_sparse_features returns the build_features columns as CSR"""
+    df = make_properties(200).drop(columns=["price"])
+    X = build_features(df, fit_vectorizer=True)
+    S, names = build_sparse_features(df)
+
+    assert sp.isspmatrix_csr(S) and S.dtype == np.float32
+    assert names == X.columns.tolist()
+    np.testing.assert_array_equal(S.toarray(), X.to_numpy())
+
+
+def test_hashing_vectorizer_is_stateless_and_chunk_parallel(monkeypatch):
+    """Hashing needs no fit and gives the same matrix when chunked across jobs"""
+    df = make_properties(300).drop(columns=["price"])
+    features.set_tfidf(None)
+    set_text_vectorizer("hashing", 1024)
+    serial, names = build_sparse_features(df)
+
+    monkeypatch.setattr(features, "HASH_CHUNK_ROWS", 100)
+    set_text_vectorizer("hashing", 1024, n_jobs=2)
+    parallel, _ = build_sparse_features(df)
+
+    assert features.get_tfidf() is None
+    assert names[-1] == "hash_1023"
+    assert (serial != parallel).nnz == 0
+
+
+def test_hashing_bundle_ships_no_fitted_vectorizer(tmp_path):
+    """A hashing bundle stores only settings and restores them on load"""
+    df = make_properties(50)
+    y = df.pop("price")
+    set_text_vectorizer("hashing", 256)
+    S, names = build_sparse_features(df)
+
+    import lightgbm as lgb
+    model = lgb.LGBMRegressor(n_estimators=5, verbose=-1).fit(S, y, feature_name=names)
+    path = tmp_path / "model.pkl"
+    save_model(model, path)
+
+    bundle = joblib.load(path)
+    assert bundle["tfidf"] is None
+    assert bundle["text_vectorizer"] == {"method": "hashing", "n_features": 256}
+
+    set_text_vectorizer("tfidf", 50)
+    loaded = load_model(path)
+    X = build_features(df.head(3))
+    assert X.shape[1] == len(names)
+    np.testing.assert_allclose(loaded.predict(X), model.predict(S[:3]), rtol=1e-6)
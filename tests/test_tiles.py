@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from src.model import load_model
+from src.tiles import build_tiles, cell_centers, colorize, encode_png, score_tiles, tile_metadata, tile_range,\
+    tile_version
+
+MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models", "lgb_model.pkl")
+BOUNDS = (12.95, 77.55, 13.00, 77.62)
+
+
+def test_tile_geometry_and_png():
+    """Cell centers fall inside their tile, north row first; the PNG decodes back to the pixels"""
+    x0, x1, y0, y1 = tile_range(BOUNDS, 12)
+    assert x0 <= x1 and y0 <= y1
+    lat, lon = cell_centers(12, x0, y1, size=8)
+    assert lat.shape == lon.shape == (8, 8)
+    assert (np.diff(lat[:, 0]) < 0).all() and (np.diff(lon[0]) > 0).all()
+    # the southwest corner of the bounds lies in the southwest tile
+    assert lat.min() < BOUNDS[0] + 0.1 and lon.min() < BOUNDS[1] < lon.max() + 0.1
+
+    rgba = colorize(np.linspace(0, 100, 24).reshape(4, 6), 10, 90)
+    assert rgba.shape == (4, 6, 4) and rgba.dtype == np.uint8
+    png = encode_png(rgba)
+    assert png[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", png[16:24])
+    assert (width, height) == (6, 4)
+    (length,) = struct.unpack(">I", png[33:37])
+    raw = zlib.decompress(png[41:41 + length])
+    rows = np.frombuffer(raw, dtype=np.uint8).reshape(4, 1 + 6 * 4)
+    assert (rows[:, 0] == 0).all() and (rows[:, 1:].reshape(4, 6, 4) == rgba).all()
+
+
+def test_tiles_do_not_depend_on_batch():
+    """A tile scores the same alone as batched with others, so neighbouring tiles agree at the seams"""
+    model = load_model(MODEL_PATH)
+    x0, x1, y0, y1 = tile_range(BOUNDS, 13)
+    tiles = [(13, x, y) for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+    assert len(tiles) > 1
+    batched = score_tiles(model, tiles, size=8)
+    alone = score_tiles(model, tiles[-1:], size=8)
+    assert np.allclose(batched[tiles[-1]], alone[tiles[-1]])
+    assert np.isfinite(batched[tiles[0]]).all()
+
+
+def test_build_and_serve_tiles(tmp_path, monkeypatch):
+    """Tiles are written per model version and served with immutable cache headers"""
+    import app.api_server as api_server
+
+    model = load_model(MODEL_PATH)
+    root = build_tiles(model, MODEL_PATH, tmp_path, bounds=BOUNDS, zooms=[12, 13], size=16)
+    with open(os.path.join(root, "metadata.json")) as f:
+        metadata = json.load(f)
+    version = metadata["version"]
+    assert root == os.path.join(tmp_path, version) and version.startswith(tile_version(MODEL_PATH) + "-")
+    assert metadata["zooms"] == [12, 13] and metadata["scale"]["low"] <= metadata["scale"]["high"]
+    x0, _, y0, _ = tile_range(BOUNDS, 12)
+    png_path = os.path.join(root, "12", str(x0), f"{y0}.png")
+    with open(png_path, "rb") as f:
+        png = f.read()
+
+    # other settings never write into an existing version's immutable tiles; the same settings do not move
+    assert build_tiles(model, MODEL_PATH, tmp_path, bounds=BOUNDS, zooms=[12, 13], size=16) == root
+    npy_root = build_tiles(model, MODEL_PATH, tmp_path, bounds=BOUNDS, zooms=[12], size=16, fmt="npy")
+    template_root = build_tiles(model, MODEL_PATH, tmp_path, bounds=BOUNDS, zooms=[12, 13], size=16,
+                                template={"area": 3000, "bedrooms": 4, "bathrooms": 3, "year_built": 2020,
+                                          "description": "4BHK villa with garden"})
+    assert len({root, npy_root, template_root}) == 3
+    assert np.load(os.path.join(npy_root, "12", str(x0), f"{y0}.npy")).shape == (16, 16)
+    with open(png_path, "rb") as f:
+        assert f.read() == png
+    assert tile_metadata(tmp_path, MODEL_PATH)["version"] == os.path.basename(template_root)
+
+    monkeypatch.setattr(api_server, "TILES_DIR", str(tmp_path))
+    monkeypatch.setattr(api_server, "tile_set", metadata)
+    with api_server.app.test_client() as client:
+        response = client.get(f"/tiles/{version}/12/{x0}/{y0}.png")
+        assert response.status_code == 200 and response.mimetype == "image/png"
+        assert response.cache_control.public and response.cache_control.immutable
+        assert response.cache_control.max_age == 365 * 24 * 3600
+        assert client.get(f"/tiles/{version}/12/{x0}/{y0}.gif").status_code == 404
+        assert client.get(f"/tiles/{version}/5/0/0.png").status_code == 404
+        assert client.get("/tiles/current").get_json()["version"] == version
@@ -1,32 +1,120 @@
 import argparse
 import json
+import os
+import pandas as pd
 from src.data import load_data
-from src.model import train_lgb, save_model, load_model, predict_from_model
-from src.features import build_features
+from src.distill import distill, pick_fast_tier, print_tradeoff
+from src.drift import reference_sketches
+from src.market import MARKET_COLUMNS, market_stats
+from src.model import train_lgb, train_text_free, save_model, load_model, predict_from_model
+from src.features import CITY_CENTER, build_features, set_feature_backend, set_poi_layer, set_ref_point, \
+    set_sentiment_mode, set_text_vectorizer
+from src.poi import load_pois
+from src.run_report import RunReport, report_path
+from src.tiles import TILE_BOUNDS, TILE_FORMATS, TILE_ZOOMS, build_tiles
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--mode", type=str, choices=["train", "predict"], required=True)
+    parser.add_argument("--mode", type=str, choices=["train", "predict", "export_onnx", "tiles"], required=True)
     parser.add_argument("--data", type=str, help="Path to training CSV")
     parser.add_argument("--model_output", type=str, help="Path to save trained model")
     parser.add_argument("--model", type=str, help="Path to trained model file")
     parser.add_argument("--input_json", type=str, help="JSON string of input features for prediction")
+    parser.add_argument("--onnx_output", type=str, help="Where to write the ONNX pipeline (default: next to --model)")
+    parser.add_argument("--tiles_output", type=str, default="tiles", help="Directory of the price-surface tiles")
+    parser.add_argument("--tile_bounds", type=str, default=",".join(str(c) for c in TILE_BOUNDS),
+                        help="Area to cover as 'min_lat,min_lon,max_lat,max_lon'")
+    parser.add_argument("--tile_zooms", type=str, default=",".join(str(z) for z in TILE_ZOOMS),
+                        help="Comma-separated zoom levels")
+    parser.add_argument("--tile_template", type=str,
+                        help="JSON of the property scored on every tile cell (default: a typical 2BHK)")
+    parser.add_argument("--tile_format", type=str, choices=list(TILE_FORMATS), default="png",
+                        help="png heatmaps or npy float32 price arrays")
+    parser.add_argument("--text_vectorizer", type=str, choices=["tfidf", "hashing"], default="tfidf",
+                        help="Fitted TF-IDF vocabulary or stateless feature hashing for descriptions")
+    parser.add_argument("--text_features", type=int, default=50, help="Number of text feature columns")
+    parser.add_argument("--text_jobs", type=int, default=1, help="Parallel jobs for feature hashing")
+    parser.add_argument("--ref_point", type=str, default=",".join(str(c) for c in CITY_CENTER),
+                        help="lat,lon the geo features measure distance from (the region's CBD)")
+    parser.add_argument("--pois", type=str,
+                        help="CSV of points of interest (category,name,lat,lon) for nearest-amenity features")
+    parser.add_argument("--poi_radius_km", type=float, default=1.0,
+                        help="Radius for the POI count features")
+    parser.add_argument("--feature_jobs", type=int, default=1,
+                        help="Worker processes for row-local feature building (-1 = all cores)")
+    parser.add_argument("--sentiment", type=str, choices=["bulk", "exact"], default="bulk",
+                        help="Score sentiment over the whole column (bulk) or per description with VADER (exact)")
+    parser.add_argument("--feature_backend", type=str, choices=["pandas", "polars"], default="pandas",
+                        help="Engine for the engineered features (polars needs polars installed)")
+    parser.add_argument("--fast_tier", action="store_true",
+                        help="Also distill a smaller, lower-latency model into the bundle (served with ?tier=fast)")
+    parser.add_argument("--fast_tier_tolerance", type=float, default=0.05,
+                        help="Largest relative RMSE increase accepted for the fast tier")
 
     args = parser.parse_args()
+    set_feature_backend(args.feature_backend)
 
     if args.mode == "train":
         if not args.data or not args.model_output:
             raise ValueError("For training, you must provide --data and --model_output")
 
-        # Load and preprocess training data
-        X, y = load_data(args.data, fit_vectorizer=True)
+        report = RunReport()
+        set_text_vectorizer(args.text_vectorizer, args.text_features, n_jobs=args.text_jobs)
+        set_ref_point([float(c) for c in args.ref_point.split(",")])
+        set_sentiment_mode(args.sentiment)
+        if args.pois:
+            set_poi_layer(load_pois(args.pois, args.poi_radius_km))
+
+        # Load and preprocess training data (text features stay sparse)
+        X, y, feature_names = load_data(args.data, fit_vectorizer=True, report=report, sparse=True,
+                                      n_jobs=args.feature_jobs)
 
         # Train model
-        model, best_params, rmse, r2, importance_df = train_lgb(X, y)
+        model, best_params, rmse, r2, importance_df = train_lgb(X, y, report=report, feature_names=feature_names)
+
+        # Text-free companion served when a request's deadline leaves no time for the NLP stage
+        with report.stage("fallback_model", rows=X.shape[0]):
+            fallback_model, fallback_rmse = train_text_free(X, y, feature_names, best_params)
+
+        # Distill the fast tier: the lowest-latency student within the RMSE tolerance
+        fast_model = None
+        if args.fast_tier:
+            with report.stage("distill", rows=X.shape[0], features=X.shape[1]):
+                tradeoff, students = distill(model, X, y, feature_names)
+            chosen = pick_fast_tier(tradeoff, args.fast_tier_tolerance)
+            print_tradeoff(tradeoff, chosen)
+            if chosen is None:
+                print(f"⚠️ No fast tier candidate within {args.fast_tier_tolerance:.0%} of the full model's RMSE")
+            else:
+                fast_model = students[chosen]
+            report.meta["fast_tier"] = {"chosen": chosen, "tolerance": args.fast_tier_tolerance,
+                                        "candidates": tradeoff}
 
-        # Save model
-        save_model(model, args.model_output, importance_df)
+        # Market statistics behind /api/market-data, from the raw listings and their prices
+        with report.stage("market_stats", rows=X.shape[0]):
+            market = market_stats(pd.read_csv(args.data, usecols=lambda c: c in MARKET_COLUMNS), y)
+
+        # Save model with the training feature sketches for drift monitoring
+        with report.stage("save"):
+            save_model(model, args.model_output, importance_df,
+                       drift_reference=reference_sketches(X, feature_names), fast_model=fast_model,
+                       fallback_model=fallback_model, market_stats=market)
+
+        report.meta.update({
+            "data": args.data,
+            "model_output": args.model_output,
+            "rows": int(X.shape[0]),
+            "features": int(X.shape[1]),
+            "text_vectorizer": args.text_vectorizer,
+            "ref_point": args.ref_point,
+            "pois": args.pois,
+            "best_params": best_params,
+            "rmse": rmse,
+            "r2": r2,
+            "fallback_rmse": fallback_rmse,
+        })
+        report.save(report_path(args.model_output))
 
         print("\n✅ Training complete")
         print(f"Model saved to: {args.model_output}")
@@ -49,6 +137,28 @@ def main():
 
         print(json.dumps({"prediction": pred}, indent=2))
 
+    elif args.mode == "export_onnx":
+        if not args.model:
+            raise ValueError("For ONNX export, you must provide --model")
+
+        from src.onnx_export import export_onnx
+
+        model = load_model(args.model)
+        export_onnx(model, args.onnx_output or os.path.splitext(args.model)[0] + ".onnx")
+
+    elif args.mode == "tiles":
+        if not args.model:
+            raise ValueError("For tiles, you must provide --model")
+
+        model = load_model(args.model)
+        bounds = tuple(float(v) for v in args.tile_bounds.split(","))
+        if len(bounds) != 4:
+            raise ValueError("--tile_bounds must be 'min_lat,min_lon,max_lat,max_lon'")
+        zooms = [int(z) for z in args.tile_zooms.split(",")]
+        template = json.loads(args.tile_template) if args.tile_template else None
+        build_tiles(model, args.model, args.tiles_output, bounds=bounds, zooms=zooms, template=template,
+                    fmt=args.tile_format)
+
 
 if __name__ == "__main__":
     main()